@@ -0,0 +1,250 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+from prometheus_client import Counter, Gauge
+
+from app.core.config import settings
+
+ADMISSION_REJECTED = Counter(
+    "gateway_admission_rejected_total",
+    "Requests turned away before reaching an upstream",
+    ["route", "priority", "reason"],
+)
+ADMISSION_LIMIT = Gauge(
+    "gateway_admission_limit",
+    "Current concurrency limit for each route",
+    ["route"],
+)
+
+CRITICAL = "critical"
+NORMAL = "normal"
+LOW = "low"
+
+# Share of a route's limit each class may fill; lower classes are shed first.
+PRIORITY_SHARES = {CRITICAL: 1.0, NORMAL: 0.8, LOW: 0.5}
+
+
+class Rejected(Exception):
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+    def response(self) -> JSONResponse:
+        return JSONResponse({"detail": self.detail}, status_code=self.status_code,
+                            headers={"Retry-After": str(self.retry_after)})
+
+
+class PriorityRule:
+    def __init__(self, method: str, prefix: str, priority: str):
+        self.method = method.upper()
+        self.prefix = prefix.rstrip("/")
+        self.priority = priority
+
+    def matches(self, method: str, path: str) -> bool:
+        if self.method != "*" and self.method != method:
+            return False
+        return path == self.prefix or path.startswith(self.prefix + "/")
+
+
+def parse_priority_rules(value: str) -> List[PriorityRule]:
+    """Parse ``METHOD /prefix=class`` entries separated by commas; ``*`` matches any method."""
+    rules = []
+    for entry in value.split(","):
+        target, _, priority = entry.strip().partition("=")
+        method, _, prefix = target.strip().partition(" ")
+        if not prefix or priority not in PRIORITY_SHARES:
+            continue
+        rules.append(PriorityRule(method, prefix.strip(), priority))
+    return sorted(rules, key=lambda rule: len(rule.prefix), reverse=True)
+
+
+def parse_route_limits(value: str) -> Dict[str, int]:
+    """Parse ``/prefix=limit`` entries separated by commas."""
+    limits = {}
+    for entry in value.split(","):
+        prefix, _, limit = entry.strip().partition("=")
+        if prefix and limit:
+            limits[prefix.rstrip("/")] = int(limit)
+    return limits
+
+
+class AdaptiveLimit:
+    """Concurrency limit that shrinks when upstream latency rises above its baseline.
+
+    Follows the gradient approach: the limit is scaled by the ratio of the
+    long-run average latency to the latest sample, clamped to [0.5, 1], plus a
+    small allowance for queueing. While latency holds steady the limit creeps
+    up towards ``max_limit``; when it climbs the limit falls quickly.
+    """
+
+    def __init__(self, initial: int, min_limit: int, max_limit: int, adaptive: bool = True,
+                 smoothing: float = 0.2, tolerance: float = 1.5):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.adaptive = adaptive
+        self.smoothing = smoothing
+        self.tolerance = tolerance
+        self.limit = float(min(max(initial, min_limit), max_limit) if adaptive else max_limit)
+        self.in_flight = 0
+        self._long_rtt: Optional[float] = None
+
+    def try_acquire(self, share: float) -> bool:
+        if self.in_flight >= max(self.limit * share, 1):
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self, latency: Optional[float] = None) -> None:
+        in_flight = self.in_flight
+        self.in_flight -= 1
+        if latency is None or not self.adaptive or latency <= 0:
+            return
+        if self._long_rtt is None:
+            self._long_rtt = latency
+        else:
+            self._long_rtt = 0.95 * self._long_rtt + 0.05 * latency
+            if self._long_rtt / latency > 2:
+                # Let the baseline drift back down after a sustained slowdown ends.
+                self._long_rtt *= 0.95
+        gradient = max(0.5, min(1.0, self.tolerance * self._long_rtt / latency))
+        new_limit = self.limit * gradient + math.sqrt(self.limit)
+        if in_flight < self.limit / 2 and new_limit >= self.limit:
+            # Only grow a limit that is actually being used.
+            return
+        self.limit = (1 - self.smoothing) * self.limit + self.smoothing * new_limit
+        self.limit = min(max(self.limit, self.min_limit), self.max_limit)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+
+    def take(self) -> float:
+        """Take a token; return 0 on success or the seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class Permit:
+    def __init__(self, limiter: AdaptiveLimit, route: str):
+        self.limiter = limiter
+        self.route = route
+        self._released = False
+
+    def release(self, latency: Optional[float] = None) -> None:
+        if self._released:
+            return
+        self._released = True
+        self.limiter.release(latency)
+        if self.limiter.adaptive:
+            ADMISSION_LIMIT.labels(route=self.route).set(self.limiter.limit)
+
+
+class AdmissionController:
+    """Decides whether a request may go upstream now.
+
+    Each route has an adaptive concurrency limit. Lower-priority requests may
+    only fill part of it, so browsing is shed before checkout. Clients can
+    also be rate limited with per-client token buckets. Event streams stay
+    open for as long as the client listens, so they would pin the adaptive
+    limit; they are counted against a fixed per-route stream limit instead.
+    Everything runs on the event loop, so no locking is needed.
+    """
+
+    def __init__(self, priority_rules: List[PriorityRule], route_limits: Dict[str, int],
+                 initial_limit: int, min_limit: int, max_limit: int, adaptive: bool,
+                 retry_after: int, rate: float = 0.0, burst: float = 0.0, max_clients: int = 100_000,
+                 max_streams: int = 1000):
+        self.priority_rules = priority_rules
+        self.route_limits = route_limits
+        self.initial_limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.adaptive = adaptive
+        self.retry_after = retry_after
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.max_streams = max_streams
+        self._limiters: Dict[str, AdaptiveLimit] = {}
+        self._stream_limiters: Dict[str, AdaptiveLimit] = {}
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def priority(self, method: str, path: str) -> str:
+        for rule in self.priority_rules:
+            if rule.matches(method, path):
+                return rule.priority
+        return NORMAL
+
+    def limiter(self, route: str) -> AdaptiveLimit:
+        limiter = self._limiters.get(route)
+        if limiter is None:
+            max_limit = self.route_limits.get(route, self.max_limit)
+            limiter = self._limiters[route] = AdaptiveLimit(
+                self.initial_limit, min(self.min_limit, max_limit), max_limit, adaptive=self.adaptive,
+            )
+            ADMISSION_LIMIT.labels(route=route).set(limiter.limit)
+        return limiter
+
+    def check_rate(self, client: str, route: str, priority: str) -> None:
+        if self.rate <= 0:
+            return
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.rate, self.burst)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        self._buckets.move_to_end(client)
+        wait = bucket.take()
+        if wait:
+            ADMISSION_REJECTED.labels(route=route, priority=priority, reason="rate_limit").inc()
+            raise Rejected(429, "Too many requests", math.ceil(wait))
+
+    def admit(self, route: str, priority: str) -> Permit:
+        limiter = self.limiter(route)
+        if not limiter.try_acquire(PRIORITY_SHARES[priority]):
+            ADMISSION_REJECTED.labels(route=route, priority=priority, reason="concurrency").inc()
+            raise Rejected(503, "Service is overloaded, please retry", self.retry_after)
+        return Permit(limiter, route)
+
+    def admit_stream(self, route: str) -> Permit:
+        limiter = self._stream_limiters.get(route)
+        if limiter is None:
+            limiter = self._stream_limiters[route] = AdaptiveLimit(
+                self.max_streams, self.max_streams, self.max_streams, adaptive=False,
+            )
+        if not limiter.try_acquire(1.0):
+            ADMISSION_REJECTED.labels(route=route, priority=NORMAL, reason="streams").inc()
+            raise Rejected(503, "Too many open event streams, please retry", self.retry_after)
+        return Permit(limiter, route)
+
+    def state(self) -> List[Tuple[str, float, int]]:
+        return [(route, limiter.limit, limiter.in_flight) for route, limiter in self._limiters.items()]
+
+
+admission = AdmissionController(
+    priority_rules=parse_priority_rules(settings.ADMISSION_PRIORITIES),
+    route_limits=parse_route_limits(settings.ADMISSION_ROUTE_LIMITS),
+    initial_limit=settings.ADMISSION_INITIAL_LIMIT,
+    min_limit=settings.ADMISSION_MIN_LIMIT,
+    max_limit=settings.ADMISSION_MAX_LIMIT,
+    adaptive=settings.ADMISSION_ADAPTIVE,
+    retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+    rate=settings.RATE_LIMIT_PER_SECOND,
+    burst=settings.RATE_LIMIT_BURST,
+    max_clients=settings.RATE_LIMIT_MAX_CLIENTS,
+    max_streams=settings.STREAM_MAX_CONCURRENT,
+)
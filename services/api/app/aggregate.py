@@ -0,0 +1,96 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import APIRouter, Request, Response, status
+from fastapi.responses import JSONResponse
+
+from app.admission import Rejected, admission
+from app.cache import CacheEntry
+from app.core.config import settings
+from app.proxy import REQUEST_SECONDS, fetch
+
+logger = logging.getLogger(__name__)
+
+ORDER_DETAILS_ROUTE = "/orders/{order_id}/details"
+
+router = APIRouter()
+
+
+def _path(resource: str, id: str) -> str:
+    return f"{settings.API_V1_STR}/{resource}/{quote(id, safe='')}"
+
+
+async def _fetch_json(path: str, headers: List[Tuple[str, str]]) -> Tuple[int, Any]:
+    """Return the status and decoded body of a GET, mapping timeouts and bad bodies to 504 and 502."""
+    try:
+        entry: CacheEntry = await asyncio.wait_for(fetch(path, headers), settings.AGGREGATE_TIMEOUT)
+    except asyncio.TimeoutError:
+        return status.HTTP_504_GATEWAY_TIMEOUT, {"detail": "Upstream service timed out"}
+    try:
+        return entry.status_code, json.loads(entry.body)
+    except ValueError:
+        logger.error(f"Invalid JSON from {path}")
+        return status.HTTP_502_BAD_GATEWAY, {"detail": "Invalid upstream response"}
+
+
+def _error(source: str, code: int, body: Any, id: Optional[str] = None) -> Dict[str, Any]:
+    detail = body.get("detail") if isinstance(body, dict) else None
+    error = {"source": source, "status": code, "detail": detail}
+    if id is not None:
+        error["id"] = id
+    return error
+
+
+@router.get(ORDER_DETAILS_ROUTE)
+async def read_order_details(order_id: str, request: Request) -> Response:
+    """Compose an order with its products and its user in a single response.
+
+    The order is fetched first; its products and the user are then fetched
+    concurrently. Products go through the response cache, and the user is read
+    with the caller's own credentials. If a product or the user cannot be
+    fetched, that part is null and the failure is listed in ``errors``; only a
+    failure to fetch the order fails the whole request.
+    """
+    start = time.perf_counter()
+    route = f"{settings.API_V1_STR}{ORDER_DETAILS_ROUTE}"
+    try:
+        admission.check_rate(request.client.host if request.client else "", route, "normal")
+    except Rejected as e:
+        return e.response()
+
+    accept = [("accept", "application/json"), ("accept-encoding", "identity")]
+    code, order = await _fetch_json(_path("orders", order_id), accept)
+    if code != status.HTTP_200_OK:
+        REQUEST_SECONDS.labels(route=route, method="GET", status=code).observe(time.perf_counter() - start)
+        return JSONResponse(order, status_code=code)
+
+    product_ids = list(dict.fromkeys(item["product_id"] for item in order.get("items", [])))
+    fetches = [_fetch_json(_path("products", product_id), accept) for product_id in product_ids]
+    authorization = request.headers.get("authorization")
+    if authorization:
+        fetches.append(_fetch_json(_path("users", order["user_id"]), accept + [("authorization", authorization)]))
+    results = await asyncio.gather(*fetches)
+
+    errors = []
+    products: Dict[str, Any] = {}
+    for product_id, (code, body) in zip(product_ids, results):
+        products[product_id] = body if code == status.HTTP_200_OK else None
+        if code != status.HTTP_200_OK:
+            errors.append(_error("product", code, body, id=product_id))
+    for item in order.get("items", []):
+        item["product"] = products[item["product_id"]]
+
+    user = None
+    if not authorization:
+        errors.append({"source": "user", "status": status.HTTP_401_UNAUTHORIZED, "detail": "Not authenticated"})
+    elif results[-1][0] == status.HTTP_200_OK:
+        user = results[-1][1]
+    else:
+        errors.append(_error("user", *results[-1]))
+
+    REQUEST_SECONDS.labels(route=route, method="GET", status=200).observe(time.perf_counter() - start)
+    return JSONResponse({"order": order, "user": user, "errors": errors})
@@ -0,0 +1,57 @@
+import logging
+import random
+from typing import List, Optional, Sequence
+
+from prometheus_client import Counter
+
+from app.breaker import CircuitBreaker, Replica
+
+logger = logging.getLogger(__name__)
+
+BREAKER_TRANSITIONS = Counter(
+    "gateway_upstream_breaker_transitions_total",
+    "Circuit breaker state changes for each upstream replica",
+    ["upstream", "replica", "state"],
+)
+
+
+class ReplicaSet:
+    """The replicas of one upstream, picked by power of two choices on outstanding requests.
+
+    A slow replica builds up outstanding requests and stops being picked.
+    Replicas whose breaker is open are skipped until their reset timeout
+    passes, then a single probe request decides whether they come back.
+    Everything runs on the event loop, so no locking is needed.
+    """
+
+    def __init__(self, name: str, urls: Sequence[str], failure_threshold: int = 5, reset_timeout: float = 10.0):
+        self.name = name
+        self.replicas = [Replica(url.rstrip("/"), CircuitBreaker(failure_threshold, reset_timeout)) for url in urls]
+
+    def pick(self, exclude: Sequence[Replica] = ()) -> Optional[Replica]:
+        candidates: List[Replica] = [
+            replica for replica in self.replicas if replica not in exclude and replica.breaker.available()
+        ]
+        if not candidates:
+            return None
+        if len(candidates) == 1:
+            replica = candidates[0]
+        else:
+            first, second = random.sample(candidates, 2)
+            replica = first if first.outstanding <= second.outstanding else second
+        replica.breaker.acquire()
+        replica.outstanding += 1
+        return replica
+
+    def release(self, replica: Replica, ok: Optional[bool]) -> None:
+        """Return ``replica``; ``ok`` is None when the outcome says nothing about its health."""
+        replica.outstanding -= 1
+        if ok is None:
+            replica.breaker.abandon()
+            return
+        changed = replica.breaker.record_success() if ok else replica.breaker.record_failure()
+        if changed:
+            state = replica.breaker.state
+            BREAKER_TRANSITIONS.labels(upstream=self.name, replica=replica.url, state=state).inc()
+            log = logger.info if ok else logger.warning
+            log(f"Circuit for {self.name} replica {replica.url} is now {state}")
@@ -0,0 +1,299 @@
+import asyncio
+import base64
+import json
+import logging
+import secrets
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import redis
+import redis.asyncio as aioredis
+from fastapi import APIRouter, Header, HTTPException, Query, status
+from prometheus_client import Counter, Gauge
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CACHE_REQUESTS = Counter(
+    "gateway_cache_requests_total",
+    "Cacheable requests by how the cache answered them",
+    ["rule", "result"],
+)
+CACHE_REVALIDATIONS = Counter(
+    "gateway_cache_revalidations_total",
+    "Background refreshes of stale entries",
+    ["rule", "outcome"],
+)
+CACHE_ENTRIES = Gauge(
+    "gateway_cache_entries",
+    "Responses held in the in-memory cache",
+)
+
+KEY_PREFIX = "gateway:cache:"
+PURGE_CHANNEL = "gateway:cache:purge"
+
+
+class CacheRule:
+    """Cache GETs under ``prefix`` for ``ttl`` seconds, then serve them stale for ``stale`` more."""
+
+    def __init__(self, prefix: str, ttl: float, stale: float = 0.0):
+        self.prefix = prefix.rstrip("/")
+        self.ttl = ttl
+        self.stale = stale
+
+    def matches(self, path: str) -> bool:
+        return path == self.prefix or path.startswith(self.prefix + "/")
+
+
+def parse_cache_rules(value: str) -> List[CacheRule]:
+    """Parse ``prefix=ttl[:stale]`` entries separated by commas."""
+    rules = []
+    for entry in value.split(","):
+        prefix, _, timing = entry.strip().partition("=")
+        if not prefix or not timing:
+            continue
+        ttl, _, stale = timing.partition(":")
+        rules.append(CacheRule(prefix, float(ttl), float(stale or 0)))
+    # Longest prefix first so more specific rules win.
+    return sorted(rules, key=lambda rule: len(rule.prefix), reverse=True)
+
+
+class CacheEntry:
+    """A fully buffered upstream response."""
+
+    def __init__(self, status_code: int, headers: List[Tuple[bytes, bytes]], body: bytes,
+                 stored_at: Optional[float] = None):
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+        self.stored_at = time.time() if stored_at is None else stored_at
+
+    def age(self) -> float:
+        return max(time.time() - self.stored_at, 0.0)
+
+    def cacheable(self, max_body_bytes: int) -> bool:
+        if self.status_code != 200 or len(self.body) > max_body_bytes:
+            return False
+        for key, value in self.headers:
+            if key == b"set-cookie":
+                return False
+            if key == b"cache-control" and (b"no-store" in value or b"private" in value):
+                return False
+        return True
+
+    def dumps(self) -> str:
+        return json.dumps({
+            "status_code": self.status_code,
+            "headers": [[key.decode("latin-1"), value.decode("latin-1")] for key, value in self.headers],
+            "body": base64.b64encode(self.body).decode(),
+            "stored_at": self.stored_at,
+        })
+
+    @classmethod
+    def loads(cls, data: bytes) -> "CacheEntry":
+        values = json.loads(data)
+        return cls(
+            values["status_code"],
+            [(key.encode("latin-1"), value.encode("latin-1")) for key, value in values["headers"]],
+            base64.b64decode(values["body"]),
+            values["stored_at"],
+        )
+
+
+Fetch = Callable[[], Awaitable[CacheEntry]]
+
+
+class ResponseCache:
+    """Two-tier GET response cache with stale-while-revalidate and request coalescing.
+
+    Entries live in a per-process LRU and, when ``redis_url`` is set, in Redis
+    so gateway instances share fills. Concurrent misses for one key share a
+    single upstream request, and a stale entry is served while one background
+    request refreshes it. Purges are broadcast so every instance drops its copy.
+    """
+
+    def __init__(self, rules: List[CacheRule], max_entries: int, max_body_bytes: int, redis_url: str = ""):
+        self.rules = rules
+        self.max_entries = max_entries
+        self.max_body_bytes = max_body_bytes
+        self.redis_url = redis_url
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._redis: Optional[aioredis.Redis] = None
+        self._listener: Optional[asyncio.Task] = None
+        self._generation = 0
+
+    def rule_for(self, method: str, path: str, headers) -> Optional[CacheRule]:
+        # Responses to credentialed requests may be personalised, so they are never shared.
+        if method != "GET" or "authorization" in headers or "cookie" in headers:
+            return None
+        return self.rule_covering(path)
+
+    def rule_covering(self, path: str) -> Optional[CacheRule]:
+        for rule in self.rules:
+            if rule.matches(path):
+                return rule
+        return None
+
+    @staticmethod
+    def key(path: str, query: str, headers) -> str:
+        query = "&".join(sorted(query.split("&"))) if query else ""
+        return f"{path}?{query}|{headers.get('accept', '')}|{headers.get('accept-encoding', '')}"
+
+    async def get(self, key: str, rule: CacheRule, fetch: Fetch) -> Tuple[CacheEntry, str]:
+        """Return the response for ``key`` and how it was obtained (hit, stale, coalesced or miss)."""
+        entry = self._get_local(key) or await self._get_remote(key)
+        if entry is not None:
+            age = entry.age()
+            if age < rule.ttl:
+                return self._count(rule, entry, "hit")
+            if age < rule.ttl + rule.stale:
+                self._start_fetch(key, rule, fetch, revalidation=True)
+                return self._count(rule, entry, "stale")
+
+        task = self._inflight.get(key)
+        result = "coalesced" if task is not None else "miss"
+        if task is None:
+            task = self._start_fetch(key, rule, fetch)
+        # Shielded so a client hanging up does not cancel the fetch others are waiting on.
+        return self._count(rule, await asyncio.shield(task), result)
+
+    def _count(self, rule: CacheRule, entry: CacheEntry, result: str) -> Tuple[CacheEntry, str]:
+        CACHE_REQUESTS.labels(rule=rule.prefix, result=result).inc()
+        return entry, result
+
+    def _start_fetch(self, key: str, rule: CacheRule, fetch: Fetch, revalidation: bool = False) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is not None:
+            return task
+        task = asyncio.ensure_future(self._fill(key, rule, fetch))
+        self._inflight[key] = task
+
+        def done(task: asyncio.Task) -> None:
+            self._inflight.pop(key, None)
+            failed = task.cancelled() or task.exception() is not None
+            if revalidation:
+                CACHE_REVALIDATIONS.labels(rule=rule.prefix, outcome="failure" if failed else "success").inc()
+            if failed and not task.cancelled():
+                logger.error(f"Failed to fetch {key}: {task.exception()}")
+
+        task.add_done_callback(done)
+        return task
+
+    async def _fill(self, key: str, rule: CacheRule, fetch: Fetch) -> CacheEntry:
+        generation = self._generation
+        entry = await fetch()
+        # A purge during the fetch means the response may predate the change that caused it.
+        if entry.cacheable(self.max_body_bytes) and generation == self._generation:
+            self._put_local(key, entry)
+            await self._put_remote(key, entry, rule.ttl + rule.stale)
+        return entry
+
+    def _get_local(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _put_local(self, key: str, entry: CacheEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        CACHE_ENTRIES.set(len(self._entries))
+
+    async def _get_remote(self, key: str) -> Optional[CacheEntry]:
+        if self._redis is None:
+            return None
+        try:
+            data = await self._redis.get(KEY_PREFIX + key)
+        except redis.RedisError as e:
+            logger.error(f"Failed to read cache entry {key}: {str(e)}")
+            return None
+        if data is None:
+            return None
+        entry = CacheEntry.loads(data)
+        self._put_local(key, entry)
+        return entry
+
+    async def _put_remote(self, key: str, entry: CacheEntry, lifetime: float) -> None:
+        if self._redis is None:
+            return
+        try:
+            await self._redis.set(KEY_PREFIX + key, entry.dumps(), px=max(int(lifetime * 1000), 1))
+        except redis.RedisError as e:
+            logger.error(f"Failed to store cache entry {key}: {str(e)}")
+
+    def _purge_local(self, prefix: str) -> int:
+        self._generation += 1
+        keys = [key for key in self._entries if key.startswith(prefix)]
+        for key in keys:
+            del self._entries[key]
+        CACHE_ENTRIES.set(len(self._entries))
+        return len(keys)
+
+    async def purge(self, prefix: str) -> int:
+        """Drop every entry whose path starts with ``prefix``, on every instance."""
+        purged = self._purge_local(prefix)
+        if self._redis is None:
+            return purged
+        try:
+            pattern = KEY_PREFIX + "".join(f"\\{char}" if char in "*?[]\\" else char for char in prefix) + "*"
+            async for name in self._redis.scan_iter(match=pattern, count=500):
+                await self._redis.delete(name)
+            await self._redis.publish(PURGE_CHANNEL, prefix)
+        except redis.RedisError as e:
+            logger.error(f"Failed to purge {prefix} from the shared cache: {str(e)}")
+        return purged
+
+    async def start(self) -> None:
+        if self.redis_url and self._redis is None:
+            self._redis = aioredis.Redis.from_url(self.redis_url)
+            self._listener = asyncio.ensure_future(self._listen())
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                await pubsub.subscribe(PURGE_CHANNEL)
+                # Purges may have been missed while we were not subscribed.
+                self._entries.clear()
+                while True:
+                    message = await pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self._purge_local(message["data"].decode())
+            except redis.RedisError as e:
+                logger.error(f"Cache purge listener error: {str(e)}")
+                await asyncio.sleep(1.0)
+
+
+response_cache = ResponseCache(
+    rules=parse_cache_rules(settings.CACHE_RULES),
+    max_entries=settings.CACHE_MAX_ENTRIES,
+    max_body_bytes=settings.CACHE_MAX_BODY_BYTES,
+    redis_url=settings.CACHE_REDIS_URL,
+)
+
+router = APIRouter()
+
+
+@router.delete("/cache")
+async def purge_cache(
+    prefix: str = Query(..., pattern="^/"),
+    x_admin_token: str = Header(""),
+):
+    if not settings.GATEWAY_ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cache purging is disabled")
+    if not secrets.compare_digest(x_admin_token, settings.GATEWAY_ADMIN_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
+    return {"purged": await response_cache.purge(prefix)}
@@ -0,0 +1,68 @@
+import os
+from pydantic_settings import BaseSettings
+
+
+class Settings(BaseSettings):
+    API_V1_STR: str = "/api/v1"
+    PROJECT_NAME: str = "MicroEcom API"
+
+    # Comma-separated replica URLs; requests are balanced across them.
+    USER_SERVICE_URL: str = os.getenv("USER_SERVICE_URL", "http://user:8001")
+    PRODUCT_SERVICE_URL: str = os.getenv("PRODUCT_SERVICE_URL", "http://product:8002")
+    ORDER_SERVICE_URL: str = os.getenv("ORDER_SERVICE_URL", "http://order:8003")
+
+    UPSTREAM_CONNECT_TIMEOUT: float = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "2.0"))
+    UPSTREAM_READ_TIMEOUT: float = float(os.getenv("UPSTREAM_READ_TIMEOUT", "30.0"))
+    UPSTREAM_WRITE_TIMEOUT: float = float(os.getenv("UPSTREAM_WRITE_TIMEOUT", "30.0"))
+    UPSTREAM_POOL_TIMEOUT: float = float(os.getenv("UPSTREAM_POOL_TIMEOUT", "1.0"))
+
+    # Defaults for every upstream; override per service with e.g. ORDER_MAX_CONNECTIONS.
+    UPSTREAM_MAX_CONNECTIONS: int = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "100"))
+    UPSTREAM_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("UPSTREAM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    UPSTREAM_KEEPALIVE_EXPIRY: float = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", "30.0"))
+    # Event streams hold a connection for as long as the client listens, so they get a pool of their own.
+    UPSTREAM_MAX_STREAM_CONNECTIONS: int = int(os.getenv("UPSTREAM_MAX_STREAM_CONNECTIONS", "1000"))
+
+    # Consecutive failures before a replica is ejected, and seconds before it is probed again.
+    UPSTREAM_BREAKER_FAILURES: int = int(os.getenv("UPSTREAM_BREAKER_FAILURES", "5"))
+    UPSTREAM_BREAKER_RESET_SECONDS: float = float(os.getenv("UPSTREAM_BREAKER_RESET_SECONDS", "10.0"))
+
+    # Cached GET routes as prefix=ttl[:stale] seconds, separated by commas.
+    CACHE_RULES: str = os.getenv("CACHE_RULES", "/api/v1/products=10:60")
+    CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+    CACHE_MAX_BODY_BYTES: int = int(os.getenv("CACHE_MAX_BODY_BYTES", str(1024 * 1024)))
+    CACHE_REDIS_URL: str = os.getenv("CACHE_REDIS_URL", "")
+
+    # Seconds to wait for each part of an aggregated response before leaving it out.
+    AGGREGATE_TIMEOUT: float = float(os.getenv("AGGREGATE_TIMEOUT", "2.0"))
+
+    GATEWAY_ADMIN_TOKEN: str = os.getenv("GATEWAY_ADMIN_TOKEN", "")
+
+    # Priority classes as "METHOD /prefix=critical|normal|low", separated by commas.
+    ADMISSION_PRIORITIES: str = os.getenv(
+        "ADMISSION_PRIORITIES",
+        "POST /api/v1/orders=critical,POST /api/v1/login=critical,GET /api/v1/products=low,GET /api/v1/reports=low",
+    )
+    # Upper bound on concurrent requests per route prefix, e.g. /api/v1/orders=200.
+    ADMISSION_ROUTE_LIMITS: str = os.getenv("ADMISSION_ROUTE_LIMITS", "")
+    ADMISSION_INITIAL_LIMIT: int = int(os.getenv("ADMISSION_INITIAL_LIMIT", "50"))
+    ADMISSION_MIN_LIMIT: int = int(os.getenv("ADMISSION_MIN_LIMIT", "5"))
+    ADMISSION_MAX_LIMIT: int = int(os.getenv("ADMISSION_MAX_LIMIT", "500"))
+    ADMISSION_ADAPTIVE: bool = os.getenv("ADMISSION_ADAPTIVE", "true").lower() == "true"
+    ADMISSION_RETRY_AFTER_SECONDS: int = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "1"))
+    # Open event streams per route; they are counted apart from the adaptive limit.
+    STREAM_MAX_CONCURRENT: int = int(os.getenv("STREAM_MAX_CONCURRENT", "1000"))
+
+    # Per-client token bucket; 0 disables rate limiting.
+    RATE_LIMIT_PER_SECOND: float = float(os.getenv("RATE_LIMIT_PER_SECOND", "0"))
+    RATE_LIMIT_BURST: float = float(os.getenv("RATE_LIMIT_BURST", "20"))
+    RATE_LIMIT_MAX_CLIENTS: int = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "100000"))
+
+    def upstream_limit(self, upstream: str, name: str) -> int:
+        return int(os.getenv(f"{upstream.upper()}_{name}", str(getattr(self, f"UPSTREAM_{name}"))))
+
+    class Config:
+        env_file = ".env"
+
+
+settings = Settings()
@@ -0,0 +1,417 @@
+import logging
+import time
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import httpx
+from fastapi import APIRouter, Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.admission import Rejected, admission
+from app.breaker import response_health
+from app.balancer import ReplicaSet
+from app.cache import CacheEntry, CacheRule, response_cache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+REQUEST_SECONDS = Histogram(
+    "gateway_request_seconds",
+    "Time from receiving a proxied request to sending the last byte of its response",
+    ["route", "method", "status"],
+)
+UPSTREAM_HEADERS_SECONDS = Histogram(
+    "gateway_upstream_headers_seconds",
+    "Time until the upstream returned response headers",
+    ["route"],
+)
+UPSTREAM_ERRORS = Counter(
+    "gateway_upstream_errors_total",
+    "Proxied requests that failed before the upstream responded",
+    ["route", "reason"],
+)
+IN_FLIGHT = Gauge(
+    "gateway_requests_in_flight",
+    "Proxied requests whose response has not finished streaming",
+    ["route"],
+)
+
+# Path prefixes under API_V1_STR served by each upstream.
+ROUTES: Dict[str, List[str]] = {
+    "user": ["/register", "/login", "/logout", "/me", "/users"],
+    "product": ["/products"],
+    "order": ["/orders", "/reports"],
+}
+
+# Server-Sent Events endpoints; their responses stay open for as long as the client listens.
+# Matched by route rather than Accept header, so a client cannot opt an ordinary request out of admission.
+EVENT_STREAM_SUFFIX = "/events"
+
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "trailers", "transfer-encoding", "upgrade",
+}
+
+
+class Upstream:
+    """One backend service: its replicas and a connection pool shared between them.
+
+    Event streams use a second pool, so listeners can never take the
+    connections that ordinary requests need.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        max_connections: int,
+        max_keepalive_connections: int,
+        keepalive_expiry: float = 30.0,
+        timeout: Optional[httpx.Timeout] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        failure_threshold: int = 5,
+        reset_timeout: float = 10.0,
+        max_stream_connections: Optional[int] = None,
+    ):
+        self.name = name
+        self.base_url = base_url
+        # base_url may list several replicas, separated by commas.
+        self.replicas = ReplicaSet(
+            name, [url.strip() for url in base_url.split(",") if url.strip()],
+            failure_threshold=failure_threshold, reset_timeout=reset_timeout,
+        )
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            timeout=timeout or httpx.Timeout(30.0),
+            transport=transport,
+        )
+        self.stream_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_stream_connections or max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            timeout=timeout or httpx.Timeout(30.0),
+            transport=transport,
+        )
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+        await self.stream_client.aclose()
+
+
+class Upstreams:
+    """Registry of upstreams and the path prefixes routed to them."""
+
+    def __init__(self):
+        self._upstreams: Dict[str, Upstream] = {}
+        self._routes: List[Tuple[str, str]] = []
+
+    def register(self, upstream: Upstream, prefixes: Iterable[str]) -> None:
+        self._upstreams[upstream.name] = upstream
+        for prefix in prefixes:
+            self._routes.append((prefix.rstrip("/"), upstream.name))
+        # Longest prefix first so more specific routes win.
+        self._routes.sort(key=lambda route: len(route[0]), reverse=True)
+
+    def get(self, name: str) -> Upstream:
+        return self._upstreams[name]
+
+    def resolve(self, path: str) -> Optional[Tuple[str, Upstream]]:
+        """Return the matching route prefix and its upstream for ``path``."""
+        for prefix, name in self._routes:
+            if path == prefix or path.startswith(prefix + "/"):
+                return prefix, self._upstreams[name]
+        return None
+
+    def start(self) -> None:
+        timeout = httpx.Timeout(
+            connect=settings.UPSTREAM_CONNECT_TIMEOUT,
+            read=settings.UPSTREAM_READ_TIMEOUT,
+            write=settings.UPSTREAM_WRITE_TIMEOUT,
+            pool=settings.UPSTREAM_POOL_TIMEOUT,
+        )
+        base_urls = {
+            "user": settings.USER_SERVICE_URL,
+            "product": settings.PRODUCT_SERVICE_URL,
+            "order": settings.ORDER_SERVICE_URL,
+        }
+        for name, prefixes in ROUTES.items():
+            upstream = Upstream(
+                name,
+                base_urls[name],
+                max_connections=settings.upstream_limit(name, "MAX_CONNECTIONS"),
+                max_keepalive_connections=settings.upstream_limit(name, "MAX_KEEPALIVE_CONNECTIONS"),
+                keepalive_expiry=settings.UPSTREAM_KEEPALIVE_EXPIRY,
+                timeout=timeout,
+                failure_threshold=settings.UPSTREAM_BREAKER_FAILURES,
+                reset_timeout=settings.UPSTREAM_BREAKER_RESET_SECONDS,
+                max_stream_connections=settings.upstream_limit(name, "MAX_STREAM_CONNECTIONS"),
+            )
+            self.register(upstream, [f"{settings.API_V1_STR}{prefix}" for prefix in prefixes])
+
+    async def close(self) -> None:
+        for upstream in self._upstreams.values():
+            await upstream.aclose()
+        self._upstreams.clear()
+        self._routes.clear()
+
+
+upstreams = Upstreams()
+
+
+def _request_headers(request: Request) -> List[Tuple[str, str]]:
+    headers = [
+        (key, value) for key, value in request.headers.items()
+        if key not in HOP_BY_HOP_HEADERS and key != "host" and not key.startswith("x-forwarded-")
+    ]
+    client_host = request.client.host if request.client else ""
+    forwarded_for = request.headers.get("x-forwarded-for")
+    headers.append(("x-forwarded-for", f"{forwarded_for}, {client_host}" if forwarded_for else client_host))
+    headers.append(("x-forwarded-proto", request.url.scheme))
+    if "host" in request.headers:
+        headers.append(("x-forwarded-host", request.headers["host"]))
+    return headers
+
+
+def _response_headers(response: httpx.Response) -> List[Tuple[bytes, bytes]]:
+    return [
+        (key.lower().encode("latin-1"), value.encode("latin-1"))
+        for key, value in response.headers.multi_items()
+        if key.lower() not in HOP_BY_HOP_HEADERS
+    ]
+
+
+def _shed(route: str, method: str, e: Rejected, start: float) -> Response:
+    REQUEST_SECONDS.labels(route=route, method=method, status=e.status_code).observe(time.perf_counter() - start)
+    return e.response()
+
+
+def _upstream_error(route: str, reason: str, status_code: int, detail: str) -> Response:
+    UPSTREAM_ERRORS.labels(route=route, reason=reason).inc()
+    return JSONResponse({"detail": detail}, status_code=status_code)
+
+
+async def _send(
+    route: str, upstream: Upstream, method: str, url: str, headers: List[Tuple[str, str]], content=None,
+    event_stream: bool = False,
+) -> Union[httpx.Response, Response]:
+    """Open a streamed response from one of the upstream's replicas, or build the error response if that fails.
+
+    A request without a body that cannot connect is retried once on another replica. Event streams
+    are sent through the upstream's stream pool.
+    """
+    client = upstream.stream_client if event_stream else upstream.client
+    start = time.perf_counter()
+    attempts = 2 if content is None and method in ("GET", "HEAD", "OPTIONS") else 1
+    tried = []
+    error: Optional[Response] = None
+    for _ in range(attempts):
+        replica = upstream.replicas.pick(exclude=tried)
+        if replica is None:
+            break
+        tried.append(replica)
+        upstream_request = client.build_request(
+            method, f"{replica.url}{url}", headers=headers, content=content,
+        )
+        try:
+            response = await client.send(upstream_request, stream=True)
+        except httpx.PoolTimeout:
+            # Our own pool is full; that says nothing about the replica.
+            upstream.replicas.release(replica, ok=None)
+            logger.warning(f"Connection pool for {upstream.name} exhausted")
+            return _upstream_error(route, "pool_exhausted", status.HTTP_503_SERVICE_UNAVAILABLE,
+                                   "Upstream service is busy")
+        except httpx.TimeoutException:
+            upstream.replicas.release(replica, ok=False)
+            return _upstream_error(route, "timeout", status.HTTP_504_GATEWAY_TIMEOUT,
+                                   "Upstream service timed out")
+        except httpx.TransportError as e:
+            upstream.replicas.release(replica, ok=False)
+            logger.error(f"Error contacting {upstream.name} at {replica.url}: {str(e)}")
+            error = _upstream_error(route, "unavailable", status.HTTP_502_BAD_GATEWAY,
+                                    "Upstream service unavailable")
+            continue
+        except BaseException:
+            upstream.replicas.release(replica, ok=None)
+            raise
+        upstream.replicas.release(replica, ok=response_health(response.status_code))
+        UPSTREAM_HEADERS_SECONDS.labels(route=route).observe(time.perf_counter() - start)
+        return response
+    if error is not None:
+        return error
+    return _upstream_error(route, "circuit_open", status.HTTP_503_SERVICE_UNAVAILABLE,
+                           "Upstream service unavailable")
+
+
+async def _fetch_entry(route: str, upstream: Upstream, url: str, headers: List[Tuple[str, str]]) -> CacheEntry:
+    result = await _send(route, upstream, "GET", url, headers)
+    if not isinstance(result, httpx.Response):
+        return CacheEntry(result.status_code, result.raw_headers, result.body)
+    try:
+        # Raw chunks, so a compressed body still matches its Content-Encoding header.
+        body = b"".join([chunk async for chunk in result.aiter_raw()])
+    finally:
+        await result.aclose()
+    return CacheEntry(result.status_code, _response_headers(result), body)
+
+
+async def _fetch_admitted(
+    route: str, upstream: Upstream, url: str, headers: List[Tuple[str, str]], priority: str,
+) -> CacheEntry:
+    # Admission guards the upstream fetch rather than the request, so cache hits are never shed
+    # and a shed revalidation just leaves the stale entry in place.
+    try:
+        permit = admission.admit(route, priority)
+    except Rejected as e:
+        response = e.response()
+        return CacheEntry(response.status_code, response.raw_headers, response.body)
+    sent = time.perf_counter()
+    try:
+        return await _fetch_entry(route, upstream, url, headers)
+    finally:
+        permit.release(time.perf_counter() - sent)
+
+
+async def fetch(path: str, headers: List[Tuple[str, str]]) -> CacheEntry:
+    """Fetch a GET for the gateway itself, through the response cache and admission control."""
+    resolved = upstreams.resolve(path.split("?", 1)[0])
+    if resolved is None:
+        return CacheEntry(status.HTTP_404_NOT_FOUND, [], b'{"detail":"Not Found"}')
+    route, upstream = resolved
+    url = httpx.URL(path)
+    priority = admission.priority("GET", url.path)
+    header_map = httpx.Headers(headers)
+    rule = response_cache.rule_for("GET", url.path, header_map)
+    if rule is None:
+        return await _fetch_admitted(route, upstream, path, headers, priority)
+    key = response_cache.key(url.path, url.query.decode(), header_map)
+    entry, _ = await response_cache.get(key, rule, lambda: _fetch_admitted(route, upstream, path, headers, priority))
+    return entry
+
+
+def _is_event_stream(request: Request) -> bool:
+    return request.method == "GET" and request.url.path.endswith(EVENT_STREAM_SUFFIX)
+
+
+def _upstream_url(request: Request) -> str:
+    # raw_path keeps percent-encoding intact; some servers also leave the query on it.
+    path = request.scope.get("raw_path", request.url.path.encode()).decode("latin-1").split("?", 1)[0]
+    if request.url.query:
+        path = f"{path}?{request.url.query}"
+    return path
+
+
+async def _forward_cached(
+    request: Request, route: str, upstream: Upstream, url: str, rule: CacheRule, priority: str, start: float,
+) -> Response:
+    # Shared entries are fetched with only the headers that are part of the cache key.
+    headers = [(name, request.headers[name]) for name in ("accept", "accept-encoding") if name in request.headers]
+    key = response_cache.key(request.url.path, request.url.query, request.headers)
+    IN_FLIGHT.labels(route=route).inc()
+    try:
+        entry, result = await response_cache.get(
+            key, rule, lambda: _fetch_admitted(route, upstream, url, headers, priority),
+        )
+    finally:
+        IN_FLIGHT.labels(route=route).dec()
+
+    response = Response(entry.body, status_code=entry.status_code)
+    response.raw_headers = [(name, value) for name, value in entry.headers if name != b"content-length"] + [
+        (b"content-length", str(len(entry.body)).encode()),
+        (b"x-cache", result.upper().encode()),
+        (b"age", str(int(entry.age())).encode()),
+    ]
+    REQUEST_SECONDS.labels(route=route, method=request.method, status=entry.status_code).observe(
+        time.perf_counter() - start
+    )
+    return response
+
+
+async def forward(request: Request) -> Response:
+    """Stream ``request`` to the upstream that owns its path and stream the answer back."""
+    resolved = upstreams.resolve(request.url.path)
+    if resolved is None:
+        return JSONResponse({"detail": "Not Found"}, status_code=status.HTTP_404_NOT_FOUND)
+    route, upstream = resolved
+    method = request.method
+    start = time.perf_counter()
+    url = _upstream_url(request)
+    priority = admission.priority(method, request.url.path)
+
+    try:
+        admission.check_rate(request.client.host if request.client else "", route, priority)
+    except Rejected as e:
+        return _shed(route, method, e, start)
+
+    event_stream = _is_event_stream(request)
+    rule = None if event_stream else response_cache.rule_for(method, request.url.path, request.headers)
+    if rule is not None:
+        return await _forward_cached(request, route, upstream, url, rule, priority, start)
+
+    try:
+        # A stream's permit is held until the client goes away, so streams have a limit of their own.
+        permit = admission.admit_stream(route) if event_stream else admission.admit(route, priority)
+    except Rejected as e:
+        return _shed(route, method, e, start)
+
+    IN_FLIGHT.labels(route=route).inc()
+    has_body = "content-length" in request.headers or "transfer-encoding" in request.headers
+    sent = time.perf_counter()
+    try:
+        response = await _send(
+            route, upstream, method, url, _request_headers(request), content=request.stream() if has_body else None,
+            event_stream=event_stream,
+        )
+    except BaseException:
+        permit.release()
+        IN_FLIGHT.labels(route=route).dec()
+        raise
+    # Time to headers is the latency signal; it excludes clients that read the body slowly.
+    # A refused connection says nothing about upstream load, so it is not sampled.
+    latency = time.perf_counter() - sent
+    if not isinstance(response, httpx.Response):
+        permit.release(None if response.status_code == status.HTTP_502_BAD_GATEWAY else latency)
+        IN_FLIGHT.labels(route=route).dec()
+        REQUEST_SECONDS.labels(route=route, method=method, status=response.status_code).observe(
+            time.perf_counter() - start
+        )
+        return response
+
+    if method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        # A successful write may change anything cached under the same rule.
+        covering = response_cache.rule_covering(request.url.path)
+        if covering is not None:
+            await response_cache.purge(covering.prefix)
+
+    async def body():
+        try:
+            async for chunk in response.aiter_raw():
+                yield chunk
+        finally:
+            await response.aclose()
+            permit.release(latency)
+            IN_FLIGHT.labels(route=route).dec()
+            REQUEST_SECONDS.labels(route=route, method=method, status=response.status_code).observe(
+                time.perf_counter() - start
+            )
+
+    proxied = StreamingResponse(body(), status_code=response.status_code)
+    proxied.raw_headers = _response_headers(response)
+    return proxied
+
+
+router = APIRouter()
+
+
+@router.api_route(
+    "/{path:path}",
+    methods=["GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"],
+    include_in_schema=False,
+)
+async def proxy(request: Request, path: str) -> Response:
+    return await forward(request)
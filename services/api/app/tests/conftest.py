@@ -0,0 +1,27 @@
+import httpx
+import pytest
+
+from app.admission import admission
+from app.cache import response_cache
+from app.proxy import Upstream, upstreams
+
+
+def make_upstream(name, handler):
+    return Upstream(name, f"http://{name}", max_connections=10, max_keepalive_connections=5,
+                    transport=httpx.MockTransport(handler))
+
+
+@pytest.fixture
+def register(request):
+    def _register(name, prefixes, handler):
+        upstreams.register(make_upstream(name, handler), prefixes)
+    yield _register
+    upstreams._upstreams.clear()
+    upstreams._routes.clear()
+    response_cache._entries.clear()
+    admission._limiters.clear()
+    admission._stream_limiters.clear()
+    admission._buckets.clear()
+    client = getattr(request.module, "client", None)
+    if client is not None:
+        client.cookies.clear()
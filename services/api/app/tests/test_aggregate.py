@@ -0,0 +1,96 @@
+import asyncio
+from unittest import mock
+
+from app.core.config import settings
+from app.tests.test_proxy import client, respond
+
+ORDER = {
+    "id": "o1",
+    "user_id": "u1",
+    "status": "pending",
+    "items": [
+        {"id": "i1", "product_id": "p1", "quantity": 1},
+        {"id": "i2", "product_id": "p2", "quantity": 2},
+        {"id": "i3", "product_id": "p1", "quantity": 1},
+    ],
+}
+
+
+def order_handler(request):
+    if request.url.path == "/api/v1/orders/o1":
+        return respond(200, ORDER)
+    return respond(404, {"detail": "Order not found"})
+
+
+def test_composes_order_products_and_user(register):
+    product_calls = []
+    seen = {}
+
+    def products(request):
+        product_calls.append(request.url.path)
+        return respond(200, {"id": request.url.path.rsplit("/", 1)[1]})
+
+    def users(request):
+        seen["authorization"] = request.headers.get("authorization")
+        return respond(200, {"id": "u1", "email": "user@example.com"})
+
+    register("order", ["/api/v1/orders"], order_handler)
+    register("product", ["/api/v1/products"], products)
+    register("user", ["/api/v1/users"], users)
+
+    response = client.get("/api/v1/orders/o1/details", headers={"Authorization": "Bearer token"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["errors"] == []
+    assert body["user"] == {"id": "u1", "email": "user@example.com"}
+    assert [item["product"] for item in body["order"]["items"]] == [{"id": "p1"}, {"id": "p2"}, {"id": "p1"}]
+    # Each distinct product is fetched once.
+    assert sorted(product_calls) == ["/api/v1/products/p1", "/api/v1/products/p2"]
+    assert seen["authorization"] == "Bearer token"
+
+
+def test_degrades_on_partial_failure(register):
+    async def products(request):
+        if request.url.path.endswith("/p1"):
+            await asyncio.sleep(1)
+        return respond(404, {"detail": "Product not found"})
+
+    register("order", ["/api/v1/orders"], order_handler)
+    register("product", ["/api/v1/products"], products)
+    register("user", ["/api/v1/users"], lambda request: respond(503, {"detail": "Service unavailable"}))
+
+    with mock.patch.object(settings, "AGGREGATE_TIMEOUT", 0.2):
+        response = client.get("/api/v1/orders/o1/details", headers={"Authorization": "Bearer token"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["user"] is None
+    assert all(item["product"] is None for item in body["order"]["items"])
+    assert sorted(body["errors"], key=lambda error: (error["source"], error.get("id", ""))) == [
+        {"source": "product", "status": 504, "detail": "Upstream service timed out", "id": "p1"},
+        {"source": "product", "status": 404, "detail": "Product not found", "id": "p2"},
+        {"source": "user", "status": 503, "detail": "Service unavailable"},
+    ]
+
+
+def test_anonymous_request_skips_user(register):
+    user_calls = []
+    register("order", ["/api/v1/orders"], order_handler)
+    register("product", ["/api/v1/products"], lambda request: respond(200, {}))
+    register("user", ["/api/v1/users"], lambda request: user_calls.append(request) or respond(200, {}))
+
+    body = client.get("/api/v1/orders/o1/details").json()
+
+    assert body["user"] is None
+    assert body["errors"] == [{"source": "user", "status": 401, "detail": "Not authenticated"}]
+    assert user_calls == []
+
+
+def test_missing_order_fails_whole_request(register):
+    register("order", ["/api/v1/orders"], order_handler)
+
+    response = client.get("/api/v1/orders/missing/details")
+
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Order not found"}
@@ -0,0 +1,364 @@
+import asyncio
+import json
+from unittest import mock
+
+import httpx
+import pytest
+from fastapi import Request
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.admission import AdaptiveLimit, admission, parse_priority_rules
+from app.cache import CacheRule, response_cache
+from app.core.config import settings
+from app.proxy import Upstream, forward, upstreams
+from main import app
+
+client = TestClient(app)
+
+
+class Body(httpx.AsyncByteStream):
+    def __init__(self, data: bytes):
+        self.data = data
+
+    async def __aiter__(self):
+        yield self.data
+
+
+def respond(status_code, json_body=None, content=b"", headers=None):
+    # Stream the body like a real connection; httpx pre-reads plain bytes content.
+    if json_body is not None:
+        content = json.dumps(json_body).encode()
+    return httpx.Response(status_code, headers=headers, stream=Body(content))
+
+
+def test_health_check():
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert response.json() == {"status": "healthy", "service": "api"}
+
+
+def test_routes_by_longest_prefix(register):
+    register("user", ["/api/v1/users"], lambda request: respond(200, {"upstream": "user"}))
+    register("lookup", ["/api/v1/users/lookup"], lambda request: respond(200, {"upstream": "lookup"}))
+
+    assert client.get("/api/v1/users/42").json() == {"upstream": "user"}
+    assert client.post("/api/v1/users/lookup", json={}).json() == {"upstream": "lookup"}
+    # Prefixes only match whole path segments.
+    assert client.get("/api/v1/usersearch").status_code == 404
+
+
+def test_forwards_request_and_response(register):
+    seen = {}
+
+    async def handler(request):
+        seen["method"] = request.method
+        seen["url"] = str(request.url)
+        seen["headers"] = request.headers
+        seen["body"] = await request.aread()
+        return respond(
+            201,
+            headers=[("set-cookie", "a=1"), ("set-cookie", "b=2"), ("x-upstream", "product")],
+            content=b"created",
+        )
+
+    register("product", ["/api/v1/products"], handler)
+    body = b"x" * 100_000
+    response = client.post(
+        "/api/v1/products/p1?expand=stock&page=2",
+        content=body,
+        headers={"Authorization": "Bearer token", "Connection": "keep-alive", "X-Forwarded-For": "10.0.0.1"},
+    )
+
+    assert response.status_code == 201
+    assert response.content == b"created"
+    assert response.headers["x-upstream"] == "product"
+    assert response.headers.get_list("set-cookie") == ["a=1", "b=2"]
+    assert seen["method"] == "POST"
+    assert seen["url"] == "http://product/api/v1/products/p1?expand=stock&page=2"
+    assert seen["body"] == body
+    assert seen["headers"]["authorization"] == "Bearer token"
+    assert seen["headers"]["x-forwarded-for"] == "10.0.0.1, testclient"
+    assert seen["headers"]["host"] == "product"
+
+
+def test_streams_response_body(register):
+    async def chunks():
+        for i in range(3):
+            yield f"chunk{i};".encode()
+
+    register("order", ["/api/v1/orders"], lambda request: httpx.Response(200, content=chunks()))
+    response = client.get("/api/v1/orders")
+    assert response.content == b"chunk0;chunk1;chunk2;"
+
+
+def test_upstream_failures(register):
+    def timeout(request):
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    def refused(request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    register("slow", ["/api/v1/slow"], timeout)
+    register("down", ["/api/v1/down"], refused)
+    before = REGISTRY.get_sample_value(
+        "gateway_upstream_errors_total", {"route": "/api/v1/slow", "reason": "timeout"}
+    ) or 0
+
+    assert client.get("/api/v1/slow").status_code == 504
+    assert client.get("/api/v1/down").status_code == 502
+    assert REGISTRY.get_sample_value(
+        "gateway_upstream_errors_total", {"route": "/api/v1/slow", "reason": "timeout"}
+    ) == before + 1
+
+
+def test_records_route_latency(register):
+    register("product", ["/api/v1/products"], lambda request: respond(200, []))
+    labels = {"route": "/api/v1/products", "method": "GET", "status": "200"}
+    before = REGISTRY.get_sample_value("gateway_request_seconds_count", labels) or 0
+
+    client.get("/api/v1/products")
+
+    assert REGISTRY.get_sample_value("gateway_request_seconds_count", labels) == before + 1
+
+
+@pytest.fixture
+def cached_products(register):
+    calls = []
+
+    async def handler(request):
+        calls.append(str(request.url))
+        await asyncio.sleep(0.05)
+        return respond(200, {"version": len(calls)})
+
+    register("product", ["/api/v1/products"], handler)
+    with mock.patch.object(response_cache, "rules", [CacheRule("/api/v1/products", ttl=60, stale=0)]):
+        yield calls
+
+
+def run_concurrently(*paths, headers=None, delay=0.0):
+    async def main():
+        async with httpx.AsyncClient(app=app, base_url="http://gateway") as async_client:
+            responses = []
+            for batch in paths:
+                responses.append(await asyncio.gather(
+                    *(async_client.get(path, headers=headers) for path in batch)
+                ))
+                await asyncio.sleep(delay)
+            return responses
+    return asyncio.run(main())
+
+
+def test_cache_hit_after_miss(cached_products):
+    first = client.get("/api/v1/products?limit=5&skip=0")
+    second = client.get("/api/v1/products?skip=0&limit=5")
+
+    assert first.headers["x-cache"] == "MISS"
+    assert second.headers["x-cache"] == "HIT"
+    assert second.json() == first.json() == {"version": 1}
+    assert len(cached_products) == 1
+
+    # Different query strings and credentialed requests are not served from the entry.
+    assert client.get("/api/v1/products?limit=10").headers["x-cache"] == "MISS"
+    response = client.get("/api/v1/products?limit=5&skip=0", headers={"Authorization": "Bearer token"})
+    assert "x-cache" not in response.headers
+    assert len(cached_products) == 3
+
+
+def test_cache_coalesces_concurrent_misses(cached_products):
+    [responses] = run_concurrently(["/api/v1/products/p1"] * 10)
+
+    assert len(cached_products) == 1
+    assert {response.json()["version"] for response in responses} == {1}
+    assert sorted(response.headers["x-cache"] for response in responses) == ["COALESCED"] * 9 + ["MISS"]
+
+
+def test_cache_serves_stale_while_revalidating(cached_products):
+    with mock.patch.object(response_cache, "rules", [CacheRule("/api/v1/products", ttl=0, stale=60)]):
+        first, second, third = run_concurrently(*[["/api/v1/products/p1"]] * 3, delay=0.2)
+
+    assert first[0].headers["x-cache"] == "MISS"
+    assert second[0].headers["x-cache"] == "STALE"
+    assert second[0].json() == {"version": 1}
+    # The refresh started by the stale hit has landed by the next request.
+    assert third[0].json() == {"version": 2}
+
+
+def test_cache_skips_uncacheable_responses(register):
+    register("product", ["/api/v1/products"], lambda request: respond(500, {"detail": "boom"}))
+    with mock.patch.object(response_cache, "rules", [CacheRule("/api/v1/products", ttl=60)]):
+        assert client.get("/api/v1/products").headers["x-cache"] == "MISS"
+        assert client.get("/api/v1/products").headers["x-cache"] == "MISS"
+
+
+def test_cache_purge(cached_products):
+    client.get("/api/v1/products/p1")
+
+    assert client.delete("/cache", params={"prefix": "/api/v1/products"}).status_code == 403
+    with mock.patch.object(settings, "GATEWAY_ADMIN_TOKEN", "secret"):
+        response = client.delete(
+            "/cache", params={"prefix": "/api/v1/products/p1"}, headers={"X-Admin-Token": "wrong"},
+        )
+        assert response.status_code == 403
+        response = client.delete(
+            "/cache", params={"prefix": "/api/v1/products/p1"}, headers={"X-Admin-Token": "secret"},
+        )
+    assert response.json() == {"purged": 1}
+    assert client.get("/api/v1/products/p1").headers["x-cache"] == "MISS"
+
+
+def test_successful_write_purges_cached_route(cached_products):
+    client.get("/api/v1/products/p1")
+    client.put("/api/v1/products/p1", json={"name": "renamed"})
+
+    assert client.get("/api/v1/products/p1").headers["x-cache"] == "MISS"
+
+
+def test_admission_sheds_low_priority_first(register):
+    register("order", ["/api/v1/orders"], lambda request: respond(201 if request.method == "POST" else 200, {}))
+    rules = parse_priority_rules("POST /api/v1/orders=critical,GET /api/v1/orders=low")
+    limiter = admission.limiter("/api/v1/orders")
+    limiter.limit, limiter.in_flight = 4, 3
+
+    with mock.patch.object(admission, "priority_rules", rules):
+        browse = client.get("/api/v1/orders")
+        checkout = client.post("/api/v1/orders", json={})
+
+    assert browse.status_code == 503
+    assert browse.headers["retry-after"] == str(settings.ADMISSION_RETRY_AFTER_SECONDS)
+    assert checkout.status_code == 201
+    assert limiter.in_flight == 3
+
+
+def test_admission_never_sheds_cache_hits(cached_products):
+    client.get("/api/v1/products/p1")
+    limiter = admission.limiter("/api/v1/products")
+    limiter.in_flight = int(limiter.limit)
+
+    assert client.get("/api/v1/products/p1").headers["x-cache"] == "HIT"
+    shed = client.get("/api/v1/products/p2")
+    assert shed.status_code == 503
+    assert "retry-after" in shed.headers
+    assert len(cached_products) == 1
+
+    # The rejection is not cached.
+    limiter.in_flight = 0
+    assert client.get("/api/v1/products/p2").status_code == 200
+
+
+def test_event_streams_do_not_take_admission_slots(register):
+    class Listening(httpx.AsyncByteStream):
+        async def __aiter__(self):
+            await asyncio.Event().wait()
+            yield b""
+
+    def handler(request):
+        if request.url.path.endswith("/events"):
+            return httpx.Response(200, headers={"content-type": "text/event-stream"}, stream=Listening())
+        return respond(201, {})
+
+    register("order", ["/api/v1/orders"], handler)
+    upstream = upstreams.get("order")
+    for pool in (upstream.client, upstream.stream_client):
+        pool.send = mock.AsyncMock(side_effect=pool.send)
+
+    def request(method, path):
+        return Request({
+            "type": "http", "method": method, "path": path, "raw_path": path.encode(), "query_string": b"",
+            "headers": [(b"accept", b"text/event-stream")], "client": ("10.0.0.1", 1234),
+            "scheme": "http", "server": ("gateway", 80),
+        })
+
+    async def main():
+        # Streams are never read, so each one keeps its permit and connection for the whole test.
+        # There are more of them than the route's admission limit.
+        with mock.patch.object(admission, "max_streams", 60):
+            streams = [await forward(request("GET", f"/api/v1/orders/user/u{i}/events")) for i in range(60)]
+            over = await forward(request("GET", "/api/v1/orders/o1/events"))
+        checkout = await forward(request("POST", "/api/v1/orders"))
+        [chunk async for chunk in checkout.body_iterator]
+        return streams, over, checkout
+
+    streams, over, checkout = asyncio.run(main())
+
+    assert {response.status_code for response in streams} == {200}
+    assert over.status_code == 503
+    assert checkout.status_code == 201
+    assert admission.limiter("/api/v1/orders").in_flight == 0
+    assert upstream.stream_client.send.await_count == 60
+    assert upstream.client.send.await_count == 1
+
+
+def test_rate_limit_per_client(register):
+    register("order", ["/api/v1/orders"], lambda request: respond(200, []))
+    with mock.patch.object(admission, "rate", 1.0), mock.patch.object(admission, "burst", 2.0):
+        responses = [client.get("/api/v1/orders") for _ in range(3)]
+
+    assert [response.status_code for response in responses] == [200, 200, 429]
+    assert responses[2].headers["retry-after"] == "1"
+
+
+def test_adaptive_limit_follows_latency():
+    limit = AdaptiveLimit(initial=10, min_limit=2, max_limit=100)
+
+    def saturate(latency, samples):
+        for _ in range(samples):
+            limit.in_flight = int(limit.limit)
+            limit.release(latency)
+
+    saturate(0.01, 30)
+    grown = limit.limit
+    assert grown > 10
+
+    saturate(0.1, 10)
+    assert 2 <= limit.limit < grown * 0.75
+
+    # An idle route does not grow its limit.
+    limit.in_flight = 1
+    before = limit.limit
+    limit.release(0.001)
+    assert limit.limit <= before
+
+
+def test_balances_across_replicas_and_ejects_dead_ones(register):
+    hosts = []
+
+    def handler(request):
+        hosts.append(request.url.host)
+        if request.url.host == "order-a":
+            raise httpx.ConnectError("connection refused", request=request)
+        return respond(200, {"host": request.url.host})
+
+    upstreams.register(
+        Upstream("order", "http://order-a,http://order-b", max_connections=10, max_keepalive_connections=5,
+                 transport=httpx.MockTransport(handler), failure_threshold=2, reset_timeout=60),
+        ["/api/v1/orders"],
+    )
+    responses = [client.get("/api/v1/orders") for _ in range(20)]
+
+    # Failed connections are retried on the other replica.
+    assert {response.json()["host"] for response in responses} == {"order-b"}
+    # After tripping its breaker the dead replica is no longer tried.
+    assert hosts.count("order-a") == 2
+    assert upstreams.get("order").replicas.replicas[0].breaker.state == "open"
+
+
+def test_all_replicas_open_fails_fast(register):
+    register("order", ["/api/v1/orders"], lambda request: respond(502, {"detail": "down"}))
+    breaker = upstreams.get("order").replicas.replicas[0].breaker
+    for _ in range(breaker.failure_threshold):
+        assert client.get("/api/v1/orders").status_code == 502
+
+    response = client.get("/api/v1/orders")
+    assert response.status_code == 503
+    assert response.json() == {"detail": "Upstream service unavailable"}
+
+
+def test_upstream_503s_do_not_open_the_circuit(register):
+    register("user", ["/api/v1/login"], lambda request: respond(503, {"detail": "busy"}, headers={"retry-after": "1"}))
+    breaker = upstreams.get("user").replicas.replicas[0].breaker
+    responses = [client.post("/api/v1/login", json={}) for _ in range(breaker.failure_threshold + 2)]
+
+    assert [response.status_code for response in responses] == [503] * len(responses)
+    assert responses[-1].json() == {"detail": "busy"}
+    assert breaker.state == "closed"
@@ -1,10 +1,31 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, status
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import make_asgi_app
+
+from app.aggregate import router as aggregate_router
+from app.cache import response_cache
+from app.cache import router as cache_router
+from app.core.config import settings
+from app.proxy import router as proxy_router
+from app.proxy import upstreams
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    upstreams.start()
+    await response_cache.start()
+    yield
+    await response_cache.close()
+    await upstreams.close()
+
 
 app = FastAPI(
-    title="MicroEcom API",
+    title=settings.PROJECT_NAME,
     description="A microservices-based e-commerce platform",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -20,6 +41,13 @@ async def health_check():
     return {"status": "healthy", "service": "api"}
 
 
+app.include_router(cache_router)
+app.include_router(aggregate_router, prefix=settings.API_V1_STR)
+app.mount("/metrics", make_asgi_app())
+# The catch-all proxy goes last so gateway routes above take precedence.
+app.include_router(proxy_router, prefix=settings.API_V1_STR)
+
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -13,6 +13,8 @@ if config.config_file_name is not None:
 from app.db.base import Base
 import app.models.order
 import app.models.order_item
+import app.models.order_archive
+import app.models.sales
 target_metadata = Base.metadata
 
 
@@ -33,6 +35,14 @@ def run_migrations_offline() -> None:
 
 
 def run_migrations_online() -> None:
+    # Tests hand over a connection of their own, e.g. one pointed at a scratch schema.
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section),
         prefix="sqlalchemy.",
@@ -0,0 +1,179 @@
+"""partition orders by month and add the order archive
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+
+``orders`` and ``order_items`` become range-partitioned by month on the
+order's ``created_at``; existing rows are copied across. Partitions are
+created by the ``ensure_order_partitions(from, to)`` function, which the
+maintenance task calls ahead of time. Downgrading copies the rows back into
+plain tables and drops ``order_archive`` together with any archived orders.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+ORDER_STATUS = postgresql.ENUM(
+    'PENDING', 'PROCESSING', 'SHIPPED', 'DELIVERED', 'CANCELLED', name='orderstatus', create_type=False
+)
+
+# Creates the monthly partitions of orders and order_items covering [from_ts, to_ts], in UTC;
+# months that already have a partition are skipped. Returns the number of months added.
+ENSURE_ORDER_PARTITIONS = """
+CREATE OR REPLACE FUNCTION ensure_order_partitions(from_ts timestamptz, to_ts timestamptz)
+RETURNS integer
+LANGUAGE plpgsql AS $$
+DECLARE
+    month_start timestamptz := date_trunc('month', from_ts AT TIME ZONE 'UTC') AT TIME ZONE 'UTC';
+    month_end timestamptz;
+    suffix text;
+    created integer := 0;
+BEGIN
+    WHILE month_start <= to_ts LOOP
+        month_end := ((month_start AT TIME ZONE 'UTC') + interval '1 month') AT TIME ZONE 'UTC';
+        suffix := to_char(month_start AT TIME ZONE 'UTC', '"y"YYYY"m"MM');
+        IF to_regclass('orders_' || suffix) IS NULL THEN
+            EXECUTE format('CREATE TABLE %I PARTITION OF orders FOR VALUES FROM (%L) TO (%L)',
+                           'orders_' || suffix, month_start, month_end);
+            EXECUTE format('CREATE TABLE %I PARTITION OF order_items FOR VALUES FROM (%L) TO (%L)',
+                           'order_items_' || suffix, month_start, month_end);
+            created := created + 1;
+        END IF;
+        month_start := month_end;
+    END LOOP;
+    RETURN created;
+END
+$$
+"""
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE order_items RENAME TO order_items_unpartitioned")
+    op.execute("ALTER TABLE order_items_unpartitioned RENAME CONSTRAINT order_items_pkey TO order_items_unpartitioned_pkey")
+    op.execute("ALTER TABLE order_items_unpartitioned DROP CONSTRAINT order_items_order_id_fkey")
+    op.drop_index('ix_order_items_order_id', table_name='order_items_unpartitioned')
+    op.drop_index('ix_order_items_id', table_name='order_items_unpartitioned')
+    op.execute("ALTER TABLE orders RENAME TO orders_unpartitioned")
+    op.execute("ALTER TABLE orders_unpartitioned RENAME CONSTRAINT orders_pkey TO orders_unpartitioned_pkey")
+    op.drop_index('ix_orders_user_id', table_name='orders_unpartitioned')
+    op.drop_index('ix_orders_id', table_name='orders_unpartitioned')
+
+    op.create_table('orders',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('status', ORDER_STATUS, nullable=False),
+    sa.Column('total_amount', sa.Float(), nullable=False),
+    sa.Column('shipping_address', sa.Text(), nullable=False),
+    sa.Column('billing_address', sa.Text(), nullable=False),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id', 'created_at'),
+    postgresql_partition_by='RANGE (created_at)'
+    )
+    op.create_index('ix_orders_user_id_created_at', 'orders', ['user_id', 'created_at'], unique=False)
+    op.create_table('order_items',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('order_id', sa.String(), nullable=False),
+    sa.Column('order_created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('product_id', sa.String(), nullable=False),
+    sa.Column('product_name', sa.String(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('unit_price', sa.Float(), nullable=False),
+    sa.Column('total_price', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['order_id', 'order_created_at'], ['orders.id', 'orders.created_at'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', 'order_created_at'),
+    postgresql_partition_by='RANGE (order_created_at)'
+    )
+    op.create_index(op.f('ix_order_items_order_id'), 'order_items', ['order_id'], unique=False)
+
+    op.execute(ENSURE_ORDER_PARTITIONS)
+    op.execute(
+        "SELECT ensure_order_partitions("
+        "coalesce((SELECT min(created_at) FROM orders_unpartitioned), now()), "
+        f"now() + interval '{MONTHS_AHEAD} months')"
+    )
+    # now() is fixed for the transaction, so an order and its items land in the same month.
+    op.execute(
+        "INSERT INTO orders (id, user_id, status, total_amount, shipping_address, billing_address, notes, "
+        "created_at, updated_at) "
+        "SELECT id, user_id, status, total_amount, shipping_address, billing_address, notes, "
+        "coalesce(created_at, now()), updated_at FROM orders_unpartitioned"
+    )
+    op.execute(
+        "INSERT INTO order_items (id, order_id, order_created_at, product_id, product_name, quantity, "
+        "unit_price, total_price, created_at) "
+        "SELECT i.id, i.order_id, coalesce(o.created_at, now()), i.product_id, i.product_name, i.quantity, "
+        "i.unit_price, i.total_price, i.created_at "
+        "FROM order_items_unpartitioned i JOIN orders_unpartitioned o ON o.id = i.order_id"
+    )
+    op.drop_table('order_items_unpartitioned')
+    op.drop_table('orders_unpartitioned')
+
+    op.create_table('order_archive',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('status', ORDER_STATUS, nullable=False),
+    sa.Column('total_amount', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('document', sa.LargeBinary(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('order_archive')
+    op.execute("CREATE TABLE orders_partitioned AS SELECT * FROM orders")
+    op.execute(
+        "CREATE TABLE order_items_partitioned AS SELECT id, order_id, product_id, product_name, quantity, "
+        "unit_price, total_price, created_at FROM order_items"
+    )
+    op.drop_table('order_items')
+    op.drop_table('orders')
+    op.execute("DROP FUNCTION ensure_order_partitions(timestamptz, timestamptz)")
+
+    op.create_table('orders',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('status', ORDER_STATUS, nullable=False),
+    sa.Column('total_amount', sa.Float(), nullable=False),
+    sa.Column('shipping_address', sa.Text(), nullable=False),
+    sa.Column('billing_address', sa.Text(), nullable=False),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_orders_id'), 'orders', ['id'], unique=False)
+    op.create_index(op.f('ix_orders_user_id'), 'orders', ['user_id'], unique=False)
+    op.create_table('order_items',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('order_id', sa.String(), nullable=False),
+    sa.Column('product_id', sa.String(), nullable=False),
+    sa.Column('product_name', sa.String(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('unit_price', sa.Float(), nullable=False),
+    sa.Column('total_price', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_order_items_id'), 'order_items', ['id'], unique=False)
+    op.create_index(op.f('ix_order_items_order_id'), 'order_items', ['order_id'], unique=False)
+
+    op.execute("INSERT INTO orders SELECT * FROM orders_partitioned")
+    op.execute("INSERT INTO order_items SELECT * FROM order_items_partitioned")
+    op.drop_table('order_items_partitioned')
+    op.drop_table('orders_partitioned')
@@ -0,0 +1,52 @@
+"""add sales aggregates
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+
+The tables start empty; fill them from history with ``python -m app.backfill_sales``.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('product_daily_sales',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('product_id', sa.String(), nullable=False),
+    sa.Column('product_name', sa.String(), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('units', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'product_id')
+    )
+    op.create_index('ix_product_daily_sales_product_id_day', 'product_daily_sales', ['product_id', 'day'], unique=False)
+    op.create_table('user_sales_totals',
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('units', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index('ix_user_sales_totals_revenue', 'user_sales_totals', ['revenue'], unique=False)
+    op.create_table('sales_recorded_orders',
+    sa.Column('order_id', sa.String(), nullable=False),
+    sa.Column('recorded_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('order_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('sales_recorded_orders')
+    op.drop_index('ix_user_sales_totals_revenue', table_name='user_sales_totals')
+    op.drop_table('user_sales_totals')
+    op.drop_index('ix_product_daily_sales_product_id_day', table_name='product_daily_sales')
+    op.drop_table('product_daily_sales')
@@ -0,0 +1,25 @@
+"""index orders by when they last changed
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+
+Incremental exports select orders by ``coalesce(updated_at, created_at)``.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_orders_changed_at', 'orders', [sa.text('coalesce(updated_at, created_at)')], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_orders_changed_at', table_name='orders')
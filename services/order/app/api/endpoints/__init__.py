@@ -1,5 +1,7 @@
 from fastapi import APIRouter
-from app.api.endpoints import orders
+from app.api.endpoints import events, orders, reports
 
 router = APIRouter()
-router.include_router(orders.router, prefix="/orders", tags=["orders"]) 
\ No newline at end of file
+router.include_router(orders.router, prefix="/orders", tags=["orders"])
+router.include_router(events.router, prefix="/orders", tags=["order events"])
+router.include_router(reports.router, prefix="/reports", tags=["reports"])
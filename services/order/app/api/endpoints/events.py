@@ -0,0 +1,132 @@
+import json
+import logging
+import re
+from typing import AsyncIterator, Dict, Optional
+
+import redis.asyncio as aioredis
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import StreamingResponse
+from redis.exceptions import RedisError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud import archive as archive_crud
+from app.crud import order as order_crud
+from app.db.session import get_db
+from app.utils.order_events import is_final, order_stream, status_event, user_stream
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+STREAM_ID = re.compile(r"^\d+-\d+$")
+# Reconnect delay suggested to EventSource clients, in milliseconds.
+RETRY_MS = 2000
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+events_redis = aioredis.Redis.from_url(settings.CELERY_BROKER_URL)
+
+
+def encode_sse(fields: Dict[str, str], event_id: Optional[str] = None) -> str:
+    lines = [f"id: {event_id}"] if event_id else []
+    lines += ["event: status", f"data: {json.dumps(fields, separators=(',', ':'))}"]
+    return "\n".join(lines) + "\n\n"
+
+
+def resume_from(last_event_id: Optional[str], query_last_event_id: Optional[str]) -> Optional[str]:
+    """The stream id to resume after, from the ``Last-Event-ID`` header EventSource sends on reconnect."""
+    value = last_event_id or query_last_event_id
+    if value is None:
+        return None
+    if not STREAM_ID.match(value):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid event id: {value}")
+    return value
+
+
+async def stream_events(
+    stream: str, last_id: str, stop_when_final: bool, snapshot: Optional[str] = None
+) -> AsyncIterator[str]:
+    """Relay entries after ``last_id`` as they arrive, with a comment line as keepalive while idle.
+
+    For an order already in a final status, ``snapshot`` carries that status
+    from the database: the entries the stream still holds are replayed and
+    the snapshot stands in for the final event if it has expired.
+    """
+    yield f"retry: {RETRY_MS}\n\n"
+    block_ms = None if snapshot else int(settings.ORDER_EVENTS_HEARTBEAT_SECONDS * 1000)
+    while True:
+        try:
+            response = await events_redis.xread({stream: last_id}, count=100, block=block_ms)
+        except RedisError as e:
+            # Ending the response makes EventSource reconnect with the last id it saw.
+            logger.warning(f"Reading {stream} failed: {str(e)}")
+            return
+        if not response:
+            if snapshot:
+                yield snapshot
+                return
+            yield ": keepalive\n\n"
+            continue
+        for _, entries in response:
+            for entry_id, raw in entries:
+                last_id = entry_id.decode()
+                fields = {key.decode(): value.decode() for key, value in raw.items()}
+                yield encode_sse(fields, last_id)
+                if stop_when_final and is_final(fields["status"]):
+                    return
+
+
+async def latest_id(stream: str) -> str:
+    entries = await events_redis.xrevrange(stream, count=1)
+    return entries[0][0].decode() if entries else "0-0"
+
+
+@router.get("/{order_id}/events")
+def order_events(
+    order_id: str,
+    last_event_id: Optional[str] = Header(None),
+    since: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Server-Sent Events for one order's status changes.
+
+    A new subscriber gets the order's history first, then live updates; a
+    reconnecting one (``Last-Event-ID`` header, or ``?since=`` for clients
+    that cannot set headers) gets only what it missed. The response ends once
+    the order reaches a final status, straight away for orders already there.
+    """
+    resume = resume_from(last_event_id, since)
+    db_order = order_crud.get_order_by_id(db, order_id) or archive_crud.get_archived_order(db, order_id)
+    if db_order is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Order not found"
+        )
+    snapshot = encode_sse(status_event(db_order, None)) if is_final(db_order.status.value) else None
+    # Dependency cleanup only runs once the stream ends; don't hold a connection until then.
+    db.close()
+
+    events = stream_events(order_stream(order_id), resume or "0-0", stop_when_final=True, snapshot=snapshot)
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.get("/user/{user_id}/events")
+async def user_order_events(
+    user_id: str,
+    last_event_id: Optional[str] = Header(None),
+    since: Optional[str] = None,
+):
+    """Server-Sent Events for status changes of any of a user's orders, from now or from ``Last-Event-ID``."""
+    resume = resume_from(last_event_id, since)
+    stream = user_stream(user_id)
+    if resume is None:
+        try:
+            resume = await latest_id(stream)
+        except RedisError as e:
+            logger.error(f"Reading {stream} failed: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Order events are unavailable"
+            )
+    events = stream_events(stream, resume, stop_when_final=False)
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
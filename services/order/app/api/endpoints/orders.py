@@ -1,9 +1,11 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
 from app.schemas.order import OrderCreate, OrderResponse, OrderUpdateStatus
+from app.crud import archive as archive_crud
 from app.crud import order as order_crud
 from app.celery_worker.tasks import process_order
 from app.models.state_machine import OrderStateMachine
@@ -24,6 +26,11 @@ def create_order(order_data: OrderCreate, db: Session = Depends(get_db)):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except order_crud.StockUnavailableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
 
 
 @router.get("/", response_model=List[OrderResponse])
@@ -34,7 +41,7 @@ def read_orders(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
 
 @router.get("/{order_id}", response_model=OrderResponse)
 def read_order(order_id: str, db: Session = Depends(get_db)):
-    db_order = order_crud.get_order_by_id(db, order_id=order_id)
+    db_order = order_crud.get_order_by_id(db, order_id=order_id) or archive_crud.get_archived_order(db, order_id)
     if db_order is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -44,8 +51,15 @@ def read_order(order_id: str, db: Session = Depends(get_db)):
 
 
 @router.get("/user/{user_id}", response_model=List[OrderResponse])
-def read_user_orders(user_id: str, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    orders = order_crud.get_user_orders(db, user_id=user_id, skip=skip, limit=limit)
+def read_user_orders(
+    user_id: str,
+    skip: int = 0,
+    limit: int = 100,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+):
+    orders = order_crud.get_user_orders(db, user_id=user_id, skip=skip, limit=limit, since=since, until=until)
     return orders
 
 
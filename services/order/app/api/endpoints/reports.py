@@ -0,0 +1,112 @@
+import secrets
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud import export as export_crud
+from app.crud import sales as sales_crud
+from app.db.session import get_db
+from app.schemas.report import DailySales, ProductDailySales, ProductSales, UserSales
+
+# Every report reads the sales aggregates only, never orders or order_items.
+router = APIRouter()
+
+DEFAULT_RANGE_DAYS = 30
+MAX_RANGE_DAYS = 366
+
+
+def date_range(start: Optional[date] = None, end: Optional[date] = None) -> Tuple[date, date]:
+    """Inclusive ``[start, end]``; defaults to the last 30 days (UTC)."""
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    if start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must not be after end")
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range cannot exceed {MAX_RANGE_DAYS} days"
+        )
+    return start, end
+
+
+@router.get("/sales/daily", response_model=List[DailySales])
+def read_daily_sales(days: Tuple[date, date] = Depends(date_range), db: Session = Depends(get_db)):
+    return sales_crud.get_daily_sales(db, *days)
+
+
+@router.get("/sales/products", response_model=List[ProductSales])
+def read_product_sales(
+    days: Tuple[date, date] = Depends(date_range),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+):
+    return sales_crud.get_product_sales(db, *days, limit=limit)
+
+
+@router.get("/sales/products/{product_id}", response_model=List[ProductDailySales])
+def read_product_daily_sales(
+    product_id: str, days: Tuple[date, date] = Depends(date_range), db: Session = Depends(get_db)
+):
+    return sales_crud.get_product_daily_sales(db, product_id, *days)
+
+
+@router.get("/users/top", response_model=List[UserSales])
+def read_top_users(limit: int = Query(100, ge=1, le=1000), db: Session = Depends(get_db)):
+    return sales_crud.get_top_users(db, limit=limit)
+
+
+@router.get("/users/{user_id}", response_model=UserSales)
+def read_user_sales(user_id: str, db: Session = Depends(get_db)):
+    totals = sales_crud.get_user_totals(db, user_id)
+    if totals is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No sales recorded for this user"
+        )
+    return totals
+
+
+@router.get("/exports/{table}")
+def export_table(
+    table: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    format: str = Query("parquet", regex="^(parquet|arrow)$"),
+    x_admin_token: str = Header(""),
+    db: Session = Depends(get_db),
+):
+    """Stream ``orders`` or ``order_items`` as one Parquet file or Arrow IPC stream.
+
+    Pass the previous response's ``X-Export-Until`` as ``since`` to fetch only
+    what changed; without ``since``, archived orders are included. Exports
+    carry every customer's addresses, so they need ``EXPORT_ADMIN_TOKEN``.
+    """
+    if not settings.EXPORT_ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Exports over HTTP are disabled")
+    if not secrets.compare_digest(x_admin_token, settings.EXPORT_ADMIN_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
+    if table not in export_crud.SCHEMAS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown export table {table}")
+    # Timestamps without an offset are UTC, like everything the service stores.
+    since, until = (
+        value.replace(tzinfo=timezone.utc) if value and not value.tzinfo else value for value in (since, until)
+    )
+    until = until or export_crud.default_until(settings.EXPORT_WATERMARK_LAG_SECONDS)
+    if since and since >= until:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="since must be before until")
+
+    extension, media_type = export_crud.FORMATS[format]
+    return StreamingResponse(
+        export_crud.stream_export(
+            db, table, format, until=until, since=since, batch_size=settings.EXPORT_BATCH_SIZE
+        ),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{table}-{until:%Y%m%dT%H%M%SZ}.{extension}"',
+            "X-Export-Until": until.isoformat(),
+        },
+    )
@@ -1,11 +1,37 @@
+import os
+import time
+
 from celery import Celery
+from celery.schedules import crontab
+from celery.signals import before_task_publish, worker_init, worker_process_shutdown
+from kombu import Queue
 from app.core.config import settings
 
+PROCESSING_QUEUE = "processing"
+COMPENSATION_QUEUE = "compensation"
+MAINTENANCE_QUEUE = "maintenance"
+# A worker consuming several queues always drains them in this order, so stock restores
+# are never stuck behind a flood of new orders.
+QUEUES = (COMPENSATION_QUEUE, PROCESSING_QUEUE, MAINTENANCE_QUEUE)
+
+# Redis priorities run from 0 (served first) to 9; each level is its own list in Redis.
+PRIORITY_STEPS = list(range(10))
+PRIORITY_SEP = ":"
+HIGH_PRIORITY = 0
+DEFAULT_PRIORITY = 5
+LOW_PRIORITY = 9
+
+QUEUE_CONCURRENCY = {
+    PROCESSING_QUEUE: settings.PROCESSING_WORKER_CONCURRENCY,
+    COMPENSATION_QUEUE: settings.COMPENSATION_WORKER_CONCURRENCY,
+    MAINTENANCE_QUEUE: settings.MAINTENANCE_WORKER_CONCURRENCY,
+}
+
 celery_app = Celery(
     "order_worker",
     broker=settings.CELERY_BROKER_URL,
     backend=settings.CELERY_BACKEND_URL,
-    include=["app.celery_worker.tasks"]
+    include=["app.celery_worker.tasks", "app.celery_worker.maintenance"]
 )
 
 celery_app.conf.update(
@@ -14,7 +40,75 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
-    task_track_started=True,
+    # Outcomes are published as order status events; nothing reads task results.
+    task_ignore_result=True,
     worker_prefetch_multiplier=1,
     task_acks_late=True,
-) 
\ No newline at end of file
+    task_queues=[Queue(name, routing_key=name) for name in QUEUES],
+    task_default_queue=PROCESSING_QUEUE,
+    task_routes={
+        "process_order": {"queue": PROCESSING_QUEUE},
+        "restore_product_stock": {"queue": COMPENSATION_QUEUE},
+        "maintenance.*": {"queue": MAINTENANCE_QUEUE},
+    },
+    task_default_priority=DEFAULT_PRIORITY,
+    broker_transport_options={
+        "priority_steps": PRIORITY_STEPS,
+        "sep": PRIORITY_SEP,
+        "queue_order_strategy": "priority",
+    },
+    # Run by `celery beat`; both tasks are idempotent, so a missed or repeated run is harmless.
+    beat_schedule={
+        "ensure-order-partitions": {
+            "task": "maintenance.ensure_order_partitions",
+            "schedule": crontab(hour=2, minute=0),
+        },
+        "archive-orders": {
+            "task": "maintenance.archive_orders",
+            "schedule": crontab(hour=2, minute=30),
+        },
+    },
+)
+
+
+@before_task_publish.connect
+def stamp_enqueue_time(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault("enqueued_at", time.time())
+
+
+@worker_init.connect
+def apply_worker_concurrency(sender=None, **kwargs):
+    """Size the pool unless `-c` was given: per-queue for a worker started on one queue, else WORKER_CONCURRENCY.
+
+    Concurrency is processes under prefork and orders in flight under gevent.
+    """
+    if sender is None or sender.options.get("concurrency"):
+        return
+    queues = list(sender.app.amqp.queues.consume_from)
+    concurrency = QUEUE_CONCURRENCY.get(queues[0]) if len(queues) == 1 else None
+    concurrency = concurrency or settings.WORKER_CONCURRENCY
+    if concurrency:
+        sender.concurrency = concurrency
+
+
+@worker_init.connect
+def setup_gevent(**kwargs):
+    from app.celery_worker.green import setup_gevent_worker
+    setup_gevent_worker()
+
+
+@worker_init.connect
+def start_worker_metrics(**kwargs):
+    if settings.WORKER_METRICS_PORT:
+        import redis
+        from app.celery_worker.metrics import QueueDepthCollector, start_metrics_server
+        broker = redis.Redis.from_url(settings.CELERY_BROKER_URL, socket_timeout=2)
+        queue_depth = QueueDepthCollector(broker, QUEUES, PRIORITY_STEPS, PRIORITY_SEP)
+        start_metrics_server(settings.WORKER_METRICS_PORT, collectors=[queue_depth])
+
+
+@worker_process_shutdown.connect
+def cleanup_worker_metrics(pid=None, **kwargs):
+    from app.celery_worker.metrics import mark_process_dead
+    mark_process_dead(pid or os.getpid())
@@ -0,0 +1,56 @@
+"""Support for running the worker on Celery's gevent pool.
+
+``process_order`` spends nearly all of its time waiting on the product and
+user services, so one process can keep many orders in flight::
+
+    celery -A app.celery_worker.celery_app worker -P gevent -c 200
+
+Celery monkey-patches the standard library before loading the app, which
+makes ``requests``, redis-py and the locks in ``app.utils`` cooperative.
+psycopg2 is a C extension and would block the whole process on every query,
+so ``make_psycopg2_green`` routes its I/O through the gevent hub as well.
+Nothing else changes: ``-c`` bounds the orders in flight, and with
+``task_acks_late`` and a prefetch multiplier of 1 each message is acked only
+after its order finishes, exactly as under prefork.
+"""
+import logging
+import sys
+
+logger = logging.getLogger(__name__)
+
+
+def gevent_patched() -> bool:
+    monkey = sys.modules.get("gevent.monkey")
+    return monkey is not None and monkey.is_module_patched("socket")
+
+
+def gevent_wait_callback(conn, timeout=None) -> None:
+    """psycopg2 wait callback that yields to other greenlets while the server answers."""
+    from gevent.socket import wait_read, wait_write
+    from psycopg2 import OperationalError, extensions
+
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            wait_read(conn.fileno(), timeout=timeout)
+        elif state == extensions.POLL_WRITE:
+            wait_write(conn.fileno(), timeout=timeout)
+        else:
+            raise OperationalError(f"Bad result from poll: {state!r}")
+
+
+def make_psycopg2_green() -> None:
+    from psycopg2 import extensions
+
+    extensions.set_wait_callback(gevent_wait_callback)
+
+
+def setup_gevent_worker() -> bool:
+    """Make database I/O cooperative when the worker runs on the gevent pool."""
+    if not gevent_patched():
+        return False
+    make_psycopg2_green()
+    logger.info("Running on gevent; psycopg2 waits now yield to other orders")
+    return True
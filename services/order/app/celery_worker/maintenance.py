@@ -0,0 +1,38 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+from app.celery_worker.celery_app import celery_app
+from app.core.config import settings
+from app.crud.archive import archive_orders
+from app.db import partitions
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="maintenance.ensure_order_partitions")
+def ensure_order_partitions() -> str:
+    db = SessionLocal()
+    try:
+        if not partitions.is_partitioned(db):
+            return "Orders are not partitioned, nothing to do"
+        now = datetime.now(timezone.utc)
+        end = now
+        for _ in range(settings.ORDER_PARTITION_MONTHS_AHEAD):
+            end = partitions.month_after(end.replace(day=1))
+        created = partitions.ensure_partitions(db, now, end)
+        return f"Created {created} monthly order partitions"
+    finally:
+        db.close()
+
+
+@celery_app.task(name="maintenance.archive_orders")
+def archive_old_orders() -> str:
+    before = datetime.now(timezone.utc) - timedelta(days=settings.ORDER_ARCHIVE_AFTER_DAYS)
+    db = SessionLocal()
+    try:
+        archived = archive_orders(db, before=before, batch_size=settings.ORDER_ARCHIVE_BATCH_SIZE)
+        logger.info(f"Archived {archived} orders created before {before:%Y-%m-%d}")
+        return f"Archived {archived} orders"
+    finally:
+        db.close()
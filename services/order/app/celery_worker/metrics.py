@@ -0,0 +1,149 @@
+import os
+import time
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional, Sequence
+
+from prometheus_client import CollectorRegistry, Counter, Histogram, REGISTRY, start_http_server, multiprocess
+from prometheus_client.core import GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+STAGE_DURATION = Histogram(
+    "order_task_stage_duration_seconds",
+    "Duration of each process_order stage",
+    ["stage", "outcome"],
+)
+STAGE_OUTCOMES = Counter(
+    "order_task_stage_total",
+    "Outcomes of each process_order stage",
+    ["stage", "outcome", "reason"],
+)
+TASK_QUEUE_WAIT = Histogram(
+    "order_task_queue_wait_seconds",
+    "Time between a task being published and a worker starting it",
+    ["task"],
+)
+TASK_RUN_TIME = Histogram(
+    "order_task_run_seconds",
+    "Wall-clock run time of a task",
+    ["task", "outcome"],
+)
+
+
+class StageTimer:
+    """Times the stages of a single task run and records them as metrics."""
+
+    def __init__(self, task_name: str, enqueued_at: Optional[float] = None):
+        self.task_name = task_name
+        self.started_at = time.time()
+        self.queue_wait = max(self.started_at - enqueued_at, 0.0) if enqueued_at else None
+        self.stages: Dict[str, float] = {}
+        self.outcome = "success"
+        self.reason: Optional[str] = None
+        self._failed_stage: Optional[str] = None
+        self._current: Optional[str] = None
+
+        if self.queue_wait is not None:
+            TASK_QUEUE_WAIT.labels(task=task_name).observe(self.queue_wait)
+
+    @contextmanager
+    def stage(self, name: str):
+        self._current = name
+        start = time.perf_counter()
+        try:
+            yield self
+        except Exception as e:
+            self.fail(type(e).__name__)
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            self.stages[name] = duration
+            failed = self._failed_stage == name
+            outcome = "failure" if failed else "success"
+            STAGE_DURATION.labels(stage=name, outcome=outcome).observe(duration)
+            STAGE_OUTCOMES.labels(stage=name, outcome=outcome, reason=self.reason if failed else "").inc()
+            self._current = None
+
+    def fail(self, reason: str) -> None:
+        """Mark the running stage, and the task as a whole, as failed."""
+        if self._failed_stage is not None:
+            return
+        self.outcome = "failure"
+        self.reason = reason
+        self._failed_stage = self._current
+
+    def skip(self, reason: str) -> None:
+        """Mark the task as finished early without it being an error."""
+        self.outcome = "skipped"
+        self.reason = reason
+
+    def finish(self) -> None:
+        run_time = time.time() - self.started_at
+        TASK_RUN_TIME.labels(task=self.task_name, outcome=self.outcome).observe(run_time)
+        stages = ", ".join(f"{name}={duration * 1000:.1f}ms" for name, duration in self.stages.items())
+        queue_wait = f"{self.queue_wait * 1000:.1f}ms" if self.queue_wait is not None else "n/a"
+        logger.info(
+            f"Task {self.task_name} finished: outcome={self.outcome} reason={self.reason or '-'} "
+            f"queue_wait={queue_wait} run={run_time * 1000:.1f}ms stages=[{stages}]"
+        )
+
+
+class QueueDepthCollector:
+    """Reports the messages waiting in each Celery queue, read from the Redis broker at scrape time.
+
+    Kombu keeps one Redis list per queue and priority level; the depth is
+    their sum, also broken down by priority. Messages a worker has taken but
+    not yet acked are not waiting and are not counted.
+    """
+
+    def __init__(self, redis_client, queues: Sequence[str], priority_steps: Sequence[int], sep: str):
+        self.redis = redis_client
+        self.queues = list(queues)
+        self.priority_steps = list(priority_steps)
+        self.sep = sep
+
+    def _key(self, queue: str, priority: int) -> str:
+        return f"{queue}{self.sep}{priority}" if priority else queue
+
+    def collect(self) -> Iterable[GaugeMetricFamily]:
+        depth = GaugeMetricFamily("order_queue_depth", "Messages waiting in each worker queue", labels=["queue"])
+        by_priority = GaugeMetricFamily(
+            "order_queue_depth_by_priority", "Messages waiting in each worker queue by priority",
+            labels=["queue", "priority"],
+        )
+        try:
+            with self.redis.pipeline(transaction=False) as pipe:
+                for queue in self.queues:
+                    for priority in self.priority_steps:
+                        pipe.llen(self._key(queue, priority))
+                lengths = iter(pipe.execute())
+        except Exception as e:
+            logger.warning(f"Could not read queue depths from the broker: {str(e)}")
+            return
+        for queue in self.queues:
+            total = 0
+            for priority in self.priority_steps:
+                length = next(lengths)
+                total += length
+                by_priority.add_metric([queue, str(priority)], length)
+            depth.add_metric([queue], total)
+        yield depth
+        yield by_priority
+
+
+def start_metrics_server(port: int, collectors: Sequence = ()) -> None:
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    for collector in collectors:
+        registry.register(collector)
+    start_http_server(port, registry=registry)
+    logger.info(f"Serving worker metrics on port {port}")
+
+
+def mark_process_dead(pid: int) -> None:
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
@@ -1,11 +1,11 @@
 import time
 import requests
 import logging
+from typing import Optional
 from sqlalchemy.orm import Session
 from celery import shared_task
-from fastapi import HTTPException, status
 
-from app.celery_worker.celery_app import celery_app
+from app.celery_worker.celery_app import celery_app, DEFAULT_PRIORITY, HIGH_PRIORITY
 from app.db.session import SessionLocal
 from app.models.order import OrderStatus
 from app.crud.order import get_order_by_id, update_order_status
@@ -13,123 +13,150 @@ from app.schemas.order import OrderUpdateStatus
 from app.core.config import settings
 from app.models.state_machine import OrderStateMachine
 from app.db.transaction import transaction
-from app.utils.redis_lock import lock_manager
+from app.utils.balancer import pool_for
+from app.utils.wire import ACCEPT_HEADERS, decode
+from app.utils.service_auth import user_service_auth
+from app.utils.user_client import lookup_users
+from app.celery_worker.metrics import StageTimer
 
 logger = logging.getLogger(__name__)
 
-def restore_product_stock(product_id: str, quantity: int) -> None:
+@celery_app.task(name="restore_product_stock", bind=True, max_retries=10, default_retry_delay=5)
+def restore_product_stock(
+    self, product_id: str, quantity: int, order_id: Optional[str] = None, idempotency_key: Optional[str] = None
+) -> str:
     try:
-        with lock_manager.lock(f"product_stock:{product_id}", timeout=5):
-            response = requests.get(
-                f"{settings.PRODUCT_SERVICE_URL}/api/v1/products/{product_id}"
-            )
-            response.raise_for_status()
-            current_stock = response.json()["stock"]
-            
-            update_response = requests.patch(
-                f"{settings.PRODUCT_SERVICE_URL}/api/v1/products/{product_id}/stock",
-                json={"stock": current_stock + quantity}
-            )
-            update_response.raise_for_status()
-            logger.info(f"Restored {quantity} units of stock for product {product_id}")
-    except Exception as e:
-        logger.error(f"Failed to restore stock for product {product_id}: {str(e)}")
+        # A deposit in the Product service's stock ledger; with a key, redelivery and retries restore once.
+        response = pool_for(settings.PRODUCT_SERVICE_URL).request(
+            "POST",
+            f"/api/v1/products/{product_id}/stock/movements",
+            json={
+                "quantity": quantity,
+                "reason": "restore",
+                "order_id": order_id,
+                "idempotency_key": idempotency_key,
+            }
+        )
+        if 400 <= response.status_code < 500:
+            # Deleted product or a reused key; retrying cannot help. The ledger shows what is missing.
+            logger.error(f"Stock restore for product {product_id} rejected: {response.status_code} {response.text}")
+            return f"Error: stock restore for product {product_id} rejected"
+        response.raise_for_status()
+        logger.info(f"Restored {quantity} units of stock for product {product_id}")
+        return f"Restored {quantity} units of stock for product {product_id}"
+    except requests.RequestException as e:
+        logger.warning(f"Failed to restore stock for product {product_id}, will retry: {str(e)}")
+        raise self.retry(exc=e)
+
+
+def release_stock(items, priority: int = DEFAULT_PRIORITY) -> None:
+    """Queue stock restores for ``items`` on the compensation queue."""
+    for item in items:
+        restore_product_stock.apply_async(
+            (item.product_id, item.quantity, item.order_id, f"order-item:{item.id}:restore"), priority=priority
+        )
+
 
 @celery_app.task(name="process_order")
 def process_order(order_id: str) -> str:
     logger.info(f"Processing order {order_id}")
     
+    timer = StageTimer("process_order", enqueued_at=process_order.request.get("enqueued_at"))
     db = SessionLocal()
     
     try:
         order = get_order_by_id(db, order_id)
         if not order:
             logger.error(f"Order {order_id} not found")
+            timer.fail("order_not_found")
             return f"Error: Order {order_id} not found"
         
         if order.status != OrderStatus.PENDING:
             logger.info(f"Order {order_id} is in {order.status} state, skipping processing")
+            timer.skip("not_pending")
             return f"Order {order_id} is in {order.status} state, processing skipped"
         
-        try:
-            with transaction(db) as session:
-                update_order_status(session, order_id, OrderUpdateStatus(status=OrderStatus.PROCESSING))
-                logger.info(f"Updated order {order_id} status to PROCESSING")
-        except ValueError as e:
-            logger.error(f"Failed to update order status: {str(e)}")
-            return f"Error: Failed to update order status: {str(e)}"
-        
-        for item in order.items:
+        with timer.stage("mark_processing"):
             try:
-                response = requests.get(
-                    f"{settings.PRODUCT_SERVICE_URL}/api/v1/products/{item.product_id}"
-                )
-                response.raise_for_status()
-                product_data = response.json()
-                
-                if product_data["stock"] < item.quantity:
-                    logger.error(f"Insufficient stock for product {item.product_id}")
-                    with transaction(db) as session:
-                        update_order_status(session, order_id, OrderUpdateStatus(status=OrderStatus.CANCELLED))
-                    return f"Error: Insufficient stock for product {item.product_id}"
-                
-                logger.info(f"Product {item.product_id} is available")
-                
-            except requests.RequestException as e:
-                logger.error(f"Error verifying product {item.product_id}: {str(e)}")
-                for processed_item in order.items[:order.items.index(item)]:
-                    restore_product_stock(processed_item.product_id, processed_item.quantity)
-                return f"Error verifying product: {str(e)}"
+                with transaction(db) as session:
+                    update_order_status(session, order_id, OrderUpdateStatus(status=OrderStatus.PROCESSING))
+                    logger.info(f"Updated order {order_id} status to PROCESSING")
+            except ValueError as e:
+                logger.error(f"Failed to update order status: {str(e)}")
+                timer.fail("invalid_transition")
+                return f"Error: Failed to update order status: {str(e)}"
+
+        # Load what the HTTP stages need, then hand the connection back to the pool while they
+        # wait; otherwise every order in flight on a gevent worker pins a database connection.
+        db.refresh(order)
+        order.items
+        db.close()
+
+        with timer.stage("check_products"):
+            for item in order.items:
+                try:
+                    response = pool_for(settings.PRODUCT_SERVICE_URL).request(
+                        "GET", f"/api/v1/products/{item.product_id}", headers=ACCEPT_HEADERS
+                    )
+                    response.raise_for_status()
+                    product_data = decode(response)
+                    
+                    if product_data["stock"] < item.quantity:
+                        logger.error(f"Insufficient stock for product {item.product_id}")
+                        timer.fail("insufficient_stock")
+                        with transaction(db) as session:
+                            update_order_status(session, order_id, OrderUpdateStatus(status=OrderStatus.CANCELLED))
+                        return f"Error: Insufficient stock for product {item.product_id}"
+                    
+                    logger.info(f"Product {item.product_id} is available")
+                    
+                except requests.RequestException as e:
+                    logger.error(f"Error verifying product {item.product_id}: {str(e)}")
+                    timer.fail("product_service_error")
+                    release_stock(order.items[:order.items.index(item)])
+                    return f"Error verifying product: {str(e)}"
         
         try:
-            login_data = {
-                "username": settings.USER_SERVICE_ADMIN_EMAIL,
-                "password": settings.USER_SERVICE_ADMIN_PASSWORD
-            }
-            auth_response = requests.post(
-                f"{settings.USER_SERVICE_URL}/api/v1/login/access-token", 
-                data=login_data,
-                headers={"Content-Type": "application/x-www-form-urlencoded"}
-            )
-            auth_response.raise_for_status()
-            token = auth_response.json()["access_token"]
-                
-            headers = {"Authorization": f"Bearer {token}"}
-            response = requests.get(
-                f"{settings.USER_SERVICE_URL}/api/v1/users/{order.user_id}", 
-                headers=headers
-            )
-            response.raise_for_status()
-            logger.info(f"User {order.user_id} verified successfully")
+            with timer.stage("service_auth"):
+                user_service_auth.get_token()
+            
+            with timer.stage("verify_user"):
+                user_status = lookup_users([order.user_id]).get(order.user_id)
+                if not user_status or not user_status["exists"] or not user_status["is_active"]:
+                    raise requests.RequestException(f"User {order.user_id} does not exist or is inactive")
+                logger.info(f"User {order.user_id} verified successfully")
         except requests.RequestException as e:
             logger.error(f"Error verifying user {order.user_id}: {str(e)}")
-            for item in order.items:
-                restore_product_stock(item.product_id, item.quantity)
+            release_stock(order.items)
             return f"Error verifying user: {str(e)}"
         
-        order = get_order_by_id(db, order_id)
-        if order.status != OrderStatus.PROCESSING:
-            logger.info(f"Order {order_id} is no longer in PROCESSING state (current: {order.status}), not updating to SHIPPED")
-            for item in order.items:
-                restore_product_stock(item.product_id, item.quantity)
-            return f"Order {order_id} is in {order.status} state, not updating to SHIPPED"
+        with timer.stage("reload_order"):
+            order = get_order_by_id(db, order_id)
+            if order.status != OrderStatus.PROCESSING:
+                logger.info(f"Order {order_id} is no longer in PROCESSING state (current: {order.status}), not updating to SHIPPED")
+                timer.fail("no_longer_processing")
+                # Usually a cancellation the customer is waiting on; jump the compensation queue.
+                release_stock(order.items, priority=HIGH_PRIORITY)
+                return f"Order {order_id} is in {order.status} state, not updating to SHIPPED"
         
-        try:
-            with transaction(db) as session:
-                update_order_status(session, order_id, OrderUpdateStatus(status=OrderStatus.SHIPPED))
-                logger.info(f"Updated order {order_id} status to SHIPPED")
-                return f"Order {order_id} processed successfully"
-        except ValueError as e:
-            logger.error(f"Failed to update order status to SHIPPED: {str(e)}")
-            for item in order.items:
-                restore_product_stock(item.product_id, item.quantity)
-            return f"Error: Failed to update order status to SHIPPED: {str(e)}"
+        with timer.stage("mark_shipped"):
+            try:
+                with transaction(db) as session:
+                    update_order_status(session, order_id, OrderUpdateStatus(status=OrderStatus.SHIPPED))
+                    logger.info(f"Updated order {order_id} status to SHIPPED")
+                    return f"Order {order_id} processed successfully"
+            except ValueError as e:
+                logger.error(f"Failed to update order status to SHIPPED: {str(e)}")
+                timer.fail("invalid_transition")
+                release_stock(order.items)
+                return f"Error: Failed to update order status to SHIPPED: {str(e)}"
             
     except Exception as e:
         logger.exception(f"Error processing order {order_id}: {str(e)}")
-        for item in order.items:
-            restore_product_stock(item.product_id, item.quantity)
+        timer.fail("unexpected_error")
+        release_stock(order.items)
         return f"Error: {str(e)}"
     
     finally:
-        db.close() 
\ No newline at end of file
+        timer.finish()
+        db.close()
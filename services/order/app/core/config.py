@@ -12,14 +12,59 @@ class Settings(BaseSettings):
     POSTGRES_PORT: str = os.getenv("POSTGRES_PORT", "5432")
     
     DATABASE_URL: str = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}:{POSTGRES_PORT}/{POSTGRES_DB}"
+    # "create_all" creates missing tables on API startup (development); "alembic" leaves the schema
+    # to `alembic upgrade head` and only checks the database is at the expected revision.
+    SCHEMA_MANAGEMENT: str = os.getenv("SCHEMA_MANAGEMENT", "create_all")
+    # Connections per process; a gevent worker holds one per order in flight.
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
     
     CELERY_BROKER_URL: str = os.getenv("CELERY_BROKER_URL", "redis://redis:6379/0")
     CELERY_BACKEND_URL: str = os.getenv("CELERY_BACKEND_URL", "redis://redis:6379/0")
     
+    # Comma-separated replica URLs; requests are balanced across them.
     USER_SERVICE_URL: str = os.getenv("USER_SERVICE_URL", "http://user:8001")
     PRODUCT_SERVICE_URL: str = os.getenv("PRODUCT_SERVICE_URL", "http://product:8002")
+    OUTBOUND_TIMEOUT_SECONDS: float = float(os.getenv("OUTBOUND_TIMEOUT_SECONDS", "5.0"))
+    # Consecutive failures before a replica is ejected, and seconds before it is probed again.
+    OUTBOUND_BREAKER_FAILURES: int = int(os.getenv("OUTBOUND_BREAKER_FAILURES", "5"))
+    OUTBOUND_BREAKER_RESET_SECONDS: float = float(os.getenv("OUTBOUND_BREAKER_RESET_SECONDS", "10.0"))
+    
+    # Status events: entries kept in the global stream and in each per-order/per-user stream,
+    # how long an idle per-order/per-user stream lives, and the SSE keepalive interval.
+    ORDER_EVENTS_MAXLEN: int = int(os.getenv("ORDER_EVENTS_MAXLEN", "100000"))
+    ORDER_EVENTS_SCOPED_MAXLEN: int = int(os.getenv("ORDER_EVENTS_SCOPED_MAXLEN", "1000"))
+    ORDER_EVENTS_TTL_SECONDS: int = int(os.getenv("ORDER_EVENTS_TTL_SECONDS", str(7 * 24 * 3600)))
+    ORDER_EVENTS_HEARTBEAT_SECONDS: float = float(os.getenv("ORDER_EVENTS_HEARTBEAT_SECONDS", "15.0"))
+    
+    # Delivered and cancelled orders older than this move to order_archive; partitions are kept
+    # this many months ahead of the current one.
+    ORDER_ARCHIVE_AFTER_DAYS: int = int(os.getenv("ORDER_ARCHIVE_AFTER_DAYS", "90"))
+    ORDER_ARCHIVE_BATCH_SIZE: int = int(os.getenv("ORDER_ARCHIVE_BATCH_SIZE", "1000"))
+    ORDER_PARTITION_MONTHS_AHEAD: int = int(os.getenv("ORDER_PARTITION_MONTHS_AHEAD", "3"))
+    
+    # Rows per Arrow batch and Parquet row group in exports, and how far behind now an export
+    # window closes so that in-flight transactions commit inside it.
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", "65536"))
+    EXPORT_WATERMARK_LAG_SECONDS: float = float(os.getenv("EXPORT_WATERMARK_LAG_SECONDS", "60.0"))
+    # Sent as X-Admin-Token to download exports over HTTP; the endpoint is disabled when empty.
+    EXPORT_ADMIN_TOKEN: str = os.getenv("EXPORT_ADMIN_TOKEN", "")
     
     USER_SERVICE_ADMIN_EMAIL: str = os.getenv("USER_SERVICE_ADMIN_EMAIL", "admin@example.com")
     USER_SERVICE_ADMIN_PASSWORD: str = os.getenv("USER_SERVICE_ADMIN_PASSWORD", "admin123")
+    USER_SERVICE_CLIENT_ID: str = os.getenv("USER_SERVICE_CLIENT_ID", "order")
+    USER_SERVICE_CLIENT_SECRET: str = os.getenv("USER_SERVICE_CLIENT_SECRET", "")
+    # Kept below the user service's token lifetimes; a 401 also forces a refresh.
+    USER_SERVICE_TOKEN_TTL_SECONDS: int = int(os.getenv("USER_SERVICE_TOKEN_TTL_SECONDS", "1500"))
+    # Must not exceed the user service's USER_LOOKUP_MAX_IDS.
+    USER_LOOKUP_BATCH_SIZE: int = int(os.getenv("USER_LOOKUP_BATCH_SIZE", "500"))
+
+    # Worker processes under prefork, or orders in flight per process under `-P gevent` (0 = one per CPU).
+    WORKER_CONCURRENCY: int = int(os.getenv("WORKER_CONCURRENCY", "0"))
+    # Pool size for a worker started on a single queue with `-Q`; 0 falls back to WORKER_CONCURRENCY.
+    PROCESSING_WORKER_CONCURRENCY: int = int(os.getenv("PROCESSING_WORKER_CONCURRENCY", "0"))
+    COMPENSATION_WORKER_CONCURRENCY: int = int(os.getenv("COMPENSATION_WORKER_CONCURRENCY", "0"))
+    MAINTENANCE_WORKER_CONCURRENCY: int = int(os.getenv("MAINTENANCE_WORKER_CONCURRENCY", "0"))
+    WORKER_METRICS_PORT: int = int(os.getenv("WORKER_METRICS_PORT", "0"))
 
 settings = Settings() 
\ No newline at end of file
@@ -0,0 +1,129 @@
+import json
+import logging
+import zlib
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete, tuple_
+from sqlalchemy.orm import Session, selectinload
+
+from app.db import partitions
+from app.models.order import Order, OrderStatus
+from app.models.order_archive import ArchivedOrder
+from app.models.order_item import OrderItem
+from app.models.state_machine import OrderStateMachine
+
+logger = logging.getLogger(__name__)
+
+# Only orders that can no longer change are archived.
+ARCHIVABLE_STATUSES = [
+    status for status, allowed in OrderStateMachine.ALLOWED_TRANSITIONS.items() if not allowed
+]
+
+ORDER_FIELDS = ("id", "user_id", "total_amount", "shipping_address", "billing_address", "notes")
+ITEM_FIELDS = ("id", "product_id", "product_name", "quantity", "unit_price", "total_price")
+
+
+def _timestamp(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def pack_order(order: Order) -> bytes:
+    document = {field: getattr(order, field) for field in ORDER_FIELDS}
+    document.update(
+        status=order.status.value,
+        created_at=_timestamp(order.created_at),
+        updated_at=_timestamp(order.updated_at),
+        items=[
+            {**{field: getattr(item, field) for field in ITEM_FIELDS}, "created_at": _timestamp(item.created_at)}
+            for item in order.items
+        ],
+    )
+    return zlib.compress(json.dumps(document, separators=(",", ":")).encode())
+
+
+def unpack_order(document: bytes) -> Order:
+    """Rebuild a detached Order, items included, from an archive document."""
+    data = json.loads(zlib.decompress(document))
+    created_at = _datetime(data["created_at"])
+    order = Order(
+        **{field: data[field] for field in ORDER_FIELDS},
+        status=OrderStatus(data["status"]),
+        created_at=created_at,
+        updated_at=_datetime(data["updated_at"]),
+    )
+    order.items = [
+        OrderItem(
+            **{field: item[field] for field in ITEM_FIELDS},
+            order_id=order.id,
+            order_created_at=created_at,
+            created_at=_datetime(item["created_at"]),
+        )
+        for item in data["items"]
+    ]
+    return order
+
+
+def get_archived_order(db: Session, order_id: str) -> Optional[Order]:
+    archived = db.query(ArchivedOrder).filter(ArchivedOrder.id == order_id).first()
+    return unpack_order(archived.document) if archived else None
+
+
+def archive_orders(db: Session, *, before: datetime, batch_size: int = 1000) -> int:
+    """Move finished orders created before ``before`` into ``order_archive``; returns how many moved.
+
+    Works through one monthly partition at a time, in batches keyed on the
+    order id, so every batch is an index range scan of a single partition.
+    Partitions left empty are dropped.
+    """
+    months = partitions.list_partitions(db) if partitions.is_partitioned(db) else [(None, None)]
+    archived = 0
+    for start, end in months:
+        if start is not None and start >= before:
+            break
+        last_id = ""
+        while True:
+            query = db.query(Order).filter(
+                Order.status.in_(ARCHIVABLE_STATUSES),
+                Order.created_at < (min(end, before) if end else before),
+                Order.id > last_id,
+            )
+            if start is not None:
+                query = query.filter(Order.created_at >= start)
+            batch = query.options(selectinload(Order.items)).order_by(Order.id).limit(batch_size).all()
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            db.add_all(
+                ArchivedOrder(
+                    id=order.id,
+                    user_id=order.user_id,
+                    status=order.status,
+                    total_amount=order.total_amount,
+                    created_at=order.created_at,
+                    document=pack_order(order),
+                )
+                for order in batch
+            )
+            keys = [(order.id, order.created_at) for order in batch]
+            db.execute(
+                delete(OrderItem).where(tuple_(OrderItem.order_id, OrderItem.order_created_at).in_(keys)),
+                execution_options={"synchronize_session": False},
+            )
+            db.execute(
+                delete(Order).where(tuple_(Order.id, Order.created_at).in_(keys)),
+                execution_options={"synchronize_session": False},
+            )
+            db.commit()
+            db.expunge_all()
+            archived += len(batch)
+            logger.info(f"Archived {len(batch)} orders created before {before:%Y-%m-%d}")
+
+        if start is not None and end <= before:
+            partitions.drop_partition_if_empty(db, start)
+    return archived
@@ -1,30 +1,85 @@
+from datetime import datetime, timedelta
 from typing import List, Optional
 from sqlalchemy.orm import Session
 import requests
 import logging
-from fastapi import HTTPException, status
 
 from app.models.order import Order, OrderStatus
 from app.models.order_item import OrderItem
 from app.schemas.order import OrderCreate, OrderUpdateStatus
 from app.core.config import settings
+from app.celery_worker.celery_app import celery_app
 from app.models.state_machine import OrderStateMachine
 from app.db.transaction import transaction
-from app.utils.redis_lock import lock_manager
+from app.crud import sales as sales_crud
+from app.utils.balancer import pool_for
+from app.utils.ids import id_timestamp, time_ordered_id
+from app.utils.order_events import order_events
+from app.utils.wire import ACCEPT_HEADERS, decode
 
 logger = logging.getLogger(__name__)
 
 
+class StockUnavailableError(Exception):
+    """Stock could not be checked or reserved; the order may succeed on retry."""
+
+
 def get_orders(db: Session, skip: int = 0, limit: int = 100) -> List[Order]:
     return db.query(Order).offset(skip).limit(limit).all()
 
 
 def get_order_by_id(db: Session, order_id: str) -> Optional[Order]:
-    return db.query(Order).filter(Order.id == order_id).first()
+    query = db.query(Order).filter(Order.id == order_id)
+    created_at = id_timestamp(order_id)
+    if created_at is not None:
+        # Time-ordered ids carry the order's created_at, which names its monthly partition.
+        query = query.filter(Order.created_at >= created_at, Order.created_at < created_at + timedelta(milliseconds=1))
+    return query.first()
+
 
+def get_user_orders(
+    db: Session,
+    user_id: str,
+    skip: int = 0,
+    limit: int = 100,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> List[Order]:
+    """A user's orders, newest first; ``since``/``until`` bound ``created_at`` and so the partitions read."""
+    query = db.query(Order).filter(Order.user_id == user_id)
+    if since is not None:
+        query = query.filter(Order.created_at >= since)
+    if until is not None:
+        query = query.filter(Order.created_at < until)
+    return query.order_by(Order.created_at.desc(), Order.id.desc()).offset(skip).limit(limit).all()
 
-def get_user_orders(db: Session, user_id: str, skip: int = 0, limit: int = 100) -> List[Order]:
-    return db.query(Order).filter(Order.user_id == user_id).offset(skip).limit(limit).all()
+
+def _restore_reserved(order_id: str, reserved: List[dict]) -> None:
+    """Give back stock reserved for an order that was never created.
+
+    Restores are posted straight away so the stock is back before the client
+    hears of the failure; one that cannot be posted is queued as
+    ``restore_product_stock``, which retries. The keys make both paths apply once.
+    """
+    for index, item_data in enumerate(reserved):
+        key = f"order:{order_id}:{index}:restore"
+        try:
+            response = pool_for(settings.PRODUCT_SERVICE_URL).request(
+                "POST",
+                f"/api/v1/products/{item_data['product_id']}/stock/movements",
+                json={
+                    "quantity": item_data["quantity"],
+                    "reason": "restore",
+                    "order_id": order_id,
+                    "idempotency_key": key,
+                }
+            )
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.warning(f"Restoring stock for product {item_data['product_id']} failed, queued: {str(e)}")
+            celery_app.send_task(
+                "restore_product_stock", args=(item_data["product_id"], item_data["quantity"], order_id, key)
+            )
 
 
 def create_order(db: Session, order: OrderCreate) -> Order:
@@ -33,9 +88,11 @@ def create_order(db: Session, order: OrderCreate) -> Order:
     
     for item in order.items:
         try:
-            response = requests.get(f"{settings.PRODUCT_SERVICE_URL}/api/v1/products/{item.product_id}")
+            response = pool_for(settings.PRODUCT_SERVICE_URL).request(
+                "GET", f"/api/v1/products/{item.product_id}", headers=ACCEPT_HEADERS
+            )
             response.raise_for_status()
-            product_data = response.json()
+            product_data = decode(response)
             
             unit_price = product_data["price"]
             total_price = unit_price * item.quantity
@@ -46,47 +103,55 @@ def create_order(db: Session, order: OrderCreate) -> Order:
                 "product_name": product_data["name"],
                 "quantity": item.quantity,
                 "unit_price": unit_price,
-                "total_price": total_price,
-                "stock": product_data["stock"]
+                "total_price": total_price
             })
             
         except (requests.RequestException, KeyError) as e:
             raise ValueError(f"Error fetching product data: {str(e)}")
     
-    for item_data in order_items:
-        try:
-            with lock_manager.lock(f"product_stock:{item_data['product_id']}", timeout=5):
-                response = requests.get(
-                    f"{settings.PRODUCT_SERVICE_URL}/api/v1/products/{item_data['product_id']}"
+    # Reserve by recording a withdrawal in the Product service's stock ledger. The key makes a
+    # retried request safe: the ledger applies each reservation once.
+    order_id, created_at = time_ordered_id()
+    reserved = 0
+    try:
+        for index, item_data in enumerate(order_items):
+            try:
+                response = pool_for(settings.PRODUCT_SERVICE_URL).request(
+                    "POST",
+                    f"/api/v1/products/{item_data['product_id']}/stock/movements",
+                    json={
+                        "quantity": -item_data["quantity"],
+                        "reason": "order",
+                        "order_id": order_id,
+                        "idempotency_key": f"order:{order_id}:{index}:reserve",
+                    }
                 )
+                if response.status_code == 409:
+                    raise ValueError(f"Insufficient stock for product {item_data['product_id']}")
                 response.raise_for_status()
-                current_stock = response.json()["stock"]
-                
-                if current_stock < item_data["quantity"]:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail=f"Insufficient stock for product {item_data['product_id']}"
-                    )
-                
-                update_response = requests.patch(
-                    f"{settings.PRODUCT_SERVICE_URL}/api/v1/products/{item_data['product_id']}/stock",
-                    json={"stock": current_stock - item_data["quantity"]}
+            except requests.RequestException as e:
+                raise StockUnavailableError(
+                    f"Error reserving stock for product {item_data['product_id']}: {str(e)}"
                 )
-                update_response.raise_for_status()
-                
-        except TimeoutError:
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail=f"Could not verify stock for product {item_data['product_id']}"
-            )
-        except requests.RequestException as e:
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail=f"Error updating stock for product {item_data['product_id']}: {str(e)}"
-            )
+            reserved = index + 1
+        
+        db_order = _insert_order(db, order, order_id, created_at, total_amount, order_items)
+    except Exception:
+        # No order row exists, so nothing else would ever give this stock back.
+        _restore_reserved(order_id, order_items[:reserved])
+        raise
     
+    order_events.publish(db_order)
+    return db_order
+
+
+def _insert_order(
+    db: Session, order: OrderCreate, order_id: str, created_at: datetime, total_amount: float, order_items: List[dict]
+) -> Order:
     with transaction(db) as session:
         db_order = Order(
+            id=order_id,
+            created_at=created_at,
             user_id=order.user_id,
             status=OrderStatus.PENDING,
             total_amount=total_amount,
@@ -100,6 +165,7 @@ def create_order(db: Session, order: OrderCreate) -> Order:
         for item_data in order_items:
             db_item = OrderItem(
                 order_id=db_order.id,
+                order_created_at=db_order.created_at,
                 product_id=item_data["product_id"],
                 product_name=item_data["product_name"],
                 quantity=item_data["quantity"],
@@ -109,7 +175,7 @@ def create_order(db: Session, order: OrderCreate) -> Order:
             session.add(db_item)
         
         session.refresh(db_order)
-        return db_order
+    return db_order
 
 
 def update_order_status(db: Session, order_id: str, status_update: OrderUpdateStatus) -> Optional[Order]:
@@ -117,17 +183,22 @@ def update_order_status(db: Session, order_id: str, status_update: OrderUpdateSt
     if not db_order:
         return None
         
+    previous_status = db_order.status
     with transaction(db) as session:
         try:
             OrderStateMachine.validate_transition(db_order.status, status_update.status)
             
             db_order.status = status_update.status
+            session.flush()
+            sales_crud.record_status_change(session, db_order, previous_status)
             session.refresh(db_order)
-            logger.info(f"Order {order_id} status updated from {db_order.status} to {status_update.status}")
-            return db_order
+            logger.info(f"Order {order_id} status updated from {previous_status} to {status_update.status}")
         except ValueError as e:
             logger.error(f"Invalid status transition for order {order_id}: {str(e)}")
             raise ValueError(f"Invalid state transition from {db_order.status} to {status_update.status}")
+    
+    order_events.publish(db_order, previous_status)
+    return db_order
 
 
 def cancel_order(db: Session, order_id: str) -> Optional[Order]:
@@ -135,12 +206,17 @@ def cancel_order(db: Session, order_id: str) -> Optional[Order]:
     if not db_order:
         return None
         
+    previous_status = db_order.status
     with transaction(db) as session:
-        if OrderStateMachine.can_cancel(db_order.status):
-            db_order.status = OrderStatus.CANCELLED
-            session.refresh(db_order)
-            logger.info(f"Order {order_id} has been cancelled")
+        if not OrderStateMachine.can_cancel(db_order.status):
+            logger.warning(f"Cannot cancel order {order_id} in its current state ({db_order.status})")
             return db_order
         
-        logger.warning(f"Cannot cancel order {order_id} in its current state ({db_order.status})")
-        return db_order 
\ No newline at end of file
+        db_order.status = OrderStatus.CANCELLED
+        session.flush()
+        sales_crud.record_status_change(session, db_order, previous_status)
+        session.refresh(db_order)
+        logger.info(f"Order {order_id} has been cancelled")
+    
+    order_events.publish(db_order, previous_status)
+    return db_order 
\ No newline at end of file
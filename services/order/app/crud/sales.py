@@ -0,0 +1,222 @@
+"""Sales aggregates kept up to date as orders change status.
+
+An order's sale counts once it is shipped and stops counting if it is later
+cancelled. ``record_status_change`` runs inside the status change's own
+transaction, so the aggregates never disagree with the orders they summarise.
+A row in ``sales_recorded_orders`` marks each counted order; inserting or
+deleting that row decides whether a change is applied, so concurrent updates
+and the backfill cannot count an order twice.
+"""
+import logging
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, selectinload
+
+from app.crud.archive import unpack_order
+from app.models.order import Order, OrderStatus
+from app.models.order_archive import ArchivedOrder
+from app.models.sales import ProductDailySales, SalesRecordedOrder, UserSalesTotals
+
+logger = logging.getLogger(__name__)
+
+COUNTED_STATUSES = [OrderStatus.SHIPPED, OrderStatus.DELIVERED]
+
+
+def _insert(db: Session):
+    return postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+
+
+def sales_day(created_at: datetime) -> date:
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc)
+    return created_at.date()
+
+
+def _apply(db: Session, orders: Iterable[Order], sign: int) -> None:
+    products: Dict[Tuple[date, str], dict] = {}
+    users: Dict[str, dict] = {}
+    for order in orders:
+        day = sales_day(order.created_at)
+        user = users.setdefault(order.user_id, {"user_id": order.user_id, "order_count": 0, "units": 0, "revenue": 0.0})
+        user["order_count"] += sign
+        user["revenue"] += sign * order.total_amount
+        seen = set()
+        for item in order.items:
+            row = products.setdefault((day, item.product_id), {
+                "day": day, "product_id": item.product_id, "product_name": item.product_name,
+                "order_count": 0, "units": 0, "revenue": 0.0,
+            })
+            if item.product_id not in seen:
+                row["order_count"] += sign
+                seen.add(item.product_id)
+            row["units"] += sign * item.quantity
+            row["revenue"] += sign * item.total_price
+            user["units"] += sign * item.quantity
+
+    insert = _insert(db)
+    # Rows are upserted in key order so concurrent transactions lock them in the same order.
+    if products:
+        stmt = insert(ProductDailySales).values([products[key] for key in sorted(products)])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[ProductDailySales.day, ProductDailySales.product_id],
+            set_={
+                "product_name": stmt.excluded.product_name,
+                "order_count": ProductDailySales.order_count + stmt.excluded.order_count,
+                "units": ProductDailySales.units + stmt.excluded.units,
+                "revenue": ProductDailySales.revenue + stmt.excluded.revenue,
+            },
+        ))
+    if users:
+        stmt = insert(UserSalesTotals).values([users[key] for key in sorted(users)])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[UserSalesTotals.user_id],
+            set_={
+                "order_count": UserSalesTotals.order_count + stmt.excluded.order_count,
+                "units": UserSalesTotals.units + stmt.excluded.units,
+                "revenue": UserSalesTotals.revenue + stmt.excluded.revenue,
+                "updated_at": func.now(),
+            },
+        ))
+
+
+def _count(db: Session, orders: List[Order]) -> int:
+    """Add the orders not counted yet; returns how many were added."""
+    if not orders:
+        return 0
+    marked = set(db.execute(
+        _insert(db)(SalesRecordedOrder)
+        .values([{"order_id": order.id} for order in orders])
+        .on_conflict_do_nothing()
+        .returning(SalesRecordedOrder.order_id)
+    ).scalars())
+    _apply(db, [order for order in orders if order.id in marked], 1)
+    return len(marked)
+
+
+def _uncount(db: Session, orders: List[Order]) -> int:
+    unmarked = set(db.execute(
+        delete(SalesRecordedOrder)
+        .where(SalesRecordedOrder.order_id.in_([order.id for order in orders]))
+        .returning(SalesRecordedOrder.order_id)
+    ).scalars())
+    _apply(db, [order for order in orders if order.id in unmarked], -1)
+    return len(unmarked)
+
+
+def record_status_change(db: Session, order: Order, previous_status: Optional[OrderStatus]) -> None:
+    """Bring the aggregates in line with ``order``'s new status; call inside the status change's transaction."""
+    if order.status in COUNTED_STATUSES:
+        _count(db, [order])
+    elif previous_status in COUNTED_STATUSES:
+        _uncount(db, [order])
+
+
+def backfill(db: Session, *, batch_size: int = 1000, rebuild: bool = False) -> int:
+    """Count every shipped or delivered order, live or archived, that is not counted yet.
+
+    Returns how many were added. Safe to run while orders keep changing: each
+    batch locks its orders, and orders already counted are skipped. With
+    ``rebuild`` the aggregates are emptied first and rebuilt from scratch.
+    """
+    if rebuild:
+        db.execute(delete(ProductDailySales))
+        db.execute(delete(UserSalesTotals))
+        db.execute(delete(SalesRecordedOrder))
+        db.commit()
+
+    counted = 0
+    last_id = ""
+    while True:
+        batch = (
+            db.query(Order)
+            .filter(Order.status.in_(COUNTED_STATUSES), Order.id > last_id)
+            .options(selectinload(Order.items))
+            .order_by(Order.id)
+            .limit(batch_size)
+            .with_for_update(of=Order)
+            .all()
+        )
+        if not batch:
+            break
+        last_id = batch[-1].id
+        counted += _count(db, batch)
+        db.commit()
+        db.expunge_all()
+
+    # Archived orders never change, so they need no lock.
+    last_id = ""
+    while True:
+        rows = (
+            db.query(ArchivedOrder)
+            .filter(ArchivedOrder.status.in_(COUNTED_STATUSES), ArchivedOrder.id > last_id)
+            .order_by(ArchivedOrder.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        last_id = rows[-1].id
+        counted += _count(db, [unpack_order(row.document) for row in rows])
+        db.commit()
+        db.expunge_all()
+
+    logger.info(f"Backfilled sales aggregates with {counted} orders")
+    return counted
+
+
+def get_daily_sales(db: Session, start: date, end: date) -> List[tuple]:
+    """``(day, units, revenue)`` for each day in ``[start, end]`` with sales."""
+    return (
+        db.query(
+            ProductDailySales.day,
+            func.sum(ProductDailySales.units).label("units"),
+            func.sum(ProductDailySales.revenue).label("revenue"),
+        )
+        .filter(ProductDailySales.day >= start, ProductDailySales.day <= end)
+        .group_by(ProductDailySales.day)
+        .order_by(ProductDailySales.day)
+        .all()
+    )
+
+
+def get_product_sales(db: Session, start: date, end: date, limit: int = 100) -> List[tuple]:
+    """Totals per product over ``[start, end]``, best selling first."""
+    revenue = func.sum(ProductDailySales.revenue).label("revenue")
+    return (
+        db.query(
+            ProductDailySales.product_id,
+            func.max(ProductDailySales.product_name).label("product_name"),
+            func.sum(ProductDailySales.order_count).label("order_count"),
+            func.sum(ProductDailySales.units).label("units"),
+            revenue,
+        )
+        .filter(ProductDailySales.day >= start, ProductDailySales.day <= end)
+        .group_by(ProductDailySales.product_id)
+        .order_by(revenue.desc(), ProductDailySales.product_id)
+        .limit(limit)
+        .all()
+    )
+
+
+def get_product_daily_sales(db: Session, product_id: str, start: date, end: date) -> List[ProductDailySales]:
+    return (
+        db.query(ProductDailySales)
+        .filter(
+            ProductDailySales.product_id == product_id,
+            ProductDailySales.day >= start,
+            ProductDailySales.day <= end,
+        )
+        .order_by(ProductDailySales.day)
+        .all()
+    )
+
+
+def get_user_totals(db: Session, user_id: str) -> Optional[UserSalesTotals]:
+    return db.query(UserSalesTotals).filter(UserSalesTotals.user_id == user_id).first()
+
+
+def get_top_users(db: Session, limit: int = 100) -> List[UserSalesTotals]:
+    return db.query(UserSalesTotals).order_by(UserSalesTotals.revenue.desc()).limit(limit).all()
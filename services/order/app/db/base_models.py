@@ -1,2 +1,4 @@
 from app.models.order import Order
-from app.models.order_item import OrderItem 
\ No newline at end of file
+from app.models.order_item import OrderItem
+from app.models.order_archive import ArchivedOrder
+from app.models.sales import ProductDailySales, SalesRecordedOrder, UserSalesTotals
@@ -0,0 +1,74 @@
+"""Monthly partitions of ``orders`` and ``order_items``.
+
+The tables are partitioned by the Alembic migration 0002; a database built
+with ``create_all`` has plain tables, and everything here is a no-op for it.
+Partition ``orders_y2026m10`` holds orders created in October 2026 (UTC), and
+``order_items_y2026m10`` their items.
+"""
+import logging
+import re
+from datetime import datetime, timezone
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+PARTITION_NAME = re.compile(r"^orders_y(\d{4})m(\d{2})$")
+
+
+def is_partitioned(db: Session) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return bool(db.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('orders')")
+    ).scalar())
+
+
+def month_after(month: datetime) -> datetime:
+    return month.replace(year=month.year + month.month // 12, month=month.month % 12 + 1)
+
+
+def partition_suffix(month: datetime) -> str:
+    return f"y{month.year:04d}m{month.month:02d}"
+
+
+def ensure_partitions(db: Session, start: datetime, end: datetime) -> int:
+    """Create the partitions for every month from ``start`` to ``end``; returns how many were added."""
+    created = db.execute(
+        text("SELECT ensure_order_partitions(:start, :end)"), {"start": start, "end": end}
+    ).scalar()
+    db.commit()
+    if created:
+        logger.info(f"Created {created} monthly order partitions up to {end:%Y-%m}")
+    return created
+
+
+def list_partitions(db: Session) -> List[Tuple[datetime, datetime]]:
+    """``(start, end)`` of each monthly partition, oldest first."""
+    names = db.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass('orders')"
+    )).scalars()
+    months = []
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            month = datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+            months.append((month, month_after(month)))
+    return sorted(months)
+
+
+def drop_partition_if_empty(db: Session, month: datetime) -> bool:
+    """Drop one month's partitions once archival has emptied them; the hot tables shrink by a month."""
+    suffix = partition_suffix(month)
+    if db.execute(text(f"SELECT EXISTS (SELECT 1 FROM orders_{suffix})")).scalar():
+        return False
+    # Items first: the orders partition cannot be detached while the foreign key still points into it.
+    for table in ("order_items", "orders"):
+        db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {table}_{suffix}"))
+        db.execute(text(f"DROP TABLE {table}_{suffix}"))
+    db.commit()
+    logger.info(f"Dropped order partitions for {month:%Y-%m}")
+    return True
@@ -0,0 +1,45 @@
+import logging
+
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Alembic head this code expects; bump together with every new revision in alembic/versions.
+SCHEMA_REVISION = "0004"
+
+CREATE_ALL = "create_all"
+ALEMBIC = "alembic"
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+def check_schema_revision(dbapi_connection, connection_record) -> None:
+    """``first_connect`` hook: refuse to run against a database Alembic has not brought to our head.
+
+    A single primary-key read per engine, so it costs nothing on the request path.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("SELECT version_num FROM alembic_version")
+        revisions = {row[0] for row in cursor.fetchall()}
+    except Exception as e:
+        dbapi_connection.rollback()
+        raise SchemaVersionError("Database has no alembic_version table; run `alembic upgrade head`") from e
+    finally:
+        cursor.close()
+    if revisions != {SCHEMA_REVISION}:
+        raise SchemaVersionError(
+            f"Database schema is at {sorted(revisions) or 'no revision'}, expected {SCHEMA_REVISION}; "
+            "run `alembic upgrade head`"
+        )
+    logger.info(f"Database schema is at revision {SCHEMA_REVISION}")
+
+
+def create_schema(engine: Engine) -> None:
+    """Development shortcut: create missing tables straight from the models."""
+    from app.db.base import Base
+    import app.db.base_models
+
+    Base.metadata.create_all(bind=engine)
@@ -1,16 +1,52 @@
-from sqlalchemy import create_engine
+import threading
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from typing import Generator
+from typing import Generator, Optional
 
 from app.core.config import settings
+from app.db.schema import ALEMBIC, check_schema_revision
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"connect_timeout": 10}
-)
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def get_engine() -> Engine:
+    """Create the engine on first use, so importing the app neither loads the driver nor connects."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = create_engine(
+                    settings.DATABASE_URL,
+                    pool_size=settings.DB_POOL_SIZE,
+                    max_overflow=settings.DB_MAX_OVERFLOW,
+                    connect_args={"connect_timeout": 10}
+                )
+                if settings.SCHEMA_MANAGEMENT == ALEMBIC:
+                    event.listen(engine, "first_connect", check_schema_revision)
+                _engine = engine
+    return _engine
+
+
+def __getattr__(name: str):
+    # Keeps ``from app.db.session import engine`` working without creating it at import time.
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class LazySessionmaker(sessionmaker):
+    """``sessionmaker`` that binds to ``get_engine()`` when the first session is opened."""
+
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None:
+            self.configure(bind=get_engine())
+        return super().__call__(**local_kw)
+
+
+SessionLocal = LazySessionmaker(autocommit=False, autoflush=False)
 
 Base = declarative_base()
 
@@ -19,4 +55,4 @@ def get_db() -> Generator:
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
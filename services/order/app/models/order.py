@@ -1,5 +1,6 @@
-from sqlalchemy import Column, String, Float, DateTime, Text, Enum
+from sqlalchemy import Column, String, Float, DateTime, Text, Enum, Index
 from sqlalchemy.sql import func
+from datetime import datetime, timezone
 import uuid
 import enum
 
@@ -17,12 +18,21 @@ class OrderStatus(str, enum.Enum):
 class Order(Base):
     __tablename__ = "orders"
 
-    id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String, nullable=False, index=True)
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String, nullable=False)
     status = Column(Enum(OrderStatus), default=OrderStatus.PENDING, nullable=False)
     total_amount = Column(Float, nullable=False)
     shipping_address = Column(Text, nullable=False)
     billing_address = Column(Text, nullable=False)
     notes = Column(Text, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now()) 
\ No newline at end of file
+    # Part of the key because the table is range-partitioned by month on it (alembic/versions/0002).
+    created_at = Column(
+        DateTime(timezone=True), primary_key=True, default=lambda: datetime.now(timezone.utc), server_default=func.now()
+    )
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_orders_user_id_created_at", "user_id", "created_at"),
+        # When the order last changed; the watermark of incremental exports (app/crud/export.py).
+        Index("ix_orders_changed_at", func.coalesce(updated_at, created_at)),
+    )
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, Float, DateTime, Enum, LargeBinary
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+from app.models.order import OrderStatus
+
+
+class ArchivedOrder(Base):
+    """A finished order moved out of the partitioned tables: one row per order, items included.
+
+    ``document`` is the zlib-compressed JSON of the order and its items; the
+    other columns are kept alongside for lookups without decompressing.
+    """
+
+    __tablename__ = "order_archive"
+
+    id = Column(String, primary_key=True)
+    user_id = Column(String, nullable=False)
+    status = Column(Enum(OrderStatus), nullable=False)
+    total_amount = Column(Float, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    document = Column(LargeBinary, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, String, Float, Integer, DateTime, ForeignKeyConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import uuid
@@ -9,8 +9,10 @@ from app.db.base import Base
 class OrderItem(Base):
     __tablename__ = "order_items"
 
-    id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
-    order_id = Column(String, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False)
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    order_id = Column(String, nullable=False, index=True)
+    # The order's created_at: items share their order's monthly partition.
+    order_created_at = Column(DateTime(timezone=True), primary_key=True)
     product_id = Column(String, nullable=False)
     product_name = Column(String, nullable=False)
     quantity = Column(Integer, nullable=False)
@@ -18,4 +20,10 @@ class OrderItem(Base):
     total_price = Column(Float, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
-    order = relationship("Order", backref="items") 
\ No newline at end of file
+    order = relationship("Order", backref="items")
+
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["order_id", "order_created_at"], ["orders.id", "orders.created_at"], ondelete="CASCADE"
+        ),
+    )
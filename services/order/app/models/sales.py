@@ -0,0 +1,40 @@
+from sqlalchemy import Column, String, Float, Integer, Date, DateTime, Index
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class ProductDailySales(Base):
+    """Units and revenue per product per day, the day being the order's ``created_at`` (UTC)."""
+
+    __tablename__ = "product_daily_sales"
+
+    day = Column(Date, primary_key=True)
+    product_id = Column(String, primary_key=True)
+    product_name = Column(String, nullable=False)
+    order_count = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+
+    __table_args__ = (Index("ix_product_daily_sales_product_id_day", "product_id", "day"),)
+
+
+class UserSalesTotals(Base):
+    __tablename__ = "user_sales_totals"
+
+    user_id = Column(String, primary_key=True)
+    order_count = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (Index("ix_user_sales_totals_revenue", "revenue"),)
+
+
+class SalesRecordedOrder(Base):
+    """Marks an order whose sale is counted in the aggregates, so it is added and subtracted once."""
+
+    __tablename__ = "sales_recorded_orders"
+
+    order_id = Column(String, primary_key=True)
+    recorded_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,39 @@
+from datetime import date, datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class DailySales(BaseModel):
+    day: date
+    units: int
+    revenue: float
+
+    class Config:
+        orm_mode = True
+
+
+class ProductSales(BaseModel):
+    product_id: str
+    product_name: str
+    order_count: int
+    units: int
+    revenue: float
+
+    class Config:
+        orm_mode = True
+
+
+class ProductDailySales(ProductSales):
+    day: date
+
+
+class UserSales(BaseModel):
+    user_id: str
+    order_count: int
+    units: int
+    revenue: float
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
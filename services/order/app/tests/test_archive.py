@@ -0,0 +1,125 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.crud import archive as archive_crud
+from app.db.base import Base
+from app.db.session import get_db
+from app.models.order import Order, OrderStatus
+from app.models.order_archive import ArchivedOrder
+from app.models.order_item import OrderItem
+from app.utils.ids import id_timestamp, time_ordered_id
+from main import app
+
+engine = create_engine(
+    "sqlite:///:memory:",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+NOW = datetime(2026, 10, 19, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+def add_order(db, status: OrderStatus, created_at: datetime) -> str:
+    order_id = str(uuid.uuid4())
+    db.add(Order(
+        id=order_id,
+        user_id="user-1",
+        status=status,
+        total_amount=20.0,
+        shipping_address="1 Main St",
+        billing_address="1 Main St",
+        created_at=created_at,
+    ))
+    db.add(OrderItem(
+        id=str(uuid.uuid4()),
+        order_id=order_id,
+        order_created_at=created_at,
+        product_id="product-1",
+        product_name="Widget",
+        quantity=2,
+        unit_price=10.0,
+        total_price=20.0,
+    ))
+    db.commit()
+    return order_id
+
+
+def test_time_ordered_id_embeds_its_timestamp():
+    order_id, created_at = time_ordered_id()
+    assert uuid.UUID(order_id).version == 7
+    assert id_timestamp(order_id) == created_at
+    assert abs(datetime.now(timezone.utc) - created_at) < timedelta(seconds=5)
+
+
+def test_time_ordered_ids_sort_by_creation():
+    first, _ = time_ordered_id()
+    second, _ = time_ordered_id()
+    assert id_timestamp(first) <= id_timestamp(second)
+
+
+def test_id_timestamp_ignores_other_ids():
+    assert id_timestamp(str(uuid.uuid4())) is None
+    assert id_timestamp("order-4242") is None
+
+
+def test_archive_moves_only_old_finished_orders(db):
+    old = NOW - timedelta(days=200)
+    delivered = add_order(db, OrderStatus.DELIVERED, old)
+    cancelled = add_order(db, OrderStatus.CANCELLED, old)
+    shipped = add_order(db, OrderStatus.SHIPPED, old)
+    recent = add_order(db, OrderStatus.DELIVERED, NOW - timedelta(days=1))
+
+    archived = archive_crud.archive_orders(db, before=NOW - timedelta(days=90), batch_size=1)
+
+    assert archived == 2
+    assert {row.id for row in db.query(Order).all()} == {shipped, recent}
+    assert {row.id for row in db.query(ArchivedOrder).all()} == {delivered, cancelled}
+    assert {row.order_id for row in db.query(OrderItem).all()} == {shipped, recent}
+
+
+def test_archived_order_round_trips(db):
+    order_id = add_order(db, OrderStatus.DELIVERED, NOW - timedelta(days=200))
+    archive_crud.archive_orders(db, before=NOW - timedelta(days=90))
+
+    order = archive_crud.get_archived_order(db, order_id)
+
+    assert order.id == order_id
+    assert order.status == OrderStatus.DELIVERED
+    assert order.total_amount == 20.0
+    assert [(item.product_id, item.quantity) for item in order.items] == [("product-1", 2)]
+    assert archive_crud.get_archived_order(db, str(uuid.uuid4())) is None
+
+
+def test_archived_order_is_served_by_the_api(db):
+    order_id = add_order(db, OrderStatus.CANCELLED, NOW - timedelta(days=200))
+    archive_crud.archive_orders(db, before=NOW - timedelta(days=90))
+
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = lambda: db
+    try:
+        response = TestClient(app).get(f"/api/v1/orders/{order_id}")
+    finally:
+        if previous:
+            app.dependency_overrides[get_db] = previous
+        else:
+            app.dependency_overrides.pop(get_db)
+
+    assert response.status_code == 200
+    assert response.json()["status"] == OrderStatus.CANCELLED.value
+    assert response.json()["items"][0]["product_name"] == "Widget"
@@ -0,0 +1,112 @@
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from app.utils.balancer import ReplicaPool
+from app.utils.breaker import CLOSED, HALF_OPEN, OPEN
+
+
+def make_pool(**kwargs):
+    return ReplicaPool(["http://a", "http://b"], failure_threshold=2, reset_timeout=60, timeout=1, **kwargs)
+
+
+def replica(pool, url):
+    return next(r for r in pool.replicas if r.url == url)
+
+
+def down_on(bad_url):
+    def send(url, **kwargs):
+        if url.startswith(bad_url):
+            raise requests.ConnectionError("connection refused")
+        return MagicMock(status_code=200, url=url)
+    return send
+
+
+def test_picks_replica_with_fewer_outstanding_requests():
+    pool = make_pool()
+    replica(pool, "http://a").outstanding = 5
+
+    picked = []
+    for _ in range(10):
+        chosen = pool.pick()
+        picked.append(chosen.url)
+        pool.release(chosen, ok=True)
+    assert set(picked) == {"http://b"}
+
+
+def test_failing_replica_is_ejected_and_gets_retried_elsewhere():
+    pool = make_pool()
+    with patch("requests.get", side_effect=down_on("http://a")) as mock_get:
+        responses = [pool.request("GET", "/api/v1/products/p1") for _ in range(20)]
+
+    assert all(response.url == "http://b/api/v1/products/p1" for response in responses)
+    assert replica(pool, "http://a").breaker.state == OPEN
+    # Only the requests that tripped the breaker reached the dead replica.
+    assert sum(call.args[0].startswith("http://a") for call in mock_get.call_args_list) == 2
+    assert mock_get.call_args.kwargs["timeout"] == 1
+
+
+def test_writes_are_not_retried():
+    pool = make_pool()
+    replica(pool, "http://b").breaker.state = OPEN
+    replica(pool, "http://b").breaker.opened_at = float("inf")
+
+    with patch("requests.patch", side_effect=down_on("http://a")) as mock_patch:
+        with pytest.raises(requests.ConnectionError):
+            pool.request("PATCH", "/api/v1/products/p1/stock", json={"stock": 1})
+    assert mock_patch.call_count == 1
+
+
+def test_open_breaker_admits_one_probe_after_reset_timeout():
+    pool = ReplicaPool(["http://a"], failure_threshold=1, reset_timeout=0)
+    a = pool.replicas[0]
+    with patch("requests.get", side_effect=requests.ConnectionError("refused")):
+        with pytest.raises(requests.ConnectionError):
+            pool.request("GET", "/health")
+    assert a.breaker.state == OPEN
+
+    probe = pool.pick()
+    assert probe is a and a.breaker.state == HALF_OPEN
+    assert pool.pick() is None
+
+    pool.release(probe, ok=True)
+    assert a.breaker.state == CLOSED
+    assert pool.pick() is a
+
+
+def test_failed_probe_reopens_breaker():
+    pool = ReplicaPool(["http://a"], failure_threshold=3, reset_timeout=60)
+    a = pool.replicas[0]
+    a.breaker.state, a.breaker.opened_at = OPEN, 0.0
+
+    with patch("requests.get", return_value=MagicMock(status_code=502)):
+        assert pool.request("GET", "/health").status_code == 502
+
+    assert a.breaker.state == OPEN
+    with pytest.raises(requests.ConnectionError, match="No healthy replica"):
+        pool.request("GET", "/health")
+
+
+def test_intentional_503s_do_not_eject_a_replica():
+    pool = ReplicaPool(["http://a"], failure_threshold=2, reset_timeout=60)
+    with patch("requests.post", return_value=MagicMock(status_code=503)):
+        for _ in range(5):
+            assert pool.request("POST", "/api/v1/products/p1/stock/movements").status_code == 503
+
+    assert pool.replicas[0].breaker.state == CLOSED
+    assert pool.replicas[0].breaker.failures == 0
+
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+
+
+@pytest.mark.skipif(not (REPO_ROOT / "tools" / "sync_vendored.py").exists(), reason="needs the full repository")
+def test_vendored_modules_match_their_canonical_copies():
+    result = subprocess.run(
+        [sys.executable, str(REPO_ROOT / "tools" / "sync_vendored.py"), "--check"], capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
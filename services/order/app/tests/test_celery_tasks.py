@@ -6,6 +6,8 @@ import requests
 from app.celery_worker.tasks import process_order
 from app.models.order import OrderStatus
 from app.schemas.order import OrderUpdateStatus
+from app.core.config import settings
+from app.utils.wire import ACCEPT_HEADERS
 
 
 @pytest.fixture
@@ -74,7 +76,11 @@ def test_process_order_success(mock_db_session, mock_get_order, mock_update_stat
     assert mock_update_status.call_args_list[1][0][2].status == OrderStatus.SHIPPED
 
     assert mock_requests.call_count == 1
-    mock_requests.assert_called_with(f"http://product:8002/api/v1/products/test-product-1")
+    mock_requests.assert_called_with(
+        "http://product:8002/api/v1/products/test-product-1",
+        headers=ACCEPT_HEADERS,
+        timeout=settings.OUTBOUND_TIMEOUT_SECONDS,
+    )
 
 
 def test_process_order_product_unavailable(mock_db_session, mock_get_order, mock_update_status, mock_requests, mock_order, mock_env_vars):
@@ -106,4 +112,84 @@ def test_process_order_not_found(mock_db_session, mock_get_order, mock_update_st
 
     assert "not found" in result
 
-    mock_update_status.assert_not_called() 
\ No newline at end of file
+    mock_update_status.assert_not_called() 
+
+def _stage_count(stage, outcome, reason=""):
+    from prometheus_client import REGISTRY
+    value = REGISTRY.get_sample_value(
+        "order_task_stage_total",
+        {"stage": stage, "outcome": outcome, "reason": reason},
+    )
+    return value or 0.0
+
+
+def test_process_order_records_stage_metrics(mock_db_session, mock_get_order, mock_update_status, mock_requests, mock_order):
+    mock_order.status = OrderStatus.PENDING
+    mock_get_order.side_effect = [mock_order, MagicMock(status=OrderStatus.PROCESSING, items=mock_order.items)]
+    before = {
+        stage: _stage_count(stage, "success")
+        for stage in ("mark_processing", "check_products", "service_auth", "verify_user", "reload_order", "mark_shipped")
+    }
+
+    with patch("app.celery_worker.tasks.requests.post") as mock_post:
+        mock_post.return_value.json.return_value = {
+            "access_token": "token",
+            "users": [{"id": "test-user-1", "exists": True, "is_active": True}],
+        }
+        result = process_order("test-order-id")
+
+    assert "processed successfully" in result
+    for stage, count in before.items():
+        assert _stage_count(stage, "success") == count + 1
+
+
+def test_process_order_records_failure_reason(mock_db_session, mock_get_order, mock_update_status, mock_requests, mock_order):
+    mock_order.status = OrderStatus.PENDING
+    mock_get_order.return_value = mock_order
+    mock_requests.return_value.json.return_value = {"id": "test-product-1", "stock": 0}
+    before = _stage_count("check_products", "failure", "insufficient_stock")
+
+    result = process_order("test-order-id")
+
+    assert "Insufficient stock" in result
+    assert _stage_count("check_products", "failure", "insufficient_stock") == before + 1
+
+
+def test_service_token_is_cached_and_refreshed_on_401():
+    from app.utils.service_auth import ServiceTokenProvider
+
+    provider = ServiceTokenProvider("http://user", "order", "order-secret")
+    with patch("requests.post") as mock_post:
+        mock_post.return_value.json.side_effect = [{"access_token": "first"}, {"access_token": "second"}]
+        assert provider.auth_headers() == {"Authorization": "Bearer first"}
+        assert provider.auth_headers() == {"Authorization": "Bearer first"}
+        assert mock_post.call_count == 1
+        assert mock_post.call_args[0][0] == "http://user/api/v1/login/service-token"
+        assert mock_post.call_args[1]["data"]["grant_type"] == "client_credentials"
+
+        provider.invalidate()
+        assert provider.auth_headers() == {"Authorization": "Bearer second"}
+        assert mock_post.call_count == 2
+
+
+def test_lookup_users_batches_requests():
+    from app.utils.user_client import lookup_users
+
+    def respond(url, json, headers, timeout):
+        response = MagicMock(status_code=200)
+        response.json.return_value = {
+            "users": [{"id": user_id, "exists": user_id != "u2", "is_active": True} for user_id in json["user_ids"]]
+        }
+        return response
+
+    with patch("app.utils.user_client.settings.USER_LOOKUP_BATCH_SIZE", 2), \
+            patch("app.utils.user_client.user_service_auth.auth_headers", return_value={}), \
+            patch("app.utils.user_client.requests.post", side_effect=respond) as mock_post:
+        statuses = lookup_users(["u1", "u2", "u1", "u3"])
+
+    assert mock_post.call_count == 2
+    assert statuses == {
+        "u1": {"exists": True, "is_active": True},
+        "u2": {"exists": False, "is_active": True},
+        "u3": {"exists": True, "is_active": True},
+    }
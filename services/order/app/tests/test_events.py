@@ -0,0 +1,131 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+import redis
+from fastapi.testclient import TestClient
+
+from app.api.endpoints import events
+from app.db.session import get_db
+from app.models.order import OrderStatus
+from app.utils.order_events import OrderEventPublisher, is_final, order_stream, user_stream
+from main import app
+
+
+def order(status=OrderStatus.CANCELLED):
+    return SimpleNamespace(id="o1", user_id="u1", status=status)
+
+
+class FakeStreams:
+    """Serves canned XREAD batches, then reports the stream as idle."""
+
+    def __init__(self, *batches):
+        self.batches = list(batches)
+        self.reads = []
+
+    async def xread(self, streams, count=None, block=None):
+        self.reads.append((dict(streams), block))
+        return self.batches.pop(0) if self.batches else []
+
+    async def xrevrange(self, stream, count=None):
+        return [(b"7-0", {})]
+
+
+def entry(entry_id, status):
+    return (entry_id, {b"order_id": b"o1", b"user_id": b"u1", b"status": status.encode()})
+
+
+def collect(generator, limit=10):
+    async def run():
+        chunks = []
+        async for chunk in generator:
+            chunks.append(chunk)
+            if len(chunks) == limit:
+                break
+        return chunks
+    return asyncio.run(run())
+
+
+def test_publish_writes_global_order_and_user_streams():
+    pipe = MagicMock()
+    client = MagicMock()
+    client.pipeline.return_value.__enter__.return_value = pipe
+
+    OrderEventPublisher(client, maxlen=100, scoped_maxlen=10, ttl=60).publish(order(), OrderStatus.PENDING)
+
+    streams = [c.args[0] for c in pipe.xadd.call_args_list]
+    assert streams == ["order_events", order_stream("o1"), user_stream("u1")]
+    assert pipe.xadd.call_args_list[0].args[1]["previous_status"] == "pending"
+    assert [c.args for c in pipe.expire.call_args_list] == [(order_stream("o1"), 60), (user_stream("u1"), 60)]
+    pipe.execute.assert_called_once()
+
+
+def test_publish_survives_redis_outage():
+    client = MagicMock()
+    client.pipeline.return_value.__enter__.return_value.execute.side_effect = redis.ConnectionError("down")
+    OrderEventPublisher(client, maxlen=100, scoped_maxlen=10, ttl=60).publish(order())
+
+
+def test_only_terminal_statuses_are_final():
+    assert is_final("cancelled") and is_final("delivered")
+    assert not is_final("pending") and not is_final("shipped")
+
+
+def test_order_stream_ends_at_final_status():
+    fake = FakeStreams([("s", [entry(b"1-0", "processing")])], [("s", [entry(b"2-0", "cancelled")])])
+    with patch.object(events, "events_redis", fake):
+        chunks = collect(events.stream_events("s", "0-0", stop_when_final=True))
+
+    assert chunks[0] == "retry: 2000\n\n"
+    assert chunks[1].startswith("id: 1-0\nevent: status\n")
+    assert chunks[2].startswith("id: 2-0\n")
+    assert len(chunks) == 3
+    assert [read[0]["s"] for read in fake.reads] == ["0-0", "1-0"]
+
+
+def test_idle_stream_sends_keepalives():
+    with patch.object(events, "events_redis", FakeStreams()):
+        chunks = collect(events.stream_events("s", "7-0", stop_when_final=False), limit=3)
+    assert chunks[1:] == [": keepalive\n\n", ": keepalive\n\n"]
+
+
+def test_snapshot_stands_in_for_expired_history():
+    fake = FakeStreams()
+    with patch.object(events, "events_redis", fake):
+        chunks = collect(events.stream_events("s", "0-0", stop_when_final=True, snapshot="snapshot"))
+    assert chunks[1:] == ["snapshot"]
+    assert fake.reads[0][1] is None
+
+
+@pytest.fixture
+def sse_client():
+    app.dependency_overrides[get_db] = lambda: MagicMock()
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+
+
+def test_order_events_resume_after_last_event_id(sse_client):
+    fake = FakeStreams([("s", [entry(b"3-0", "cancelled")])])
+    with patch.object(events.order_crud, "get_order_by_id", return_value=order(OrderStatus.PROCESSING)), \
+            patch.object(events, "events_redis", fake):
+        response = sse_client.get("/api/v1/orders/o1/events", headers={"Last-Event-ID": "2-0"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert "id: 3-0" in response.text
+    assert fake.reads[0][0] == {order_stream("o1"): "2-0"}
+
+
+def test_order_events_rejects_malformed_event_id(sse_client):
+    response = sse_client.get("/api/v1/orders/o1/events?since=abc")
+    assert response.status_code == 400
+
+
+def test_order_events_for_unknown_order(sse_client):
+    with patch.object(events.order_crud, "get_order_by_id", return_value=None), \
+         patch.object(events.archive_crud, "get_archived_order", return_value=None):
+        response = sse_client.get("/api/v1/orders/missing/events")
+    assert response.status_code == 404
@@ -0,0 +1,182 @@
+import io
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import export_orders
+from app.crud import archive as archive_crud
+from app.core.config import settings
+from app.crud import export as export_crud
+from app.db.base import Base
+from app.db.session import get_db
+from app.models.order import Order, OrderStatus
+from app.models.order_item import OrderItem
+from main import app
+
+engine = create_engine(
+    "sqlite:///:memory:",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+NOW = datetime(2026, 10, 19, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+def add_order(db, created_at: datetime, status: OrderStatus = OrderStatus.DELIVERED, items: int = 2) -> str:
+    order_id = str(uuid.uuid4())
+    db.add(Order(
+        id=order_id,
+        user_id="user-1",
+        status=status,
+        total_amount=10.0 * items,
+        shipping_address="1 Main St",
+        billing_address="1 Main St",
+        created_at=created_at,
+    ))
+    for index in range(items):
+        db.add(OrderItem(
+            order_id=order_id,
+            order_created_at=created_at,
+            product_id=f"product-{index}",
+            product_name="Widget",
+            quantity=1,
+            unit_price=10.0,
+            total_price=10.0,
+        ))
+    db.commit()
+    return order_id
+
+
+def read_parquet(data: bytes) -> pq.ParquetFile:
+    return pq.ParquetFile(io.BytesIO(data))
+
+
+def test_export_has_typed_columns(db):
+    add_order(db, NOW - timedelta(days=1))
+
+    table = pa.Table.from_batches(list(export_crud.export_batches(db, "orders", until=NOW)))
+
+    assert table.schema == export_crud.SCHEMAS["orders"]
+    assert table.column("status").to_pylist() == ["delivered"]
+    assert table.column("created_at").to_pylist() == [NOW - timedelta(days=1)]
+
+
+def test_incremental_export_selects_by_last_change(db):
+    add_order(db, NOW - timedelta(days=10))
+    recent = add_order(db, NOW - timedelta(hours=1))
+    updated = add_order(db, NOW - timedelta(days=10))
+    db.query(Order).filter(Order.id == updated).update({"updated_at": NOW - timedelta(hours=2)})
+    db.commit()
+
+    since = NOW - timedelta(days=1)
+    orders = pa.Table.from_batches(
+        list(export_crud.export_batches(db, "orders", since=since, until=NOW)), export_crud.SCHEMAS["orders"]
+    )
+    items = pa.Table.from_batches(
+        list(export_crud.export_batches(db, "order_items", since=since, until=NOW)),
+        export_crud.SCHEMAS["order_items"],
+    )
+
+    assert sorted(orders.column("id").to_pylist()) == sorted([recent, updated])
+    assert set(items.column("order_id").to_pylist()) == {recent}
+
+
+def test_full_export_includes_archived_orders(db):
+    archived = add_order(db, NOW - timedelta(days=200))
+    live = add_order(db, NOW - timedelta(days=1), status=OrderStatus.PENDING)
+    archive_crud.archive_orders(db, before=NOW - timedelta(days=90))
+
+    full = pa.Table.from_batches(list(export_crud.export_batches(db, "orders", until=NOW)))
+    items = pa.Table.from_batches(list(export_crud.export_batches(db, "order_items", until=NOW)))
+    incremental = list(export_crud.export_batches(db, "orders", since=NOW - timedelta(days=365), until=NOW))
+
+    assert sorted(full.column("id").to_pylist()) == sorted([archived, live])
+    assert items.num_rows == 4
+    assert [row for batch in incremental for row in batch.column("id").to_pylist()] == [live]
+
+
+def test_parquet_row_groups_are_bounded(db):
+    for day in range(5):
+        add_order(db, NOW - timedelta(days=day + 1), items=1)
+
+    data = b"".join(export_crud.stream_export(db, "orders", "parquet", until=NOW, batch_size=2))
+
+    parquet = read_parquet(data)
+    assert parquet.metadata.num_rows == 5
+    assert [parquet.metadata.row_group(i).num_rows for i in range(parquet.num_row_groups)] == [2, 2, 1]
+
+
+def test_export_endpoint_streams_arrow(db):
+    add_order(db, NOW - timedelta(days=1))
+
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = lambda: db
+    try:
+        client = TestClient(app)
+        admin = {"X-Admin-Token": "secret"}
+        with patch.object(settings, "EXPORT_ADMIN_TOKEN", ""):
+            disabled = client.get("/api/v1/reports/exports/orders", headers=admin)
+        with patch.object(settings, "EXPORT_ADMIN_TOKEN", "secret"):
+            anonymous = client.get("/api/v1/reports/exports/orders")
+            wrong = client.get("/api/v1/reports/exports/orders", headers={"X-Admin-Token": "guess"})
+            response = client.get(
+                "/api/v1/reports/exports/order_items",
+                params={"format": "arrow", "until": NOW.isoformat()},
+                headers=admin,
+            )
+            unknown = client.get("/api/v1/reports/exports/users", headers=admin)
+            empty_window = client.get(
+                "/api/v1/reports/exports/orders",
+                params={"since": NOW.isoformat(), "until": NOW.isoformat()},
+                headers=admin,
+            )
+    finally:
+        if previous:
+            app.dependency_overrides[get_db] = previous
+        else:
+            app.dependency_overrides.pop(get_db)
+
+    assert [disabled.status_code, anonymous.status_code, wrong.status_code] == [403, 403, 403]
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    assert response.headers["x-export-until"] == NOW.isoformat()
+    assert pa.ipc.open_stream(response.content).read_all().num_rows == 2
+    assert unknown.status_code == 404
+    assert empty_window.status_code == 400
+
+
+def test_export_command_resumes_from_watermark(db, tmp_path):
+    add_order(db, NOW - timedelta(days=3))
+
+    with patch.object(export_orders, "SessionLocal", TestingSessionLocal), \
+         patch.object(export_crud, "default_until", return_value=NOW - timedelta(days=1)):
+        export_orders.main(["--out", str(tmp_path), "--batch-size", "1", "--rows-per-file", "1"])
+    add_order(db, NOW - timedelta(hours=12))
+    with patch.object(export_orders, "SessionLocal", TestingSessionLocal), \
+         patch.object(export_crud, "default_until", return_value=NOW):
+        export_orders.main(["--out", str(tmp_path), "--table", "orders"])
+
+    watermarks = json.loads((tmp_path / "_watermark.json").read_text())
+    assert watermarks == {"orders": NOW.isoformat(), "order_items": (NOW - timedelta(days=1)).isoformat()}
+    assert len(list((tmp_path / "order_items").glob("*.parquet"))) == 2
+    orders = sorted((tmp_path / "orders").glob("*.parquet"))
+    assert [pq.read_metadata(path).num_rows for path in orders] == [1, 1]
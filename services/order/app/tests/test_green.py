@@ -0,0 +1,47 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from psycopg2 import OperationalError, extensions
+
+from app.celery_worker.celery_app import celery_app
+from app.celery_worker.green import gevent_wait_callback, setup_gevent_worker
+
+
+def test_wait_callback_yields_until_query_completes():
+    conn = MagicMock()
+    conn.fileno.return_value = 7
+    conn.poll.side_effect = [extensions.POLL_WRITE, extensions.POLL_READ, extensions.POLL_OK]
+
+    with patch("gevent.socket.wait_read") as wait_read, patch("gevent.socket.wait_write") as wait_write:
+        gevent_wait_callback(conn)
+
+    wait_write.assert_called_once_with(7, timeout=None)
+    wait_read.assert_called_once_with(7, timeout=None)
+
+
+def test_wait_callback_rejects_unknown_poll_state():
+    conn = MagicMock()
+    conn.poll.return_value = 99
+    with pytest.raises(OperationalError):
+        gevent_wait_callback(conn)
+
+
+def test_setup_is_a_no_op_without_gevent():
+    with patch("psycopg2.extensions.set_wait_callback") as set_wait_callback:
+        assert setup_gevent_worker() is False
+    set_wait_callback.assert_not_called()
+
+
+def test_setup_makes_psycopg2_green_under_gevent():
+    monkey = MagicMock()
+    monkey.is_module_patched.return_value = True
+    with patch.dict("sys.modules", {"gevent.monkey": monkey}), \
+            patch("psycopg2.extensions.set_wait_callback") as set_wait_callback:
+        assert setup_gevent_worker() is True
+    set_wait_callback.assert_called_once_with(gevent_wait_callback)
+
+
+def test_in_flight_orders_are_acked_only_when_done():
+    # Under gevent, -c bounds the orders in flight only while each holds at most one unacked message.
+    assert celery_app.conf.task_acks_late is True
+    assert celery_app.conf.worker_prefetch_multiplier == 1
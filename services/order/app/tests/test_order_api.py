@@ -146,4 +146,62 @@ def test_cancel_order():
     response = client.post(f"/api/v1/orders/{order_id}/cancel")
     assert response.status_code == 200
     data = response.json()
-    assert data["status"] == OrderStatus.CANCELLED 
\ No newline at end of file
+    assert data["status"] == OrderStatus.CANCELLED 
+
+def _ledger(status_code):
+    product = mock.MagicMock(status_code=200, headers={"content-type": "application/json"})
+    product.json.return_value = {"id": "test-product-id", "name": "Test Product", "price": 5.0, "stock": 10}
+    pool = mock.MagicMock()
+    pool.request.side_effect = lambda method, path, **kwargs: (
+        product if method == "GET" else mock.MagicMock(status_code=status_code)
+    )
+    return pool
+
+
+def test_create_order_reserves_stock_in_ledger(sample_order_data):
+    pool = _ledger(201)
+    with mock.patch("app.crud.order.pool_for", return_value=pool):
+        response = client.post("/api/v1/orders/", json=sample_order_data)
+    assert response.status_code == 201
+
+    method, path = pool.request.call_args.args
+    assert (method, path) == ("POST", "/api/v1/products/test-product-id/stock/movements")
+    order_id = response.json()["id"]
+    assert pool.request.call_args.kwargs["json"] == {
+        "quantity": -2, "reason": "order", "order_id": order_id, "idempotency_key": f"order:{order_id}:0:reserve",
+    }
+
+
+def test_create_order_rejected_by_ledger(sample_order_data):
+    with mock.patch("app.crud.order.pool_for", return_value=_ledger(409)):
+        response = client.post("/api/v1/orders/", json=sample_order_data)
+    assert response.status_code == 400
+    assert "Insufficient stock" in response.json()["detail"]
+
+
+def test_failed_order_restores_stock_already_reserved(sample_order_data):
+    product = mock.MagicMock(status_code=200, headers={"content-type": "application/json"})
+    product.json.return_value = {"id": "p", "name": "Test Product", "price": 5.0, "stock": 10}
+    # The first item is reserved; the second is out of stock.
+    reserve = {"product-a": 201, "product-b": 409}
+    pool = mock.MagicMock()
+    pool.request.side_effect = lambda method, path, **kwargs: (
+        product if method == "GET" else mock.MagicMock(status_code=(
+            201 if kwargs["json"]["reason"] == "restore" else reserve[path.split("/")[4]]
+        ))
+    )
+    order_data = {**sample_order_data, "items": [
+        {"product_id": "product-a", "quantity": 2}, {"product_id": "product-b", "quantity": 1},
+    ]}
+    with mock.patch("app.crud.order.pool_for", return_value=pool):
+        response = client.post("/api/v1/orders/", json=order_data)
+
+    assert response.status_code == 400
+    movements = [(call.args[1], call.kwargs["json"]) for call in pool.request.call_args_list if call.args[0] == "POST"]
+    assert [(path, body["quantity"], body["reason"]) for path, body in movements] == [
+        ("/api/v1/products/product-a/stock/movements", -2, "order"),
+        ("/api/v1/products/product-b/stock/movements", -1, "order"),
+        ("/api/v1/products/product-a/stock/movements", 2, "restore"),
+    ]
+    order_id = movements[0][1]["order_id"]
+    assert movements[2][1]["idempotency_key"] == f"order:{order_id}:0:restore"
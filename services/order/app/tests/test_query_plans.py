@@ -0,0 +1,161 @@
+"""Query-plan regression tests.
+
+Seeds a throwaway schema, runs the CRUD functions behind the hot paths and
+EXPLAINs every SELECT they issue. A test fails when a plan falls back to a
+sequential scan over a large table, or when its estimated cost grows past the
+recorded baseline.
+
+Needs a PostgreSQL database in ``QUERY_PLAN_DATABASE_URL``; the tests create
+and drop their own ``query_plans`` schema there. Set
+``UPDATE_QUERY_PLAN_BASELINE=1`` to re-record the baseline.
+"""
+import json
+import os
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+import app.db.base_models
+from app.crud import export as export_crud
+from app.crud import order as order_crud
+from app.crud import sales as sales_crud
+
+DATABASE_URL = os.getenv("QUERY_PLAN_DATABASE_URL")
+SCHEMA = "query_plans"
+BASELINE_PATH = Path(__file__).with_name("query_plan_baseline.json")
+SEQ_SCAN_ROW_LIMIT = 1000
+COST_TOLERANCE = 2.0
+
+pytestmark = pytest.mark.skipif(not DATABASE_URL, reason="QUERY_PLAN_DATABASE_URL is not set")
+
+
+CASES = {
+    "get_order_by_id": lambda db: order_crud.get_order_by_id(db, "order-4242"),
+    "get_user_orders": lambda db: order_crud.get_user_orders(db, "user-42"),
+    "order_items": lambda db: order_crud.get_order_by_id(db, "order-4242").items,
+    "get_orders": lambda db: order_crud.get_orders(db, skip=0, limit=100),
+    "daily_sales": lambda db: sales_crud.get_daily_sales(db, date(2026, 3, 1), date(2026, 3, 30)),
+    "product_sales": lambda db: sales_crud.get_product_sales(db, date(2026, 3, 1), date(2026, 3, 30)),
+    "product_daily_sales": lambda db: sales_crud.get_product_daily_sales(
+        db, "product-42", date(2026, 3, 1), date(2026, 3, 30)
+    ),
+    "user_sales_totals": lambda db: sales_crud.get_user_totals(db, "user-42"),
+    "top_users": lambda db: sales_crud.get_top_users(db, limit=100),
+    "export_orders_since": lambda db: list(export_crud.export_batches(
+        db, "orders", since=datetime.now(timezone.utc) + timedelta(hours=1),
+        until=datetime.now(timezone.utc) + timedelta(hours=2),
+    )),
+}
+
+# Listing endpoints page through the whole table; a Limit over a seq scan is expected there.
+ALLOW_SEQ_SCAN = {"get_orders"}
+
+
+@pytest.fixture(scope="module")
+def plan_engine():
+    admin_engine = create_engine(DATABASE_URL)
+    with admin_engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+
+    engine = create_engine(DATABASE_URL, connect_args={"options": f"-csearch_path={SCHEMA}"})
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO orders (id, user_id, status, total_amount, shipping_address, billing_address, created_at) "
+            "SELECT 'order-' || g, 'user-' || (g % 2000), 'DELIVERED', 10, 'address', 'address', now() "
+            "FROM generate_series(1, 20000) AS g"
+        ))
+        conn.execute(text(
+            "INSERT INTO order_items (id, order_id, order_created_at, product_id, product_name, quantity, unit_price, "
+            "total_price, created_at) "
+            "SELECT 'item-' || g, 'order-' || (g % 20000 + 1), now(), 'product-' || (g % 500), 'product', 1, 10, 10, now() "
+            "FROM generate_series(1, 60000) AS g"
+        ))
+        conn.execute(text(
+            "INSERT INTO product_daily_sales (day, product_id, product_name, order_count, units, revenue) "
+            "SELECT DATE '2026-01-01' + d, 'product-' || p, 'product', 1, 1, 10 "
+            "FROM generate_series(0, 364) AS d, generate_series(1, 500) AS p"
+        ))
+        conn.execute(text(
+            "INSERT INTO user_sales_totals (user_id, order_count, units, revenue) "
+            "SELECT 'user-' || g, 1, 1, g FROM generate_series(1, 20000) AS g"
+        ))
+        conn.execute(text("ANALYZE orders"))
+        conn.execute(text("ANALYZE order_items"))
+        conn.execute(text("ANALYZE product_daily_sales"))
+        conn.execute(text("ANALYZE user_sales_totals"))
+
+    yield engine
+
+    engine.dispose()
+    with admin_engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+    admin_engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def baseline():
+    recorded = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    updated = dict(recorded)
+    yield recorded, updated
+    if os.getenv("UPDATE_QUERY_PLAN_BASELINE"):
+        BASELINE_PATH.write_text(json.dumps(updated, indent=2, sort_keys=True) + "\n")
+
+
+def capture_selects(engine, call):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        call(db)
+    finally:
+        db.close()
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return statements
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_query_plan(case, plan_engine, baseline):
+    recorded, updated = baseline
+    statements = capture_selects(plan_engine, CASES[case])
+    assert statements, f"{case} issued no SELECT"
+
+    with plan_engine.connect() as conn:
+        for index, (statement, parameters) in enumerate(statements):
+            key = f"{case}[{index}]"
+            plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()[0]["Plan"]
+
+            if case not in ALLOW_SEQ_SCAN:
+                for node in plan_nodes(plan):
+                    if node["Node Type"] != "Seq Scan":
+                        continue
+                    rows = conn.execute(
+                        text("SELECT reltuples FROM pg_class WHERE oid = CAST(:name AS regclass)"),
+                        {"name": f"{SCHEMA}.{node['Relation Name']}"},
+                    ).scalar()
+                    assert rows <= SEQ_SCAN_ROW_LIMIT, (
+                        f"{key} sequentially scans {node['Relation Name']} ({rows:.0f} rows):\n{statement}"
+                    )
+
+            cost = plan["Total Cost"]
+            updated[key] = cost
+            if key in recorded and not os.getenv("UPDATE_QUERY_PLAN_BASELINE"):
+                assert cost <= recorded[key] * COST_TOLERANCE, (
+                    f"{key} estimated cost rose from {recorded[key]} to {cost}:\n{statement}"
+                )
@@ -0,0 +1,119 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from app.celery_worker.celery_app import (
+    COMPENSATION_QUEUE, DEFAULT_PRIORITY, HIGH_PRIORITY, MAINTENANCE_QUEUE, PROCESSING_QUEUE, QUEUES,
+    apply_worker_concurrency, celery_app,
+)
+from app.celery_worker.metrics import QueueDepthCollector
+from app.celery_worker.tasks import release_stock, restore_product_stock
+
+
+@pytest.mark.parametrize("task_name, queue", [
+    ("process_order", PROCESSING_QUEUE),
+    ("restore_product_stock", COMPENSATION_QUEUE),
+    ("maintenance.archive_orders", MAINTENANCE_QUEUE),
+])
+def test_tasks_are_routed_to_their_queue(task_name, queue):
+    assert celery_app.amqp.router.route({}, task_name)["queue"].name == queue
+
+
+def test_compensation_queue_is_drained_first():
+    assert QUEUES[0] == COMPENSATION_QUEUE
+    assert celery_app.conf.broker_transport_options["queue_order_strategy"] == "priority"
+
+
+def test_release_stock_queues_one_restore_per_item():
+    items = [
+        SimpleNamespace(id="i1", order_id="o1", product_id="p1", quantity=2),
+        SimpleNamespace(id="i2", order_id="o1", product_id="p2", quantity=1),
+    ]
+    with patch.object(restore_product_stock, "apply_async") as apply_async:
+        release_stock(items, priority=HIGH_PRIORITY)
+        release_stock(items[:1])
+
+    assert [c.args[0] for c in apply_async.call_args_list] == [
+        ("p1", 2, "o1", "order-item:i1:restore"),
+        ("p2", 1, "o1", "order-item:i2:restore"),
+        ("p1", 2, "o1", "order-item:i1:restore"),
+    ]
+    assert [c.kwargs["priority"] for c in apply_async.call_args_list] == [HIGH_PRIORITY, HIGH_PRIORITY, DEFAULT_PRIORITY]
+
+
+def test_restore_records_a_keyed_deposit():
+    pool = MagicMock()
+    pool.request.return_value.status_code = 201
+    with patch("app.celery_worker.tasks.pool_for", return_value=pool):
+        restore_product_stock.run("p1", 2, "o1", "order-item:i1:restore")
+
+    method, path = pool.request.call_args.args
+    assert (method, path) == ("POST", "/api/v1/products/p1/stock/movements")
+    assert pool.request.call_args.kwargs["json"] == {
+        "quantity": 2, "reason": "restore", "order_id": "o1", "idempotency_key": "order-item:i1:restore",
+    }
+
+
+def test_restore_retries_when_product_service_is_down():
+    pool = MagicMock()
+    pool.request.side_effect = requests.ConnectionError("down")
+    with patch("app.celery_worker.tasks.pool_for", return_value=pool), \
+            patch.object(restore_product_stock, "retry", return_value=RuntimeError("retrying")) as retry:
+        with pytest.raises(RuntimeError, match="retrying"):
+            restore_product_stock.run("p1", 2)
+    assert isinstance(retry.call_args.kwargs["exc"], requests.ConnectionError)
+
+
+def test_rejected_restore_is_not_retried():
+    pool = MagicMock()
+    pool.request.return_value.status_code = 404
+    with patch("app.celery_worker.tasks.pool_for", return_value=pool), \
+            patch.object(restore_product_stock, "retry") as retry:
+        assert restore_product_stock.run("p1", 2).startswith("Error")
+    retry.assert_not_called()
+
+
+def worker(queues, concurrency=None):
+    return SimpleNamespace(
+        options={"concurrency": concurrency},
+        app=SimpleNamespace(amqp=SimpleNamespace(queues=SimpleNamespace(consume_from={q: None for q in queues}))),
+        concurrency=1,
+    )
+
+
+def test_single_queue_worker_uses_queue_concurrency():
+    with patch.dict("app.celery_worker.celery_app.QUEUE_CONCURRENCY", {COMPENSATION_QUEUE: 3}):
+        compensation = worker([COMPENSATION_QUEUE])
+        apply_worker_concurrency(sender=compensation)
+        explicit = worker([COMPENSATION_QUEUE], concurrency=8)
+        apply_worker_concurrency(sender=explicit)
+        mixed = worker(QUEUES)
+        apply_worker_concurrency(sender=mixed)
+
+    assert compensation.concurrency == 3
+    assert explicit.concurrency == 1
+    assert mixed.concurrency == 1
+
+
+def test_queue_depth_sums_priority_lists():
+    pipe = MagicMock()
+    pipe.execute.return_value = [4, 1, 0, 2, 0, 0]
+    client = MagicMock()
+    client.pipeline.return_value.__enter__.return_value = pipe
+
+    collector = QueueDepthCollector(client, ["processing", "compensation"], [0, 5, 9], ":")
+    depth, by_priority = list(collector.collect())
+
+    assert [key.args[0] for key in pipe.llen.call_args_list] == [
+        "processing", "processing:5", "processing:9", "compensation", "compensation:5", "compensation:9",
+    ]
+    assert {s.labels["queue"]: s.value for s in depth.samples} == {"processing": 5, "compensation": 2}
+    assert len(by_priority.samples) == 6
+
+
+def test_queue_depth_skips_scrape_when_broker_is_down():
+    client = MagicMock()
+    client.pipeline.return_value.__enter__.return_value.execute.side_effect = ConnectionError("down")
+    assert list(QueueDepthCollector(client, ["processing"], [0], ":").collect()) == []
@@ -0,0 +1,159 @@
+import uuid
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.crud import archive as archive_crud
+from app.crud import order as order_crud
+from app.crud import sales as sales_crud
+from app.db.base import Base
+from app.db.session import get_db
+from app.models.order import Order, OrderStatus
+from app.models.order_item import OrderItem
+from app.models.sales import ProductDailySales, UserSalesTotals
+from app.schemas.order import OrderUpdateStatus
+from main import app
+
+engine = create_engine(
+    "sqlite:///:memory:",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+CREATED_AT = datetime(2026, 10, 1, 12, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    with patch.object(order_crud, "order_events"):
+        yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+def add_order(db, status: OrderStatus = OrderStatus.PROCESSING, user_id: str = "user-1") -> str:
+    order_id = str(uuid.uuid4())
+    db.add(Order(
+        id=order_id,
+        user_id=user_id,
+        status=status,
+        total_amount=50.0,
+        shipping_address="1 Main St",
+        billing_address="1 Main St",
+        created_at=CREATED_AT,
+    ))
+    for product_id, quantity, price in (("product-1", 2, 10.0), ("product-2", 1, 30.0)):
+        db.add(OrderItem(
+            order_id=order_id,
+            order_created_at=CREATED_AT,
+            product_id=product_id,
+            product_name=f"Product {product_id}",
+            quantity=quantity,
+            unit_price=price,
+            total_price=quantity * price,
+        ))
+    db.commit()
+    return order_id
+
+
+def set_status(db, order_id: str, status: OrderStatus) -> None:
+    order_crud.update_order_status(db, order_id, OrderUpdateStatus(status=status))
+
+
+def product_row(db, product_id: str) -> ProductDailySales:
+    return db.query(ProductDailySales).filter_by(day=CREATED_AT.date(), product_id=product_id).one()
+
+
+def test_shipping_counts_the_sale_once(db):
+    order_id = add_order(db)
+    set_status(db, order_id, OrderStatus.SHIPPED)
+    set_status(db, order_id, OrderStatus.DELIVERED)
+
+    row = product_row(db, "product-1")
+    assert (row.order_count, row.units, row.revenue) == (1, 2, 20.0)
+    totals = db.query(UserSalesTotals).filter_by(user_id="user-1").one()
+    assert (totals.order_count, totals.units, totals.revenue) == (1, 3, 50.0)
+
+
+def test_unshipped_orders_are_not_counted(db):
+    order_id = add_order(db, OrderStatus.PENDING)
+    set_status(db, order_id, OrderStatus.PROCESSING)
+    order_crud.cancel_order(db, order_id)
+
+    assert db.query(ProductDailySales).count() == 0
+    assert db.query(UserSalesTotals).count() == 0
+
+
+def test_cancelling_a_counted_order_subtracts_it(db):
+    order_id = add_order(db)
+    set_status(db, order_id, OrderStatus.SHIPPED)
+    add_order(db, OrderStatus.SHIPPED)
+    sales_crud.backfill(db)
+
+    order = order_crud.get_order_by_id(db, order_id)
+    order.status = OrderStatus.CANCELLED
+    sales_crud.record_status_change(db, order, OrderStatus.SHIPPED)
+    sales_crud.record_status_change(db, order, OrderStatus.SHIPPED)
+    db.commit()
+
+    row = product_row(db, "product-2")
+    assert (row.order_count, row.units, row.revenue) == (1, 1, 30.0)
+    assert db.query(UserSalesTotals).one().order_count == 1
+
+
+def test_backfill_counts_live_and_archived_orders_once(db):
+    add_order(db, OrderStatus.SHIPPED)
+    add_order(db, OrderStatus.PENDING)
+    archived_id = add_order(db, OrderStatus.DELIVERED, user_id="user-2")
+    archive_crud.archive_orders(db, before=datetime(2026, 10, 2, tzinfo=timezone.utc))
+
+    assert sales_crud.backfill(db, batch_size=1) == 2
+    assert sales_crud.backfill(db, batch_size=1) == 0
+    assert sales_crud.backfill(db, rebuild=True) == 2
+
+    assert product_row(db, "product-1").units == 4
+    assert archive_crud.get_archived_order(db, archived_id) is not None
+    assert {row.user_id: row.revenue for row in db.query(UserSalesTotals)} == {"user-1": 50.0, "user-2": 50.0}
+
+
+def test_reports_read_the_aggregates(db):
+    set_status(db, add_order(db), OrderStatus.SHIPPED)
+    set_status(db, add_order(db, user_id="user-2"), OrderStatus.SHIPPED)
+
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = lambda: db
+    try:
+        client = TestClient(app)
+        window = {"start": "2026-09-01", "end": "2026-10-31"}
+        daily = client.get("/api/v1/reports/sales/daily", params=window)
+        products = client.get("/api/v1/reports/sales/products", params=window)
+        product = client.get("/api/v1/reports/sales/products/product-2", params=window)
+        user = client.get("/api/v1/reports/users/user-2")
+        top = client.get("/api/v1/reports/users/top", params={"limit": 1})
+        missing = client.get("/api/v1/reports/users/nobody")
+        backwards = client.get("/api/v1/reports/sales/daily", params={"start": "2026-10-31", "end": "2026-09-01"})
+    finally:
+        if previous:
+            app.dependency_overrides[get_db] = previous
+        else:
+            app.dependency_overrides.pop(get_db)
+
+    assert daily.json() == [{"day": "2026-10-01", "units": 6, "revenue": 100.0}]
+    assert [row["product_id"] for row in products.json()] == ["product-2", "product-1"]
+    assert products.json()[0]["order_count"] == 2
+    assert product.json() == [{
+        "product_id": "product-2", "product_name": "Product product-2", "order_count": 2, "units": 2,
+        "revenue": 60.0, "day": "2026-10-01",
+    }]
+    assert user.json()["revenue"] == 50.0
+    assert len(top.json()) == 1
+    assert missing.status_code == 404
+    assert backwards.status_code == 400
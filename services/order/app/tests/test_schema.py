@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+
+from app.db.schema import SCHEMA_REVISION, SchemaVersionError, check_schema_revision
+
+SERVICE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def fake_connection(rows=None, error=None):
+    cursor = MagicMock()
+    cursor.fetchall.return_value = rows or []
+    if error:
+        cursor.execute.side_effect = error
+    connection = MagicMock()
+    connection.cursor.return_value = cursor
+    return connection
+
+
+def test_schema_revision_matches_alembic_head():
+    config = Config(os.path.join(SERVICE_ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(SERVICE_ROOT, "alembic"))
+    assert ScriptDirectory.from_config(config).get_heads() == [SCHEMA_REVISION]
+
+
+def test_check_accepts_expected_revision():
+    check_schema_revision(fake_connection(rows=[(SCHEMA_REVISION,)]), None)
+
+
+def test_check_rejects_other_revision():
+    with pytest.raises(SchemaVersionError, match="expected"):
+        check_schema_revision(fake_connection(rows=[("0000",)]), None)
+
+
+def test_check_rejects_unmigrated_database():
+    connection = fake_connection(error=Exception('relation "alembic_version" does not exist'))
+    with pytest.raises(SchemaVersionError, match="alembic upgrade head"):
+        check_schema_revision(connection, None)
+    connection.rollback.assert_called_once()
+
+
+def test_importing_the_app_does_not_create_the_engine():
+    # A fresh interpreter, since other tests in this process may already have opened sessions.
+    code = (
+        "import sys, main, app.celery_worker.tasks\n"
+        "from app.db import session\n"
+        "assert session._engine is None\n"
+        "assert 'psycopg2' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=SERVICE_ROOT, check=True)
+
+
+def test_worker_imports_skip_fastapi():
+    code = "import sys, app.celery_worker.tasks\nassert 'fastapi' not in sys.modules\n"
+    subprocess.run([sys.executable, "-c", code], cwd=SERVICE_ROOT, check=True)
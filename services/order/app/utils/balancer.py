@@ -0,0 +1,113 @@
+import logging
+import random
+import threading
+from typing import Dict, List, Optional
+
+import requests
+from prometheus_client import Counter
+
+from app.core.config import settings
+from app.utils.breaker import CircuitBreaker, Replica, response_health
+
+logger = logging.getLogger(__name__)
+
+BREAKER_TRANSITIONS = Counter(
+    "order_outbound_breaker_transitions_total",
+    "Circuit breaker state changes for each upstream replica",
+    ["replica", "state"],
+)
+
+
+class ReplicaPool:
+    """Spreads outbound requests over the replicas of one service.
+
+    Each request goes to the less busy of two randomly chosen healthy replicas
+    (power of two choices on outstanding requests), so a slow replica builds
+    up outstanding requests and stops being picked. Connection errors,
+    timeouts and 502/504 responses count against a replica's circuit
+    breaker; an open breaker takes the replica out of rotation until a single
+    probe request succeeds. Idempotent requests that fail to connect are
+    retried once on another replica.
+    """
+
+    def __init__(self, urls: List[str], failure_threshold: int = 5, reset_timeout: float = 10.0,
+                 timeout: Optional[float] = None):
+        self.replicas = [Replica(url.rstrip("/"), CircuitBreaker(failure_threshold, reset_timeout)) for url in urls]
+        self.timeout = timeout
+        self._lock = threading.Lock()
+
+    def pick(self, exclude: List[Replica] = ()) -> Optional[Replica]:
+        with self._lock:
+            candidates = [
+                replica for replica in self.replicas if replica not in exclude and replica.breaker.available()
+            ]
+            if not candidates:
+                return None
+            if len(candidates) == 1:
+                replica = candidates[0]
+            else:
+                first, second = random.sample(candidates, 2)
+                replica = first if first.outstanding <= second.outstanding else second
+            replica.breaker.acquire()
+            replica.outstanding += 1
+            return replica
+
+    def release(self, replica: Replica, ok: Optional[bool]) -> None:
+        with self._lock:
+            replica.outstanding -= 1
+            if ok is None:
+                replica.breaker.abandon()
+                return
+            changed = replica.breaker.record_success() if ok else replica.breaker.record_failure()
+            state = replica.breaker.state
+        if changed:
+            BREAKER_TRANSITIONS.labels(replica=replica.url, state=state).inc()
+            log = logger.info if ok else logger.warning
+            log(f"Circuit for {replica.url} is now {state}")
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """Send ``method path`` to a replica; raises ``requests.RequestException`` when none can answer."""
+        kwargs.setdefault("timeout", self.timeout)
+        send = getattr(requests, method.lower())
+        attempts = 2 if method.upper() in ("GET", "HEAD") else 1
+        tried: List[Replica] = []
+        error: Optional[requests.RequestException] = None
+        for _ in range(attempts):
+            replica = self.pick(exclude=tried)
+            if replica is None:
+                break
+            tried.append(replica)
+            try:
+                response = send(f"{replica.url}{path}", **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.release(replica, ok=False)
+                error = e
+                continue
+            except BaseException:
+                self.release(replica, ok=None)
+                raise
+            self.release(replica, ok=response_health(response.status_code))
+            return response
+        if error is not None:
+            raise error
+        raise requests.ConnectionError(f"No healthy replica among {[replica.url for replica in self.replicas]}")
+
+
+_pools: Dict[str, ReplicaPool] = {}
+_pools_lock = threading.Lock()
+
+
+def pool_for(urls: str) -> ReplicaPool:
+    """Return the shared pool for a comma-separated list of replica URLs."""
+    pool = _pools.get(urls)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(urls)
+            if pool is None:
+                pool = _pools[urls] = ReplicaPool(
+                    [url.strip() for url in urls.split(",") if url.strip()],
+                    failure_threshold=settings.OUTBOUND_BREAKER_FAILURES,
+                    reset_timeout=settings.OUTBOUND_BREAKER_RESET_SECONDS,
+                    timeout=settings.OUTBOUND_TIMEOUT_SECONDS,
+                )
+    return pool
@@ -0,0 +1,80 @@
+"""Per-replica circuit breaker, shared by the gateway and the order service's outbound client.
+
+Canonical copy: services/api/app/breaker.py. It is vendored unchanged into
+services/order/app/utils/breaker.py, because each service builds its image
+from its own directory. Edit this file, then run
+``python tools/sync_vendored.py``; the order service's tests fail while
+the copies differ. Keep it free of imports from either service.
+"""
+import time
+from typing import Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Statuses a failing replica, or the server in front of it, answers with. 503 is not one: the
+# services answer it on purpose when shedding load or when one of their own dependencies is down.
+FAILURE_STATUSES = {502, 504}
+
+
+def response_health(status_code: int) -> Optional[bool]:
+    """The ``ok`` to release a replica with after it answered ``status_code``.
+
+    None for a 503, which says nothing about whether the replica is healthy.
+    """
+    if status_code == 503:
+        return None
+    return status_code not in FAILURE_STATUSES
+
+
+class CircuitBreaker:
+    """Ejects a replica after consecutive failures and lets one probe through once it has cooled down."""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+
+    def available(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            return time.monotonic() - self.opened_at >= self.reset_timeout
+        return not self.probing
+
+    def acquire(self) -> None:
+        if self.state == OPEN:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            self.probing = True
+
+    def record_success(self) -> bool:
+        changed = self.state != CLOSED
+        self.state = CLOSED
+        self.failures = 0
+        self.probing = False
+        return changed
+
+    def record_failure(self) -> bool:
+        self.failures += 1
+        self.probing = False
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            changed = self.state != OPEN
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+            return changed
+        return False
+
+    def abandon(self) -> None:
+        self.probing = False
+
+
+class Replica:
+    def __init__(self, url: str, breaker: CircuitBreaker):
+        self.url = url
+        self.breaker = breaker
+        self.outstanding = 0
@@ -0,0 +1,31 @@
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def time_ordered_id() -> Tuple[str, datetime]:
+    """A new UUIDv7 and the millisecond timestamp embedded in it.
+
+    Orders take that timestamp as their ``created_at``, so a lookup by id
+    knows which monthly partition to read.
+    """
+    millis = time.time_ns() // 1_000_000
+    value = (millis << 80) | int.from_bytes(os.urandom(10), "big")
+    value = (value & ~(0xF << 76)) | (0x7 << 76)
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)
+    return str(uuid.UUID(int=value)), EPOCH + timedelta(milliseconds=millis)
+
+
+def id_timestamp(value: str) -> Optional[datetime]:
+    """The creation time embedded in a UUIDv7 id; None for ids of any other shape."""
+    try:
+        parsed = uuid.UUID(value)
+    except (ValueError, AttributeError, TypeError):
+        return None
+    if parsed.version != 7:
+        return None
+    return EPOCH + timedelta(milliseconds=parsed.int >> 80)
@@ -0,0 +1,74 @@
+import logging
+import time
+from typing import Dict, Optional
+
+import redis
+
+from app.core.config import settings
+from app.models.order import OrderStatus
+from app.models.state_machine import OrderStateMachine
+
+logger = logging.getLogger(__name__)
+
+# Every transition lands in the global stream (for consumers of all orders) and in
+# per-order and per-user streams, so a subscriber reads only the events it wants.
+ORDER_EVENTS_STREAM = "order_events"
+
+
+def order_stream(order_id: str) -> str:
+    return f"{ORDER_EVENTS_STREAM}:order:{order_id}"
+
+
+def user_stream(user_id: str) -> str:
+    return f"{ORDER_EVENTS_STREAM}:user:{user_id}"
+
+
+def is_final(status: str) -> bool:
+    """True once an order can no longer change status."""
+    return not OrderStateMachine.ALLOWED_TRANSITIONS.get(OrderStatus(status), [])
+
+
+def status_event(order, previous_status: Optional[OrderStatus]) -> Dict[str, str]:
+    return {
+        "order_id": str(order.id),
+        "user_id": str(order.user_id),
+        "status": order.status.value,
+        "previous_status": previous_status.value if previous_status else "",
+        "at": f"{time.time():.3f}",
+    }
+
+
+class OrderEventPublisher:
+    """Appends order status transitions to Redis Streams.
+
+    Called after the transition has been committed. Publishing is best
+    effort: a Redis outage is logged and never fails the status change, and
+    clients that miss an event still see the order's current status.
+    """
+
+    def __init__(self, redis_client: redis.Redis, maxlen: int, scoped_maxlen: int, ttl: int):
+        self.redis = redis_client
+        self.maxlen = maxlen
+        self.scoped_maxlen = scoped_maxlen
+        self.ttl = ttl
+
+    def publish(self, order, previous_status: Optional[OrderStatus] = None) -> None:
+        event = status_event(order, previous_status)
+        try:
+            with self.redis.pipeline(transaction=False) as pipe:
+                pipe.xadd(ORDER_EVENTS_STREAM, event, maxlen=self.maxlen, approximate=True)
+                for stream in (order_stream(event["order_id"]), user_stream(event["user_id"])):
+                    pipe.xadd(stream, event, maxlen=self.scoped_maxlen, approximate=True)
+                    pipe.expire(stream, self.ttl)
+                pipe.execute()
+        except redis.RedisError as e:
+            logger.error(f"Failed to publish status event for order {event['order_id']}: {str(e)}")
+
+
+redis_client = redis.Redis.from_url(settings.CELERY_BROKER_URL, socket_connect_timeout=2, socket_timeout=2)
+order_events = OrderEventPublisher(
+    redis_client,
+    maxlen=settings.ORDER_EVENTS_MAXLEN,
+    scoped_maxlen=settings.ORDER_EVENTS_SCOPED_MAXLEN,
+    ttl=settings.ORDER_EVENTS_TTL_SECONDS,
+)
@@ -0,0 +1,78 @@
+import threading
+import time
+import logging
+from typing import Optional
+
+
+from app.core.config import settings
+from app.utils.balancer import pool_for
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceTokenProvider:
+    """Fetches and caches the token the worker presents to the user service.
+
+    With a client secret configured the token comes from the user service's
+    client-credentials grant, which never runs bcrypt. Without one it falls back
+    to logging in as the admin user, still cached so the password is checked
+    once per token lifetime rather than once per order.
+    """
+
+    def __init__(self, base_url: str, client_id: str, client_secret: str,
+                 admin_email: str = "", admin_password: str = "", ttl: int = 1500):
+        self.base_url = base_url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.admin_email = admin_email
+        self.admin_password = admin_password
+        self.ttl = ttl
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def get_token(self) -> str:
+        with self._lock:
+            if self._token is None or time.monotonic() >= self._expires_at:
+                self._token = self._fetch()
+                self._expires_at = time.monotonic() + self.ttl
+            return self._token
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._token = None
+
+    def auth_headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.get_token()}"}
+
+    def _fetch(self) -> str:
+        if self.client_secret:
+            response = pool_for(self.base_url).request(
+                "POST",
+                "/api/v1/login/service-token",
+                data={
+                    "grant_type": "client_credentials",
+                    "client_id": self.client_id,
+                    "client_secret": self.client_secret,
+                },
+            )
+        else:
+            logger.warning("USER_SERVICE_CLIENT_SECRET is not set, authenticating as the admin user")
+            response = pool_for(self.base_url).request(
+                "POST",
+                "/api/v1/login/access-token",
+                data={"username": self.admin_email, "password": self.admin_password},
+                headers={"Content-Type": "application/x-www-form-urlencoded"},
+            )
+        response.raise_for_status()
+        return response.json()["access_token"]
+
+
+user_service_auth = ServiceTokenProvider(
+    base_url=settings.USER_SERVICE_URL,
+    client_id=settings.USER_SERVICE_CLIENT_ID,
+    client_secret=settings.USER_SERVICE_CLIENT_SECRET,
+    admin_email=settings.USER_SERVICE_ADMIN_EMAIL,
+    admin_password=settings.USER_SERVICE_ADMIN_PASSWORD,
+    ttl=settings.USER_SERVICE_TOKEN_TTL_SECONDS,
+)
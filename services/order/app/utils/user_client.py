@@ -0,0 +1,39 @@
+import logging
+from typing import Dict, Iterable
+
+import requests
+
+from app.core.config import settings
+from app.utils.balancer import pool_for
+from app.utils.service_auth import user_service_auth
+from app.utils.wire import ACCEPT_HEADERS, decode
+
+logger = logging.getLogger(__name__)
+
+
+def _headers() -> dict:
+    return {**user_service_auth.auth_headers(), **ACCEPT_HEADERS}
+
+
+def _post(path: str, payload: dict) -> requests.Response:
+    pool = pool_for(settings.USER_SERVICE_URL)
+    url = f"{settings.API_V1_STR}{path}"
+    response = pool.request("POST", url, json=payload, headers=_headers())
+    if response.status_code == 401:
+        # The cached token was revoked or the secret rotated; fetch a new one once.
+        user_service_auth.invalidate()
+        response = pool.request("POST", url, json=payload, headers=_headers())
+    response.raise_for_status()
+    return response
+
+
+def lookup_users(user_ids: Iterable[str]) -> Dict[str, Dict[str, bool]]:
+    """Resolve user ids to ``{"exists": ..., "is_active": ...}`` with one request per batch."""
+    user_ids = list(dict.fromkeys(user_ids))
+    statuses: Dict[str, Dict[str, bool]] = {}
+    batch_size = settings.USER_LOOKUP_BATCH_SIZE
+    for start in range(0, len(user_ids), batch_size):
+        response = _post("/users/lookup", {"user_ids": user_ids[start:start + batch_size]})
+        for user in decode(response)["users"]:
+            statuses[user["id"]] = {"exists": user["exists"], "is_active": user["is_active"]}
+    return statuses
@@ -0,0 +1,17 @@
+from typing import Any
+
+import msgpack
+import requests
+
+MSGPACK = "application/msgpack"
+
+# Sent on internal calls; services without msgpack support keep answering JSON.
+ACCEPT_HEADERS = {"Accept": f"{MSGPACK}, application/json;q=0.9"}
+
+
+def decode(response: requests.Response) -> Any:
+    """Decode a response body according to the encoding the service chose."""
+    content_type = str(response.headers.get("content-type", "")).split(";")[0].strip()
+    if content_type == MSGPACK:
+        return msgpack.unpackb(response.content)
+    return response.json()
@@ -0,0 +1,258 @@
+"""End-to-end order throughput benchmark.
+
+Serves the order API from an in-process uvicorn server, answers product and
+user calls from local stub services, processes orders with a local worker
+pool (or Celery's eager mode) and prints a JSON report with throughput and
+per-stage latency percentiles. Everything binds to 127.0.0.1.
+
+    python -m benchmarks.order_flow --orders 1000 --concurrency 16 --workers 8
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import requests
+import uvicorn
+from fastapi import FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.stats import summarize
+from benchmarks.stubs import StubService
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=500, help="number of orders to create")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent order-creating clients")
+    parser.add_argument("--workers", type=int, default=4, help="local worker threads running process_order")
+    parser.add_argument("--worker-mode", choices=["local", "eager"], default="local",
+                        help="'local' queues tasks to worker threads, 'eager' runs them inside the request")
+    parser.add_argument("--products", type=int, default=50, help="number of stub products")
+    parser.add_argument("--users", type=int, default=100, help="number of distinct user ids")
+    parser.add_argument("--max-items", type=int, default=3, help="maximum line items per order")
+    parser.add_argument("--upstream-latency-ms", type=float, default=0.0,
+                        help="artificial latency added to every stub response")
+    parser.add_argument("--database-url", default=None,
+                        help="database for the order schema (defaults to a temporary SQLite file)")
+    parser.add_argument("--redis-url", default=None,
+                        help="Redis for order status events (dropped when unset)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="-", help="file for the JSON report, '-' for stdout")
+    return parser.parse_args(argv)
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.http_statuses: Counter = Counter()
+        self.task_outcomes: Counter = Counter()
+        self.created_at: Dict[str, float] = {}
+        self.first_enqueue: Optional[float] = None
+        self.last_finish: Optional[float] = None
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self.lock:
+            self.latencies[name].append(seconds)
+
+    def task_finished(self, timer) -> None:
+        now = time.perf_counter()
+        with self.lock:
+            self.task_outcomes[timer.outcome if not timer.reason else f"{timer.outcome}:{timer.reason}"] += 1
+            for stage, duration in timer.stages.items():
+                self.latencies[stage].append(duration)
+            self.latencies["process_order"].append(time.time() - timer.started_at)
+            self.last_finish = now
+
+
+class LocalWorker:
+    """Stands in for ``process_order.delay`` and runs tasks on a thread pool."""
+
+    def __init__(self, task, recorder: Recorder, threads: int):
+        self.task = task
+        self.recorder = recorder
+        self.queue: "queue.Queue" = queue.Queue()
+        for _ in range(threads):
+            threading.Thread(target=self._run, daemon=True).start()
+
+    def delay(self, order_id: str) -> None:
+        now = time.perf_counter()
+        with self.recorder.lock:
+            if self.recorder.first_enqueue is None:
+                self.recorder.first_enqueue = now
+        self.queue.put((order_id, now))
+
+    def _run(self) -> None:
+        while True:
+            order_id, enqueued = self.queue.get()
+            try:
+                self.recorder.observe("queue_wait", time.perf_counter() - enqueued)
+                self.task(order_id)
+                created = self.recorder.created_at.get(order_id)
+                if created is not None:
+                    self.recorder.observe("end_to_end", time.perf_counter() - created)
+            finally:
+                self.queue.task_done()
+
+
+class QuietServer(uvicorn.Server):
+    def install_signal_handlers(self) -> None:
+        pass
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run(args: argparse.Namespace) -> Dict:
+    logging.basicConfig(level=logging.WARNING)
+    if args.redis_url:
+        os.environ["CELERY_BROKER_URL"] = args.redis_url
+
+    from app.api.endpoints import orders as orders_endpoint
+    from app.api.endpoints import router as api_router
+    from app.celery_worker import tasks
+    from app.celery_worker.celery_app import celery_app
+    from app.celery_worker.metrics import StageTimer
+    from app.core.config import settings
+    from app.db.base import Base
+    import app.db.base_models
+    from app.db.session import get_db
+    from app.utils.order_events import order_events
+    from app.utils.service_auth import user_service_auth
+
+    rng = random.Random(args.seed)
+    recorder = Recorder()
+
+    database_url = args.database_url
+    if database_url is None:
+        database_url = f"sqlite:///{tempfile.mkdtemp(prefix='order-bench-')}/orders.db"
+    if database_url.startswith("sqlite"):
+        engine = create_engine(database_url, connect_args={"check_same_thread": False, "timeout": 30})
+    else:
+        engine = create_engine(database_url, pool_size=args.concurrency + args.workers, max_overflow=0)
+    Base.metadata.create_all(bind=engine)
+    BenchSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def bench_get_db():
+        db = BenchSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    class RecordingStageTimer(StageTimer):
+        def finish(self) -> None:
+            super().finish()
+            recorder.task_finished(self)
+
+    stubs = StubService(products=args.products, latency_ms=args.upstream_latency_ms).start()
+    settings.PRODUCT_SERVICE_URL = stubs.url
+    settings.USER_SERVICE_URL = stubs.url
+    user_service_auth.base_url = stubs.url
+    tasks.SessionLocal = BenchSessionLocal
+    tasks.StageTimer = RecordingStageTimer
+    if not args.redis_url:
+        order_events.publish = lambda order, previous_status=None: None
+
+    # Stock restores queued by process_order run inline rather than on a compensation worker.
+    celery_app.conf.task_always_eager = True
+    worker = None
+    if args.worker_mode != "eager":
+        worker = LocalWorker(celery_app.tasks["process_order"], recorder, args.workers)
+        orders_endpoint.process_order = worker
+
+    stub_app = FastAPI()
+    stub_app.include_router(api_router, prefix=settings.API_V1_STR)
+    stub_app.dependency_overrides[get_db] = bench_get_db
+    port = free_port()
+    server = QuietServer(uvicorn.Config(stub_app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    base_url = f"http://127.0.0.1:{port}{settings.API_V1_STR}"
+
+    product_ids = list(stubs.products)
+    user_ids = [f"bench-user-{i}" for i in range(args.users)]
+    payloads = []
+    for _ in range(args.orders):
+        items = rng.sample(product_ids, rng.randint(1, min(args.max_items, len(product_ids))))
+        payloads.append({
+            "user_id": rng.choice(user_ids),
+            "shipping_address": "1 Benchmark Way",
+            "billing_address": "1 Benchmark Way",
+            "items": [{"product_id": product_id, "quantity": rng.randint(1, 3)} for product_id in items],
+        })
+
+    sessions = threading.local()
+
+    def create(payload: Dict) -> None:
+        if not hasattr(sessions, "client"):
+            sessions.client = requests.Session()
+        start = time.perf_counter()
+        response = sessions.client.post(f"{base_url}/orders/", json=payload)
+        recorder.observe("create_order", time.perf_counter() - start)
+        with recorder.lock:
+            recorder.http_statuses[str(response.status_code)] += 1
+        if response.status_code == 201:
+            recorder.created_at[response.json()["id"]] = start
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(create, payloads))
+    created_done = time.perf_counter()
+    if worker is not None:
+        worker.queue.join()
+    finished = time.perf_counter()
+
+    server.should_exit = True
+    stubs.stop()
+
+    created = recorder.http_statuses.get("201", 0)
+    processed = sum(recorder.task_outcomes.values())
+    processing_window = (recorder.last_finish or finished) - (recorder.first_enqueue or started)
+    return {
+        "benchmark": "order_flow",
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "database": engine.dialect.name,
+        "wall_time_s": round(finished - started, 3),
+        "throughput": {
+            "orders_created_per_s": round(created / (created_done - started), 2) if created else 0.0,
+            "orders_processed_per_s": round(processed / processing_window, 2) if processed and processing_window > 0 else 0.0,
+            "end_to_end_per_s": round(processed / (finished - started), 2) if processed else 0.0,
+        },
+        "latency": {name: summarize(samples) for name, samples in sorted(recorder.latencies.items())},
+        "outcomes": {
+            "http": dict(recorder.http_statuses),
+            "tasks": dict(recorder.task_outcomes),
+        },
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    report = run(args)
+    output = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(output)
+    else:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
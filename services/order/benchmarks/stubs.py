@@ -0,0 +1,114 @@
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs
+
+
+class StubService:
+    """A local HTTP server that answers the product and user calls made by the order service."""
+
+    def __init__(self, products: int = 10, stock: int = 1_000_000, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.lock = threading.Lock()
+        self.products: Dict[str, Dict] = {}
+        for i in range(products):
+            product_id = str(uuid.uuid4())
+            self.products[product_id] = {
+                "id": product_id,
+                "name": f"Benchmark Product {i}",
+                "price": 10.0 + i,
+                "stock": stock,
+            }
+        self.movements: Dict[str, Dict] = {}
+        self.token = uuid.uuid4().hex
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubService":
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: Dict) -> None:
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _body(self) -> bytes:
+                return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+            def do_GET(self):
+                time.sleep(service.latency)
+                match = re.fullmatch(r"/api/v1/products/([^/]+)", self.path)
+                if match:
+                    with service.lock:
+                        product = service.products.get(match.group(1))
+                        product = dict(product) if product else None
+                    if product is None:
+                        return self._send(404, {"detail": "Product not found"})
+                    return self._send(200, product)
+                match = re.fullmatch(r"/api/v1/users/([^/]+)", self.path)
+                if match:
+                    if self.headers.get("Authorization") != f"Bearer {service.token}":
+                        return self._send(401, {"detail": "Could not validate credentials"})
+                    return self._send(200, {"id": match.group(1), "is_active": True})
+                self._send(404, {"detail": "Not Found"})
+
+            def do_POST(self):
+                time.sleep(service.latency)
+                match = re.fullmatch(r"/api/v1/products/([^/]+)/stock/movements", self.path)
+                if match:
+                    movement = json.loads(self._body())
+                    key = movement.get("idempotency_key")
+                    with service.lock:
+                        product = service.products.get(match.group(1))
+                        if product is None:
+                            return self._send(404, {"detail": "Product not found"})
+                        if key in service.movements:
+                            return self._send(200, service.movements[key])
+                        if product["stock"] + movement["quantity"] < 0:
+                            return self._send(409, {"detail": f"Insufficient stock for product {product['id']}"})
+                        product["stock"] += movement["quantity"]
+                        movement = {**movement, "product_id": product["id"], "balance": product["stock"]}
+                        if key:
+                            service.movements[key] = movement
+                    return self._send(201, movement)
+                if self.path == "/api/v1/users/lookup":
+                    if self.headers.get("Authorization") != f"Bearer {service.token}":
+                        return self._send(401, {"detail": "Could not validate credentials"})
+                    user_ids = json.loads(self._body())["user_ids"]
+                    users = [{"id": user_id, "exists": True, "is_active": True} for user_id in user_ids]
+                    return self._send(200, {"users": users})
+                form = parse_qs(self._body().decode())
+                if self.path == "/api/v1/login/access-token":
+                    if not form.get("username") or not form.get("password"):
+                        return self._send(401, {"detail": "Incorrect email or password"})
+                elif self.path == "/api/v1/login/service-token":
+                    if not form.get("client_id") or not form.get("client_secret"):
+                        return self._send(401, {"detail": "Incorrect client credentials"})
+                else:
+                    return self._send(404, {"detail": "Not Found"})
+                self._send(200, {"access_token": service.token, "token_type": "bearer"})
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
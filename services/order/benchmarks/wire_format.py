@@ -0,0 +1,116 @@
+"""Wire format micro-benchmark for internal service calls.
+
+Compares JSON with msgpack on the payloads the order service exchanges with
+the product and user services: a ``/users/lookup`` batch response and a page
+of products. Encoding mirrors what the services do (Starlette's compact
+``json.dumps`` against ``msgpack.packb``) and decoding mirrors the client
+(``json.loads`` of the response text against ``msgpack.unpackb``). Prints a
+JSON report with per-call CPU time and payload size.
+
+    python -m benchmarks.wire_format --batch-size 500 --products 100
+"""
+import argparse
+import json
+import random
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+import msgpack
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500, help="user ids per lookup response")
+    parser.add_argument("--products", type=int, default=100, help="products per product page")
+    parser.add_argument("--repeat", type=int, default=5, help="timing rounds; the fastest is reported")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="-", help="file for the JSON report, '-' for stdout")
+    return parser.parse_args(argv)
+
+
+def lookup_payload(size: int) -> Dict[str, Any]:
+    return {
+        "users": [
+            {"id": str(uuid.uuid4()), "exists": random.random() > 0.05, "is_active": random.random() > 0.1}
+            for _ in range(size)
+        ]
+    }
+
+
+def products_payload(size: int) -> List[Dict[str, Any]]:
+    now = datetime(2024, 1, 1)
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "name": f"Product {i}",
+            "description": f"Description of product {i}",
+            "price": round(random.uniform(1, 500), 2),
+            "stock": random.randint(0, 1000),
+            "image_url": f"https://example.com/images/{i}.jpg",
+            "created_at": (now + timedelta(minutes=i)).isoformat(),
+            "updated_at": None,
+        }
+        for i in range(size)
+    ]
+
+
+def json_encode(content: Any) -> bytes:
+    # Same settings as Starlette's JSONResponse.render.
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def json_decode(body: bytes) -> Any:
+    return json.loads(body.decode("utf-8"))
+
+
+def best_of(func: Callable[[], Any], repeat: int) -> float:
+    """Fastest mean time per call in microseconds."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return round(min(timer.repeat(repeat=repeat, number=number)) / number * 1e6, 2)
+
+
+def compare(payload: Any, repeat: int) -> Dict[str, Any]:
+    json_body = json_encode(payload)
+    msgpack_body = msgpack.packb(payload)
+    assert msgpack.unpackb(msgpack_body) == json_decode(json_body)
+    report = {
+        "json": {
+            "bytes": len(json_body),
+            "encode_us": best_of(lambda: json_encode(payload), repeat),
+            "decode_us": best_of(lambda: json_decode(json_body), repeat),
+        },
+        "msgpack": {
+            "bytes": len(msgpack_body),
+            "encode_us": best_of(lambda: msgpack.packb(payload), repeat),
+            "decode_us": best_of(lambda: msgpack.unpackb(msgpack_body), repeat),
+        },
+    }
+    report["msgpack_vs_json"] = {
+        key: round(report["msgpack"][key] / report["json"][key], 3) for key in ("bytes", "encode_us", "decode_us")
+    }
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    random.seed(args.seed)
+    report = {
+        "config": vars(args),
+        "users_lookup": compare(lookup_payload(args.batch_size), args.repeat),
+        "products_page": compare(products_payload(args.products), args.repeat),
+    }
+    output = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(output)
+    else:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
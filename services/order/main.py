@@ -1,19 +1,28 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
 from app.api.endpoints import router as api_router
-from app.db.base import Base
-import app.db.base_models
-from app.db.session import engine
+from app.db.schema import CREATE_ALL, create_schema
+from app.db.session import get_engine
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # In alembic mode nothing touches the database here; the first connection checks the revision.
+    if settings.SCHEMA_MANAGEMENT == CREATE_ALL:
+        create_schema(get_engine())
+    yield
 
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     description="Order Processing Microservice",
     version="0.1.0",
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -28,4 +37,4 @@ app.include_router(api_router, prefix=settings.API_V1_STR)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8003, reload=True) 
\ No newline at end of file
+    uvicorn.run("main:app", host="0.0.0.0", port=8003, reload=True)
@@ -11,7 +11,7 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 from app.db.base import Base
-import app.models.product
+import app.db.base_models
 target_metadata = Base.metadata
 
 
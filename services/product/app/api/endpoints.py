@@ -1,13 +1,16 @@
 from typing import Any, List, Dict
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
+from app.api.negotiation import NegotiatedResponse, NegotiatedRoute
+from app.crud import inventory as inventory_crud
 from app.crud import product as product_crud
 from app.db.session import get_db
+from app.schemas.inventory import StockMovement, StockMovementCreate, StockMovementResult
 from app.schemas.product import Product, ProductCreate, ProductUpdate
 
-router = APIRouter()
+router = APIRouter(route_class=NegotiatedRoute)
 
 
 @router.get("/health", response_model=Dict[str, str])
@@ -15,7 +18,7 @@ def health_check() -> Dict[str, str]:
     return {"status": "healthy", "service": "product"}
 
 
-@router.get("/products", response_model=List[Product])
+@router.get("/products", response_model=List[Product], response_class=NegotiatedResponse)
 def read_products(
     db: Session = Depends(get_db),
     skip: int = 0,
@@ -41,7 +44,7 @@ def create_product(
     return product
 
 
-@router.get("/products/{product_id}", response_model=Product)
+@router.get("/products/{product_id}", response_model=Product, response_class=NegotiatedResponse)
 def read_product(
     *,
     db: Session = Depends(get_db),
@@ -86,4 +89,54 @@ def delete_product(
             detail="Product not found",
         )
     product = product_crud.remove(db, product_id=product_id)
-    return product 
\ No newline at end of file
+    return product
+
+
+@router.post(
+    "/products/{product_id}/stock/movements",
+    response_model=StockMovementResult,
+    status_code=status.HTTP_201_CREATED,
+)
+def create_stock_movement(
+    *,
+    db: Session = Depends(get_db),
+    product_id: str,
+    movement_in: StockMovementCreate,
+    response: Response,
+) -> Any:
+    product = product_crud.get(db, product_id=product_id)
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found",
+        )
+    try:
+        movement, created = inventory_crud.record(db, product_id=product_id, movement_in=movement_in)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+        )
+    if not created:
+        response.status_code = status.HTTP_200_OK
+    return {
+        **StockMovement.model_validate(movement).model_dump(),
+        "balance": inventory_crud.get_balance(db, product_id),
+    }
+
+
+@router.get("/products/{product_id}/stock/movements", response_model=List[StockMovement])
+def read_stock_movements(
+    *,
+    db: Session = Depends(get_db),
+    product_id: str,
+    skip: int = 0,
+    limit: int = 100,
+) -> Any:
+    product = product_crud.get(db, product_id=product_id)
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found",
+        )
+    return inventory_crud.get_multi(db, product_id=product_id, skip=skip, limit=limit)
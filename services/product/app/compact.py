@@ -0,0 +1,43 @@
+"""Stock ledger compaction.
+
+Deletes stock movements older than the retention window so the ledger stays
+bounded. Balances already include every movement, so they are not touched.
+Run it periodically (e.g. hourly from cron); concurrent movements are never
+blocked.
+
+    python -m app.compact --retention-days 7
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from app.core.config import settings
+from app.crud import inventory as inventory_crud
+from app.db.session import SessionLocal
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--retention-days", type=float, default=settings.STOCK_LEDGER_RETENTION_DAYS,
+                        help="keep movements younger than this")
+    parser.add_argument("--batch-size", type=int, default=10000, help="movements deleted per transaction")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    before = datetime.now(timezone.utc) - timedelta(days=args.retention_days)
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        deleted = inventory_crud.compact(db, before=before, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"deleted={deleted} before={before.isoformat()} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -18,6 +18,9 @@ class Settings(BaseSettings):
     
     SQLALCHEMY_DATABASE_URI: Optional[str] = None
 
+    # Movements younger than this are kept by compaction, so their idempotency keys still dedupe retries.
+    STOCK_LEDGER_RETENTION_DAYS: int = int(os.getenv("STOCK_LEDGER_RETENTION_DAYS", "7"))
+
     @field_validator("SQLALCHEMY_DATABASE_URI", mode="before")
     def assemble_db_connection(cls, v: Optional[str], values: Dict[str, Any]) -> Any:
         if isinstance(v, str):
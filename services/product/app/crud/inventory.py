@@ -0,0 +1,129 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.inventory import MovementReason, StockMovement
+from app.models.product import Product
+from app.schemas.inventory import StockMovementCreate
+
+
+class InsufficientStockError(ValueError):
+    pass
+
+
+class IdempotencyConflictError(ValueError):
+    pass
+
+
+def get_balance(db: Session, product_id: str) -> Optional[int]:
+    return db.scalar(select(Product.stock).where(Product.id == product_id))
+
+
+def get_by_idempotency_key(db: Session, idempotency_key: str) -> Optional[StockMovement]:
+    return db.query(StockMovement).filter(StockMovement.idempotency_key == idempotency_key).first()
+
+
+def get_multi(
+    db: Session, *, product_id: str, skip: int = 0, limit: int = 100
+) -> List[StockMovement]:
+    return (
+        db.query(StockMovement)
+        .filter(StockMovement.product_id == product_id)
+        .order_by(StockMovement.id.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+
+
+def apply_to_balance(db: Session, product_id: str, quantity: int) -> Optional[int]:
+    """Add ``quantity`` to the product's stock unless that would take it below zero.
+
+    Returns the new balance, or None when the withdrawal was refused. The row
+    stays locked until the caller's transaction ends, so movements for one
+    product are applied one at a time; the caller inserts the movement in the
+    same transaction.
+    """
+    stmt = update(Product).where(Product.id == product_id)
+    if quantity < 0:
+        stmt = stmt.where(Product.stock + quantity >= 0)
+    # Stock changes are recorded in the ledger; they are not edits to the product.
+    stmt = stmt.values({Product.stock: Product.stock + quantity, Product.updated_at: Product.updated_at})
+    return db.scalar(stmt.returning(Product.stock))
+
+
+def _replay(existing: StockMovement, product_id: str, movement_in: StockMovementCreate) -> StockMovement:
+    if (existing.product_id, existing.quantity, existing.reason) != (
+        product_id, movement_in.quantity, movement_in.reason
+    ):
+        raise IdempotencyConflictError(
+            f"Idempotency key {movement_in.idempotency_key} was already used for a different movement"
+        )
+    return existing
+
+
+def record(
+    db: Session, *, product_id: str, movement_in: StockMovementCreate
+) -> Tuple[StockMovement, bool]:
+    """Append a movement; returns it and whether it was new.
+
+    A movement whose idempotency key has already been recorded is not applied
+    again; the original is returned instead. Withdrawals that would take the
+    balance below zero raise ``InsufficientStockError``.
+    """
+    key = movement_in.idempotency_key
+    if key:
+        existing = get_by_idempotency_key(db, key)
+        if existing:
+            return _replay(existing, product_id, movement_in), False
+
+    if apply_to_balance(db, product_id, movement_in.quantity) is None:
+        db.rollback()
+        balance = get_balance(db, product_id)
+        raise InsufficientStockError(f"Insufficient stock for product {product_id}: {balance} available")
+
+    movement = StockMovement(product_id=product_id, **movement_in.model_dump())
+    db.add(movement)
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent request with the same key got there first; the rollback undoes our balance change.
+        db.rollback()
+        existing = get_by_idempotency_key(db, key) if key else None
+        if existing is None:
+            raise
+        return _replay(existing, product_id, movement_in), False
+    db.refresh(movement)
+    return movement, True
+
+
+def adjust_to(db: Session, *, product: Product, stock: int) -> None:
+    """Add an adjustment movement that brings ``product`` to ``stock``; the caller commits."""
+    balance = db.scalar(select(Product.stock).where(Product.id == product.id).with_for_update())
+    if stock != balance:
+        apply_to_balance(db, product.id, stock - balance)
+        db.add(StockMovement(product_id=product.id, quantity=stock - balance, reason=MovementReason.ADJUSTMENT))
+
+
+def compact(db: Session, *, before: datetime, batch_size: int = 10000) -> int:
+    """Delete movements recorded before ``before``, one batch per transaction.
+
+    Balances already include every movement, so this only trims history and
+    never touches ``products``. Returns the number of movements deleted.
+    """
+    deleted = 0
+    while True:
+        ids = db.scalars(
+            select(StockMovement.id)
+            .where(StockMovement.created_at < before)
+            .order_by(StockMovement.id)
+            .limit(batch_size)
+        ).all()
+        if not ids:
+            return deleted
+        db.execute(delete(StockMovement).where(StockMovement.id.in_(ids)))
+        db.commit()
+        deleted += len(ids)
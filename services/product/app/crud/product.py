@@ -2,6 +2,8 @@ from typing import List, Optional, Dict, Any, Union
 
 from sqlalchemy.orm import Session
 
+from app.crud import inventory as inventory_crud
+from app.models.inventory import MovementReason, StockMovement
 from app.models.product import Product
 from app.schemas.product import ProductCreate, ProductUpdate
 
@@ -29,6 +31,9 @@ def create(db: Session, *, obj_in: ProductCreate) -> Product:
         image_url=obj_in.image_url,
     )
     db.add(db_obj)
+    if obj_in.stock:
+        db.flush()
+        db.add(StockMovement(product_id=db_obj.id, quantity=obj_in.stock, reason=MovementReason.INITIAL))
     db.commit()
     db.refresh(db_obj)
     return db_obj
@@ -42,6 +47,10 @@ def update(
     else:
         update_data = obj_in.model_dump(exclude_unset=True)
     
+    # Stock only changes through the ledger: a new level is recorded as an adjustment.
+    if "stock" in update_data:
+        inventory_crud.adjust_to(db, product=db_obj, stock=update_data.pop("stock"))
+    
     for field in update_data:
         if field in update_data:
             setattr(db_obj, field, update_data[field])
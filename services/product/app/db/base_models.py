@@ -1 +1,2 @@
-from app.models.product import Product 
\ No newline at end of file
+from app.models.product import Product
+from app.models.inventory import StockMovement
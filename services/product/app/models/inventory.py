@@ -0,0 +1,32 @@
+from sqlalchemy import BigInteger, Column, DateTime, Enum, ForeignKey, Index, Integer, String
+from sqlalchemy.sql import func
+import enum
+
+from app.db.base import Base
+
+
+class MovementReason(str, enum.Enum):
+    INITIAL = "initial"
+    ORDER = "order"
+    RESTORE = "restore"
+    ADJUSTMENT = "adjustment"
+
+
+class StockMovement(Base):
+    """One signed change to a product's stock; rows are only ever inserted, or deleted by compaction."""
+
+    __tablename__ = "stock_movements"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    product_id = Column(String, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    reason = Column(Enum(MovementReason), nullable=False)
+    order_id = Column(String, nullable=True, index=True)
+    idempotency_key = Column(String, nullable=True, unique=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # Newest-first history for one product.
+        Index("ix_stock_movements_product_id_id", "product_id", "id"),
+        Index("ix_stock_movements_created_at_id", "created_at", "id"),
+    )
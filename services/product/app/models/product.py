@@ -12,7 +12,8 @@ class Product(Base):
     name = Column(String, index=True, nullable=False)
     description = Column(Text)
     price = Column(Float, nullable=False)
+    # Balance of the stock ledger, updated in the same transaction as every movement.
     stock = Column(Integer, nullable=False, default=0)
     image_url = Column(String)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now()) 
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -0,0 +1,31 @@
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel, Field, field_validator
+
+from app.models.inventory import MovementReason
+
+
+class StockMovementCreate(BaseModel):
+    quantity: int
+    reason: MovementReason
+    order_id: Optional[str] = None
+    idempotency_key: Optional[str] = Field(default=None, max_length=200)
+
+    @field_validator("quantity")
+    def quantity_not_zero(cls, v: int) -> int:
+        if v == 0:
+            raise ValueError("quantity must not be zero")
+        return v
+
+
+class StockMovement(StockMovementCreate):
+    id: int
+    product_id: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class StockMovementResult(StockMovement):
+    balance: int
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+import pytest
+
+from app.crud import inventory as inventory_crud
+from app.db.base import Base
+from app.db.session import get_db
+from app.models.inventory import StockMovement
+from main import app
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def client(session_factory):
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    app.dependency_overrides[get_db] = previous
+
+
+@pytest.fixture
+def product_id(client):
+    response = client.post("/api/v1/products", json={"name": "Ledger Product", "price": 5.0, "stock": 10})
+    return response.json()["id"]
+
+
+def movement(client, product_id, quantity, reason="order", **extra):
+    return client.post(
+        f"/api/v1/products/{product_id}/stock/movements",
+        json={"quantity": quantity, "reason": reason, **extra},
+    )
+
+
+def test_movements_update_the_balance(client, product_id):
+    response = movement(client, product_id, -3, order_id="o1")
+    assert response.status_code == 201
+    assert response.json()["balance"] == 7
+
+    assert movement(client, product_id, 2, reason="restore").json()["balance"] == 9
+    assert client.get(f"/api/v1/products/{product_id}").json()["stock"] == 9
+
+    history = client.get(f"/api/v1/products/{product_id}/stock/movements").json()
+    assert [(m["reason"], m["quantity"]) for m in history] == [("restore", 2), ("order", -3), ("initial", 10)]
+
+
+def test_withdrawal_cannot_overdraw(client, product_id):
+    response = movement(client, product_id, -11)
+    assert response.status_code == 409
+    assert client.get(f"/api/v1/products/{product_id}").json()["stock"] == 10
+
+
+def test_idempotency_key_applies_a_movement_once(client, product_id):
+    first = movement(client, product_id, -4, idempotency_key="order:o1:0:reserve")
+    retry = movement(client, product_id, -4, idempotency_key="order:o1:0:reserve")
+
+    assert first.status_code == 201
+    assert retry.status_code == 200
+    assert retry.json()["id"] == first.json()["id"]
+    assert retry.json()["balance"] == 6
+
+    reused = movement(client, product_id, 4, reason="restore", idempotency_key="order:o1:0:reserve")
+    assert reused.status_code == 409
+
+
+def test_put_records_an_adjustment(client, product_id):
+    assert client.put(f"/api/v1/products/{product_id}", json={"stock": 4}).json()["stock"] == 4
+    history = client.get(f"/api/v1/products/{product_id}/stock/movements").json()
+    assert (history[0]["reason"], history[0]["quantity"]) == ("adjustment", -6)
+
+
+def test_movement_validation(client, product_id):
+    assert movement(client, product_id, 0).status_code == 422
+    assert movement(client, "missing", -1).status_code == 404
+
+
+def test_compaction_trims_history_and_keeps_the_balance(client, session_factory, product_id):
+    movement(client, product_id, -3)
+    movement(client, product_id, 1, reason="restore")
+
+    db = session_factory()
+    deleted = inventory_crud.compact(db, before=datetime.now(timezone.utc) + timedelta(days=1), batch_size=2)
+    assert deleted == 3
+    assert db.query(StockMovement).count() == 0
+    assert inventory_crud.get_balance(db, product_id) == 8
+    db.close()
+
+    assert movement(client, product_id, -8).json()["balance"] == 0
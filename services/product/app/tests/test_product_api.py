@@ -4,6 +4,7 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 import pytest
 import json
+import msgpack
 
 from app.db.base import Base
 from app.db.session import get_db
@@ -155,4 +156,20 @@ def test_invalid_product_data():
         "/api/v1/products",
         json=invalid_product,
     )
-    assert response.status_code == 422
\ No newline at end of file
+    assert response.status_code == 422
+def test_product_content_negotiation(sample_product):
+    created = client.post("/api/v1/products", json={**sample_product, "name": "Negotiated Product"}).json()
+    path = f"/api/v1/products/{created['id']}"
+
+    default = client.get(path)
+    assert default.headers["content-type"] == "application/json"
+    assert default.headers["vary"] == "accept"
+
+    packed = client.get(path, headers={"Accept": "application/msgpack, application/json;q=0.9"})
+    assert packed.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(packed.content) == default.json()
+    assert len(packed.content) < len(default.content)
+
+    # Browsers sending */* or preferring JSON keep getting JSON.
+    for accept in ("*/*", "application/json, application/msgpack;q=0.5"):
+        assert client.get(path, headers={"Accept": accept}).headers["content-type"] == "application/json"
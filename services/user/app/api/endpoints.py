@@ -1,21 +1,35 @@
 from datetime import timedelta
-from typing import Any
+from typing import Any, Union
 
-from fastapi import APIRouter, Body, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, Form, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
+from app.api.negotiation import NegotiatedResponse, NegotiatedRoute
 from app.auth.auth import (
     create_access_token,
+    get_current_active_superuser,
+    get_current_principal,
     get_current_user,
 )
+from app.auth.service import ServicePrincipal, service_credentials
+from app.auth.principal_cache import principal_cache
 from app.core.config import settings
+from app.crud import refresh_token as refresh_token_crud
 from app.crud import user as user_crud
 from app.db.session import get_db
-from app.schemas.token import Token
-from app.schemas.user import User, UserCreate, UserUpdate
+from app.schemas.token import RefreshTokenRequest, Token
+from app.schemas.user import (
+    User,
+    UserCreate,
+    UserLookupRequest,
+    UserLookupResponse,
+    UserProvisionRequest,
+    UserProvisionResponse,
+    UserUpdate,
+)
 
-router = APIRouter()
+router = APIRouter(route_class=NegotiatedRoute)
 
 
 @router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED)
@@ -64,9 +78,71 @@ def login_access_token(
             user.id, expires_delta=access_token_expires
         ),
         "token_type": "bearer",
+        "refresh_token": refresh_token_crud.create(db, user_id=user.id),
+    }
+
+
+@router.post("/login/refresh", response_model=Token)
+def login_refresh(
+    *,
+    db: Session = Depends(get_db),
+    token_in: RefreshTokenRequest,
+) -> Any:
+    rotated = refresh_token_crud.rotate(db, token=token_in.refresh_token)
+    if not rotated:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+        )
+    user_id, refresh_token = rotated
+    user = user_crud.get(db, user_id=user_id)
+    if not user or not user.is_active:
+        refresh_token_crud.revoke_token(db, token=refresh_token)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+        )
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return {
+        "access_token": create_access_token(
+            user.id, expires_delta=access_token_expires
+        ),
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
+    }
+
+
+@router.post("/login/service-token", response_model=Token)
+def login_service_token(
+    grant_type: str = Form("client_credentials"),
+    client_id: str = Form(...),
+    client_secret: str = Form(...),
+) -> Any:
+    if grant_type != "client_credentials":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unsupported grant type",
+        )
+    if not service_credentials.authenticate(client_id, client_secret):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect client credentials",
+        )
+    return {
+        "access_token": service_credentials.create_token(client_id),
+        "token_type": "bearer",
     }
 
 
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(
+    *,
+    db: Session = Depends(get_db),
+    token_in: RefreshTokenRequest,
+) -> None:
+    refresh_token_crud.revoke_token(db, token=token_in.refresh_token)
+
+
 @router.get("/me", response_model=User)
 def read_users_me(
     current_user: User = Depends(get_current_user),
@@ -81,18 +157,61 @@ def update_user_me(
     user_in: UserUpdate,
     current_user: User = Depends(get_current_user),
 ) -> Any:
-    user = user_crud.update(db, db_obj=current_user, obj_in=user_in)
+    db_user = user_crud.get(db, user_id=current_user.id)
+    user = user_crud.update(db, db_obj=db_user, obj_in=user_in)
     return user
 
 
-@router.get("/users/{user_id}", response_model=User)
+@router.post("/users/bulk", response_model=UserProvisionResponse)
+def provision_users(
+    *,
+    db: Session = Depends(get_db),
+    provision_in: UserProvisionRequest,
+    current_user: User = Depends(get_current_active_superuser),
+) -> Any:
+    results = user_crud.provision_many(db, records=provision_in.users)
+    return {
+        "created": sum(result["status"] == "created" for result in results),
+        "conflicts": sum(result["status"] == "conflict" for result in results),
+        "invalid": sum(result["status"] == "invalid" for result in results),
+        "results": results,
+    }
+
+
+@router.post("/users/lookup", response_model=UserLookupResponse, response_class=NegotiatedResponse)
+def lookup_users(
+    *,
+    db: Session = Depends(get_db),
+    lookup_in: UserLookupRequest,
+    current_user: Union[User, ServicePrincipal] = Depends(get_current_principal),
+) -> Any:
+    user_ids = list(dict.fromkeys(lookup_in.user_ids))
+    if not isinstance(current_user, ServicePrincipal) and not current_user.is_superuser:
+        if user_ids != [current_user.id]:
+            raise HTTPException(
+                status_code=400, detail="The user doesn't have enough privileges"
+            )
+    found = user_crud.get_active_status_many(db, user_ids=user_ids)
+    return {
+        "users": [
+            {"id": user_id, "exists": user_id in found, "is_active": found.get(user_id, False)}
+            for user_id in user_ids
+        ]
+    }
+
+
+@router.get("/users/{user_id}", response_model=User, response_class=NegotiatedResponse)
 def read_user_by_id(
     user_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Union[User, ServicePrincipal] = Depends(get_current_principal),
 ) -> Any:
     user = user_crud.get(db, user_id=user_id)
-    if user == current_user:
+    if isinstance(current_user, ServicePrincipal):
+        if user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        return user
+    if user is not None and user.id == current_user.id:
         return user
     if not current_user.is_superuser:
         raise HTTPException(
@@ -101,6 +220,16 @@ def read_user_by_id(
     return user
 
 
+@router.post("/users/{user_id}/revoke-tokens", status_code=status.HTTP_204_NO_CONTENT)
+def revoke_user_tokens(
+    user_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_superuser),
+) -> None:
+    refresh_token_crud.revoke_all_for_user(db, user_id=user_id)
+    principal_cache.invalidate(user_id, revoke_tokens=True)
+
+
 @router.get("/health", status_code=status.HTTP_200_OK)
 def health_check() -> Any:
     return {"status": "healthy", "service": "user"} 
\ No newline at end of file
@@ -0,0 +1,72 @@
+"""Accept-header negotiation between JSON and msgpack responses.
+
+Canonical copy: services/product/app/api/negotiation.py. It is vendored
+unchanged into services/user/app/api/negotiation.py, because each service
+builds its image from its own directory. Edit this file, then run
+``python tools/sync_vendored.py``; the user service's tests fail while the
+copies differ.
+"""
+from contextvars import ContextVar
+from typing import Any, Callable, Coroutine, Mapping, Optional
+
+import msgpack
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+
+MSGPACK = "application/msgpack"
+MSGPACK_TYPES = (MSGPACK, "application/vnd.msgpack", "application/x-msgpack")
+
+_prefers_msgpack: ContextVar[bool] = ContextVar("prefers_msgpack", default=False)
+
+
+def prefers_msgpack(accept: str) -> bool:
+    """True when ``accept`` weights msgpack at least as high as JSON."""
+    weights = {}
+    for part in accept.split(","):
+        media, *params = [value.strip() for value in part.split(";")]
+        weight = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    weight = float(param[2:])
+                except ValueError:
+                    weight = 0.0
+        weights[media.lower()] = weight
+    msgpack_weight = max(weights.get(media, 0.0) for media in MSGPACK_TYPES)
+    return msgpack_weight > 0 and msgpack_weight >= weights.get("application/json", 0.0)
+
+
+class NegotiatedResponse(JSONResponse):
+    """JSON by default, msgpack for clients that prefer it in their Accept header.
+
+    Only the final encoding step differs; validation and serialization of the
+    response model are shared, so the msgpack path skips ``json.dumps`` and the
+    client skips ``json.loads``.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if _prefers_msgpack.get():
+            self.media_type = MSGPACK
+            return msgpack.packb(content)
+        return super().render(content)
+
+    def init_headers(self, headers: Optional[Mapping[str, str]] = None) -> None:
+        super().init_headers(headers)
+        self.raw_headers.append((b"vary", b"accept"))
+
+
+class NegotiatedRoute(APIRoute):
+    """Route that records the client's encoding preference for ``NegotiatedResponse``."""
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def negotiated_handler(request: Request) -> Response:
+            token = _prefers_msgpack.set(prefers_msgpack(request.headers.get("accept", "")))
+            try:
+                return await handler(request)
+            finally:
+                _prefers_msgpack.reset(token)
+
+        return negotiated_handler
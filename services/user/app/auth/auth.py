@@ -1,27 +1,37 @@
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional, Tuple, Union
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 
+from app.auth.hashing import password_hasher
+from app.auth.principal_cache import principal_cache
+from app.auth.service import SERVICE_TOKEN_TYPE, ServicePrincipal, service_credentials
 from app.core.config import settings
 from app.db.session import get_db
 from app.models.user import User
 from app.schemas.token import TokenPayload
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/login/access-token")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.verify_and_update(plain_password, hashed_password)[0]
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return password_hasher.verify_and_update(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
+
+
+def get_password_hashes(passwords: List[str]) -> List[str]:
+    return password_hasher.hash_many(passwords)
 
 
 def create_access_token(subject: str, expires_delta: Optional[timedelta] = None) -> str:
@@ -31,31 +41,51 @@ def create_access_token(subject: str, expires_delta: Optional[timedelta] = None)
         expire = datetime.utcnow() + timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {"exp": expire, "iat": time.time(), "sub": str(subject)}
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> User:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _decode_token(token: str) -> Tuple[dict, TokenPayload]:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
         token_data = TokenPayload(**payload)
-        if token_data.sub is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.id == token_data.sub).first()
-    if not user:
+        raise _credentials_exception()
+    if token_data.sub is None:
+        raise _credentials_exception()
+    return payload, token_data
+
+
+def get_current_user(
+    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+) -> User:
+    _, token_data = _decode_token(token)
+    if token_data.typ == SERVICE_TOKEN_TYPE:
+        raise _credentials_exception()
+    return _load_user(db, token_data)
+
+
+def _load_user(db: Session, token_data: TokenPayload) -> User:
+    credentials_exception = _credentials_exception()
+    user = principal_cache.get(token_data.sub)
+    if user is None:
+        db_user = db.query(User).filter(User.id == token_data.sub).first()
+        if not db_user:
+            raise credentials_exception
+        user = principal_cache.put(db_user)
+    revoked_before = principal_cache.revoked_before(token_data.sub)
+    if revoked_before is not None and (token_data.iat or 0) < revoked_before:
         raise credentials_exception
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -69,4 +99,20 @@ def get_current_active_superuser(
         raise HTTPException(
             status_code=400, detail="The user doesn't have enough privileges"
         )
-    return current_user 
\ No newline at end of file
+    return current_user
+
+
+def get_current_principal(
+    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+) -> Union[User, ServicePrincipal]:
+    """Accept either a user token or a service token from an internal caller."""
+    principal = service_credentials.cached(token)
+    if principal is not None:
+        return principal
+    payload, token_data = _decode_token(token)
+    if token_data.typ == SERVICE_TOKEN_TYPE:
+        principal = service_credentials.verify(token, payload)
+        if principal is None:
+            raise _credentials_exception()
+        return principal
+    return _load_user(db, token_data)
@@ -0,0 +1,168 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.core.config import settings
+
+HASHING_SECONDS = Histogram(
+    "user_password_hashing_seconds",
+    "Time to hash or verify a password, including time queued for the pool",
+    ["operation"],
+)
+HASHING_IN_FLIGHT = Gauge(
+    "user_password_hashing_in_flight",
+    "Password hashing jobs running or queued",
+)
+HASHING_REJECTED = Counter(
+    "user_password_hashing_rejected_total",
+    "Password hashing jobs rejected because the pool was saturated",
+    ["operation"],
+)
+# How long each chunk of a bulk hash may wait for a slot before the request fails with 503.
+BULK_SLOT_TIMEOUT_SECONDS = 30.0
+
+PASSWORD_REHASHED = Counter(
+    "user_password_rehashed_total",
+    "Stored password hashes upgraded to the configured bcrypt cost on login",
+)
+
+
+def build_context(rounds: int) -> CryptContext:
+    # Pinning min and max rounds makes needs_update() flag hashes made with any other cost.
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+_contexts: Dict[int, CryptContext] = {}
+
+
+def _context(rounds: int) -> CryptContext:
+    context = _contexts.get(rounds)
+    if context is None:
+        context = _contexts[rounds] = build_context(rounds)
+    return context
+
+
+def hash_password(password: str, rounds: int) -> str:
+    """Hash ``password`` with bcrypt at ``rounds``; picklable, so it can run in any process pool."""
+    return _context(rounds).hash(password)
+
+
+def _verify_and_update(password: str, hashed_password: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    return _context(rounds).verify_and_update(password, hashed_password)
+
+
+class PasswordHasher:
+    """Runs bcrypt in a process pool so hashing cannot starve the request threadpool.
+
+    At most ``workers + max_pending`` jobs are admitted at once; beyond that
+    callers get an immediate 503 with Retry-After instead of queueing. With
+    ``workers=0`` hashing runs inline on the calling thread.
+
+    Bulk hashing takes one slot per ``workers`` passwords and waits for each,
+    so logins submitted meanwhile queue behind at most one chunk, not the
+    whole batch.
+    """
+
+    def __init__(self, workers: int, max_pending: int, rounds: int):
+        self.workers = workers
+        self.rounds = rounds
+        self._slots = threading.BoundedSemaphore(workers + max_pending) if workers else None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    @contextmanager
+    def _admitted(self, operation: str, timeout: Optional[float] = None):
+        acquired = self._slots.acquire(timeout=timeout) if timeout else self._slots.acquire(blocking=False)
+        if not acquired:
+            HASHING_REJECTED.labels(operation=operation).inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many password operations in progress, please retry",
+                headers={"Retry-After": str(settings.HASHING_RETRY_AFTER_SECONDS)},
+            )
+        HASHING_IN_FLIGHT.inc()
+        try:
+            yield self._get_executor()
+        except BrokenProcessPool:
+            with self._lock:
+                self._executor = None
+            raise
+        finally:
+            HASHING_IN_FLIGHT.dec()
+            self._slots.release()
+
+    def _run(self, operation: str, fn, *args):
+        start = time.perf_counter()
+        try:
+            if self._slots is None:
+                return fn(*args)
+            with self._admitted(operation) as executor:
+                return executor.submit(fn, *args).result()
+        finally:
+            HASHING_SECONDS.labels(operation=operation).observe(time.perf_counter() - start)
+
+    def hash(self, password: str) -> str:
+        return self._run("hash", hash_password, password, self.rounds)
+
+    def hash_many(self, passwords: List[str]) -> List[str]:
+        """Hash a batch across every worker, one admitted chunk of ``workers`` passwords at a time."""
+        if not passwords:
+            return []
+        start = time.perf_counter()
+        try:
+            if self._slots is None:
+                return [hash_password(password, self.rounds) for password in passwords]
+            hashes: List[str] = []
+            for offset in range(0, len(passwords), self.workers):
+                # Wait for a slot rather than failing half-way through work already done.
+                with self._admitted("hash_many", timeout=BULK_SLOT_TIMEOUT_SECONDS) as executor:
+                    futures = [
+                        executor.submit(hash_password, password, self.rounds)
+                        for password in passwords[offset:offset + self.workers]
+                    ]
+                    hashes.extend(future.result() for future in futures)
+            return hashes
+        finally:
+            HASHING_SECONDS.labels(operation="hash_many").observe(time.perf_counter() - start)
+
+    def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        valid, new_hash = self._run("verify", _verify_and_update, password, hashed_password, self.rounds)
+        if new_hash:
+            PASSWORD_REHASHED.inc()
+        return valid, new_hash
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+password_hasher = PasswordHasher(
+    workers=settings.HASHING_WORKERS,
+    max_pending=settings.HASHING_MAX_PENDING,
+    rounds=settings.BCRYPT_ROUNDS,
+)
@@ -0,0 +1,166 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import redis
+
+from app.core.config import settings
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "user:principal:invalidate"
+REVOKED_KEY = "user:principal:revoked_before:{user_id}"
+PRINCIPAL_COLUMNS = (
+    "id", "email", "username", "full_name", "is_active", "is_superuser", "created_at", "updated_at",
+)
+
+
+class PrincipalCache:
+    """Per-process cache of authenticated users, so token checks skip the database.
+
+    Entries live for ``ttl`` seconds. When Redis is configured, changes made on
+    any instance are broadcast so every instance evicts the user straight away;
+    token revocations are also stored in Redis so instances that load the user
+    later still honour them. A revocation is forgotten once ``token_lifetime``
+    has passed, when every token it rejects has expired anyway; Redis expires
+    its copy at the same moment.
+    """
+
+    def __init__(self, ttl: int, max_size: int, redis_url: str = "", token_lifetime: int = 0):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.token_lifetime = token_lifetime
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        # Oldest revocation first, so expired ones are dropped from the front.
+        self._revoked_before: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = redis.Redis.from_url(redis_url) if redis_url else None
+        self._listener: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def get(self, user_id: str) -> Optional[User]:
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, values = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+        return User(**values)
+
+    def put(self, user: User) -> User:
+        values = {column: getattr(user, column) for column in PRINCIPAL_COLUMNS}
+        revoked_before = self._load_revocation(values["id"])
+        with self._lock:
+            if revoked_before is not None:
+                self._record_revocation(values["id"], revoked_before)
+            if self.ttl > 0:
+                self._entries[values["id"]] = (time.monotonic() + self.ttl, values)
+                self._entries.move_to_end(values["id"])
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return User(**values)
+
+    def revoked_before(self, user_id: str) -> Optional[float]:
+        with self._lock:
+            revoked_before = self._revoked_before.get(user_id)
+            if revoked_before is not None and self._revocation_expired(revoked_before):
+                del self._revoked_before[user_id]
+                return None
+            return revoked_before
+
+    def evict(self, user_id: str) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def invalidate(self, user_id: str, revoke_tokens: bool = False) -> None:
+        """Drop ``user_id`` everywhere; with ``revoke_tokens`` also reject tokens issued until now."""
+        revoked_before = time.time() if revoke_tokens else None
+        self._apply(user_id, revoked_before)
+        if self._redis is None:
+            return
+        try:
+            if revoked_before is not None:
+                self._redis.set(
+                    REVOKED_KEY.format(user_id=user_id), revoked_before, ex=max(self.token_lifetime, 1)
+                )
+            self._redis.publish(
+                INVALIDATION_CHANNEL, json.dumps({"user_id": user_id, "revoked_before": revoked_before})
+            )
+        except redis.RedisError as e:
+            logger.error(f"Failed to broadcast invalidation for user {user_id}: {str(e)}")
+
+    def _apply(self, user_id: str, revoked_before: Optional[float]) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+            if revoked_before is not None:
+                self._record_revocation(user_id, revoked_before)
+
+    def _revocation_expired(self, revoked_before: float) -> bool:
+        return revoked_before + max(self.token_lifetime, 1) <= time.time()
+
+    def _record_revocation(self, user_id: str, revoked_before: float) -> None:
+        """Remember a revocation and forget the expired ones; call with the lock held."""
+        self._revoked_before[user_id] = max(revoked_before, self._revoked_before.get(user_id, 0))
+        self._revoked_before.move_to_end(user_id)
+        while self._revoked_before and self._revocation_expired(next(iter(self._revoked_before.values()))):
+            self._revoked_before.popitem(last=False)
+
+    def _load_revocation(self, user_id: str) -> Optional[float]:
+        if self._redis is None:
+            return None
+        try:
+            value = self._redis.get(REVOKED_KEY.format(user_id=user_id))
+        except redis.RedisError as e:
+            logger.error(f"Failed to load token revocation for user {user_id}: {str(e)}")
+            return None
+        return float(value) if value is not None else None
+
+    def start_listener(self) -> None:
+        if self._redis is None or self._listener is not None:
+            return
+        self._stopped.clear()
+        self._listener = threading.Thread(target=self._listen, name="principal-cache-listener", daemon=True)
+        self._listener.start()
+
+    def stop_listener(self) -> None:
+        self._stopped.set()
+        self._listener = None
+
+    def _listen(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Anything could have changed while we were not subscribed.
+                self.clear()
+                while not self._stopped.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is None:
+                        continue
+                    event = json.loads(message["data"])
+                    self._apply(event["user_id"], event.get("revoked_before"))
+                pubsub.close()
+            except (redis.RedisError, ValueError, KeyError) as e:
+                logger.error(f"Principal cache listener error: {str(e)}")
+                self._stopped.wait(1.0)
+
+
+principal_cache = PrincipalCache(
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    redis_url=settings.REDIS_URL,
+    token_lifetime=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
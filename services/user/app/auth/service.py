@@ -0,0 +1,90 @@
+import hmac
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from jose import jwt
+
+from app.core.config import settings
+
+SERVICE_TOKEN_TYPE = "service"
+
+
+def parse_service_clients(value: str) -> Dict[str, str]:
+    """Parse ``client_id:secret`` pairs separated by commas."""
+    clients = {}
+    for entry in value.split(","):
+        client_id, _, secret = entry.strip().partition(":")
+        if client_id and secret:
+            clients[client_id] = secret
+    return clients
+
+
+class ServicePrincipal:
+    """An internal service authenticated with client credentials rather than as a user."""
+
+    is_service = True
+
+    def __init__(self, client_id: str):
+        self.client_id = client_id
+
+
+class ServiceCredentials:
+    """Client-credentials grant for internal callers.
+
+    Secrets are compared in constant time and tokens are HS256 JWTs, so neither
+    issuing nor checking a service token goes anywhere near bcrypt. Verified
+    tokens are remembered until they expire, making repeat checks a dict lookup.
+    """
+
+    def __init__(self, clients: Dict[str, str], token_lifetime: int, cache_size: int = 1024):
+        self.clients = clients
+        self.token_lifetime = token_lifetime
+        self.cache_size = cache_size
+        self._verified: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def authenticate(self, client_id: str, client_secret: str) -> bool:
+        expected = self.clients.get(client_id)
+        if expected is None:
+            # Compare anyway so unknown and known client ids take the same time.
+            hmac.compare_digest(client_secret.encode(), client_secret.encode())
+            return False
+        return hmac.compare_digest(expected.encode(), client_secret.encode())
+
+    def create_token(self, client_id: str) -> str:
+        expire = datetime.utcnow() + timedelta(seconds=self.token_lifetime)
+        to_encode = {"exp": expire, "iat": time.time(), "sub": client_id, "typ": SERVICE_TOKEN_TYPE}
+        return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+    def cached(self, token: str) -> Optional[ServicePrincipal]:
+        """Return the principal for a service token verified earlier, if it is still valid."""
+        with self._lock:
+            entry = self._verified.get(token)
+            if entry is None:
+                return None
+            expires_at, client_id = entry
+            if expires_at > time.time() and client_id in self.clients:
+                self._verified.move_to_end(token)
+                return ServicePrincipal(client_id)
+            del self._verified[token]
+        return None
+
+    def verify(self, token: str, payload: dict) -> Optional[ServicePrincipal]:
+        """Check the decoded claims of a service token and remember the result."""
+        client_id = payload.get("sub")
+        if payload.get("typ") != SERVICE_TOKEN_TYPE or client_id not in self.clients:
+            return None
+        with self._lock:
+            self._verified[token] = (float(payload["exp"]), client_id)
+            while len(self._verified) > self.cache_size:
+                self._verified.popitem(last=False)
+        return ServicePrincipal(client_id)
+
+
+service_credentials = ServiceCredentials(
+    clients=parse_service_clients(settings.SERVICE_CLIENTS),
+    token_lifetime=settings.SERVICE_TOKEN_EXPIRE_MINUTES * 60,
+)
@@ -10,6 +10,22 @@ class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY", "supersecretkey")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+    
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    HASHING_WORKERS: int = int(os.getenv("HASHING_WORKERS", str(os.cpu_count() or 1)))
+    HASHING_MAX_PENDING: int = int(os.getenv("HASHING_MAX_PENDING", "32"))
+    HASHING_RETRY_AFTER_SECONDS: int = int(os.getenv("HASHING_RETRY_AFTER_SECONDS", "1"))
+    
+    REDIS_URL: str = os.getenv("REDIS_URL", "")
+    PRINCIPAL_CACHE_TTL_SECONDS: int = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+    PRINCIPAL_CACHE_MAX_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "10000"))
+    
+    SERVICE_CLIENTS: str = os.getenv("SERVICE_CLIENTS", "")
+    SERVICE_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("SERVICE_TOKEN_EXPIRE_MINUTES", "60"))
+    USER_LOOKUP_MAX_IDS: int = int(os.getenv("USER_LOOKUP_MAX_IDS", "1000"))
+    # Kept small so a bulk request finishes in seconds; larger imports go through `python -m app.provision`.
+    BULK_PROVISION_MAX_USERS: int = int(os.getenv("BULK_PROVISION_MAX_USERS", "100"))
     
     POSTGRES_SERVER: str = os.getenv("POSTGRES_SERVER", "postgres")
     POSTGRES_USER: str = os.getenv("POSTGRES_USER", "postgres")
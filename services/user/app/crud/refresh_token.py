@@ -0,0 +1,91 @@
+import hashlib
+import secrets
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.refresh_token import RefreshToken
+
+
+def hash_token(token: str) -> str:
+    # Refresh tokens are 256 random bits, so a fast digest is enough to keep them unusable at rest.
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _new_token(db: Session, *, user_id: str, family_id: str) -> str:
+    token = secrets.token_urlsafe(32)
+    db.add(RefreshToken(
+        user_id=user_id,
+        token_hash=hash_token(token),
+        family_id=family_id,
+        expires_at=datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    return token
+
+
+def create(db: Session, *, user_id: str) -> str:
+    token = _new_token(db, user_id=user_id, family_id=str(uuid.uuid4()))
+    db.commit()
+    return token
+
+
+def rotate(db: Session, *, token: str) -> Optional[Tuple[str, str]]:
+    """Exchange ``token`` for a new one in the same family.
+
+    Returns ``(user_id, new_token)``, or ``None`` when the token is unknown,
+    expired or already used. Presenting an already-rotated token revokes the
+    whole family, since it means the token has leaked.
+    """
+    db_obj = db.query(RefreshToken).filter(RefreshToken.token_hash == hash_token(token)).first()
+    if not db_obj:
+        return None
+
+    now = datetime.now(timezone.utc)
+    claimed = (
+        db.query(RefreshToken)
+        .filter(
+            RefreshToken.id == db_obj.id,
+            RefreshToken.revoked_at.is_(None),
+            RefreshToken.expires_at > now,
+        )
+        .update({RefreshToken.revoked_at: now}, synchronize_session=False)
+    )
+    if claimed != 1:
+        db.rollback()
+        if db_obj.revoked_at is not None:
+            revoke_family(db, family_id=db_obj.family_id)
+        return None
+
+    new_token = _new_token(db, user_id=db_obj.user_id, family_id=db_obj.family_id)
+    db.commit()
+    return db_obj.user_id, new_token
+
+
+def revoke_family(db: Session, *, family_id: str) -> int:
+    revoked = (
+        db.query(RefreshToken)
+        .filter(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .update({RefreshToken.revoked_at: datetime.now(timezone.utc)}, synchronize_session=False)
+    )
+    db.commit()
+    return revoked
+
+
+def revoke_token(db: Session, *, token: str) -> int:
+    db_obj = db.query(RefreshToken).filter(RefreshToken.token_hash == hash_token(token)).first()
+    if not db_obj:
+        return 0
+    return revoke_family(db, family_id=db_obj.family_id)
+
+
+def revoke_all_for_user(db: Session, *, user_id: str) -> int:
+    revoked = (
+        db.query(RefreshToken)
+        .filter(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+        .update({RefreshToken.revoked_at: datetime.now(timezone.utc)}, synchronize_session=False)
+    )
+    db.commit()
+    return revoked
@@ -1,10 +1,16 @@
-from typing import Any, Dict, Optional, Union
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
 
+from pydantic import ValidationError
+from sqlalchemy import or_
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
 
-from app.auth.auth import get_password_hash, verify_password
+from app.auth.auth import get_password_hash, get_password_hashes, verify_and_update_password
+from app.auth.principal_cache import principal_cache
+from app.crud import refresh_token as refresh_token_crud
 from app.models.user import User
-from app.schemas.user import UserCreate, UserUpdate
+from app.schemas.user import UserCreate, UserProvision, UserUpdate
 
 
 def get_by_email(db: Session, email: str) -> Optional[User]:
@@ -19,6 +25,14 @@ def get(db: Session, user_id: str) -> Optional[User]:
     return db.query(User).filter(User.id == user_id).first()
 
 
+def get_active_status_many(db: Session, user_ids: List[str]) -> Dict[str, bool]:
+    """Map each existing id in ``user_ids`` to its ``is_active`` flag, in one query."""
+    if not user_ids:
+        return {}
+    rows = db.query(User.id, User.is_active).filter(User.id.in_(user_ids)).all()
+    return {user_id: is_active for user_id, is_active in rows}
+
+
 def create(db: Session, *, obj_in: UserCreate) -> User:
     db_obj = User(
         email=obj_in.email,
@@ -34,6 +48,100 @@ def create(db: Session, *, obj_in: UserCreate) -> User:
     return db_obj
 
 
+def bulk_insert(db: Session, *, rows: List[Dict[str, Any]]) -> Set[str]:
+    """Insert ``rows`` in one multi-row INSERT, skipping rows that hit a unique constraint.
+
+    Every row must carry the same keys, including ``id``. Returns the ids that
+    were actually inserted.
+    """
+    if not rows:
+        return set()
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    stmt = insert(User).values(rows).on_conflict_do_nothing().returning(User.id)
+    inserted = set(db.execute(stmt).scalars())
+    db.commit()
+    return inserted
+
+
+def get_taken(db: Session, *, emails: List[str], usernames: List[str]) -> Tuple[Set[str], Set[str]]:
+    """Return which of ``emails`` and ``usernames`` already belong to a user."""
+    if not emails and not usernames:
+        return set(), set()
+    rows = db.query(User.email, User.username).filter(
+        or_(User.email.in_(emails), User.username.in_(usernames))
+    ).all()
+    return {email for email, _ in rows}, {username for _, username in rows}
+
+
+def provision_many(
+    db: Session,
+    *,
+    records: List[Dict[str, Any]],
+    hash_passwords: Callable[[List[str]], List[str]] = get_password_hashes,
+) -> List[Dict[str, Any]]:
+    """Create users in bulk and return one result per record, in order.
+
+    Records carry either a plaintext ``password`` or a bcrypt ``hashed_password``.
+    Invalid records, duplicates within the batch and users that already exist
+    are reported rather than raised.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(records)
+    accepted: List[Tuple[int, UserProvision]] = []
+    emails: Set[str] = set()
+    usernames: Set[str] = set()
+    for index, record in enumerate(records):
+        email = record.get("email") if isinstance(record, dict) else None
+        try:
+            user_in = UserProvision(**record)
+        except (TypeError, ValidationError) as e:
+            detail = e.errors()[0]["msg"] if isinstance(e, ValidationError) else "Record must be an object"
+            results[index] = {"index": index, "email": email, "status": "invalid", "detail": detail}
+            continue
+        if user_in.email in emails or user_in.username in usernames:
+            results[index] = {
+                "index": index, "email": email, "status": "conflict",
+                "detail": "Duplicate email or username in batch",
+            }
+            continue
+        emails.add(user_in.email)
+        usernames.add(user_in.username)
+        accepted.append((index, user_in))
+
+    plaintext = [user_in.password for _, user_in in accepted if user_in.hashed_password is None]
+    hashes = iter(hash_passwords(plaintext))
+    rows = []
+    for index, user_in in accepted:
+        rows.append({
+            "id": str(uuid.uuid4()),
+            "email": user_in.email,
+            "username": user_in.username,
+            "hashed_password": user_in.hashed_password or next(hashes),
+            "full_name": user_in.full_name,
+            "is_active": user_in.is_active,
+            "is_superuser": False,
+        })
+
+    inserted = bulk_insert(db, rows=rows)
+    conflicted = [row for row in rows if row["id"] not in inserted]
+    taken_emails, taken_usernames = get_taken(
+        db,
+        emails=[row["email"] for row in conflicted],
+        usernames=[row["username"] for row in conflicted],
+    )
+    for (index, _), row in zip(accepted, rows):
+        if row["id"] in inserted:
+            results[index] = {"index": index, "email": row["email"], "status": "created", "id": row["id"]}
+            continue
+        if row["email"] in taken_emails:
+            detail = "A user with this email already exists"
+        elif row["username"] in taken_usernames:
+            detail = "A user with this username already exists"
+        else:
+            detail = "Conflicts with an existing user"
+        results[index] = {"index": index, "email": row["email"], "status": "conflict", "detail": detail}
+    return results
+
+
 def update(
     db: Session, *, db_obj: User, obj_in: Union[UserUpdate, Dict[str, Any]]
 ) -> User:
@@ -41,7 +149,8 @@ def update(
         update_data = obj_in
     else:
         update_data = obj_in.dict(exclude_unset=True)
-    if update_data.get("password"):
+    password_changed = bool(update_data.get("password"))
+    if password_changed:
         hashed_password = get_password_hash(update_data["password"])
         del update_data["password"]
         update_data["hashed_password"] = hashed_password
@@ -51,6 +160,9 @@ def update(
     db.add(db_obj)
     db.commit()
     db.refresh(db_obj)
+    if password_changed:
+        refresh_token_crud.revoke_all_for_user(db, user_id=db_obj.id)
+    principal_cache.invalidate(db_obj.id, revoke_tokens=password_changed)
     return db_obj
 
 
@@ -58,6 +170,12 @@ def authenticate(db: Session, *, email: str, password: str) -> Optional[User]:
     user = get_by_email(db, email=email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = verify_and_update_password(password, user.hashed_password)
+    if not valid:
         return None
+    if new_hash:
+        user.hashed_password = new_hash
+        db.add(user)
+        db.commit()
+        db.refresh(user)
     return user 
\ No newline at end of file
@@ -1,2 +1,3 @@
 from app.db.base import Base
 from app.models.user import User
+from app.models.refresh_token import RefreshToken
@@ -0,0 +1,134 @@
+"""Bulk user provisioning from the command line.
+
+Streams user records from a JSON Lines or CSV file (``-`` reads JSON Lines
+from stdin), hashes plaintext passwords across a local process pool and
+inserts each batch with a single multi-row INSERT. Records may carry a bcrypt
+``hashed_password`` instead of ``password``; those skip hashing entirely.
+Hashing of the next batch overlaps the insert of the current one.
+
+One JSON result per record is written to ``--results`` (default stdout) and a
+summary to stderr.
+
+    python -m app.provision users.jsonl --batch-size 1000 --results results.jsonl
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from app.auth.hashing import hash_password
+from app.core.config import settings
+from app.crud import user as user_crud
+from app.db.session import SessionLocal
+from app.schemas.user import UserProvision
+
+Batch = List[Tuple[Dict[str, Any], Optional[Future]]]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="JSON Lines or CSV file of user records, or - for JSON Lines on stdin")
+    parser.add_argument("--batch-size", type=int, default=1000, help="records per INSERT")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="hashing processes")
+    parser.add_argument("--rounds", type=int, default=settings.BCRYPT_ROUNDS, help="bcrypt cost for plaintext passwords")
+    parser.add_argument("--results", help="write per-record results here instead of stdout")
+    return parser.parse_args(argv)
+
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    if path == "-":
+        source = sys.stdin
+    else:
+        source = open(path, newline="")
+    with source:
+        if path.endswith(".csv"):
+            for row in csv.DictReader(source):
+                yield {key: value for key, value in row.items() if value != ""}
+        else:
+            for line in source:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def submit_batch(executor: ProcessPoolExecutor, records: List[Dict[str, Any]], rounds: int) -> Batch:
+    """Start hashing every valid plaintext password in ``records``.
+
+    Invalid records are passed through untouched so ``provision_many`` can
+    report them; validating first keeps short passwords from being hashed.
+    """
+    batch: Batch = []
+    for record in records:
+        future = None
+        try:
+            user_in = UserProvision(**record)
+        except (TypeError, ValidationError):
+            user_in = None
+        if user_in is not None and user_in.hashed_password is None:
+            future = executor.submit(hash_password, user_in.password, rounds)
+        batch.append((record, future))
+    return batch
+
+
+def insert_batch(batch: Batch, offset: int) -> List[Dict[str, Any]]:
+    records = []
+    for record, future in batch:
+        if future is not None:
+            record = {key: value for key, value in record.items() if key != "password"}
+            record["hashed_password"] = future.result()
+        records.append(record)
+
+    db = SessionLocal()
+    try:
+        results = user_crud.provision_many(db, records=records, hash_passwords=lambda passwords: [])
+    finally:
+        db.close()
+    for result in results:
+        result["index"] += offset
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    output = open(args.results, "w") if args.results else sys.stdout
+    counts: Counter = Counter()
+    records = read_records(args.path)
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        pending: Optional[Tuple[Batch, int]] = None
+        offset = 0
+        while True:
+            chunk = list(islice(records, args.batch_size))
+            submitted = submit_batch(executor, chunk, args.rounds) if chunk else None
+            if pending is not None:
+                for result in insert_batch(*pending):
+                    counts[result["status"]] += 1
+                    output.write(json.dumps(result) + "\n")
+                elapsed = time.perf_counter() - start
+                total = sum(counts.values())
+                print(f"{total} records in {elapsed:.1f}s ({total / elapsed:.0f} records/s)", file=sys.stderr)
+            if submitted is None:
+                break
+            pending = (submitted, offset)
+            offset += len(chunk)
+
+    if output is not sys.stdout:
+        output.close()
+    print(
+        f"created={counts['created']} conflicts={counts['conflict']} invalid={counts['invalid']}",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
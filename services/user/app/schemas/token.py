@@ -5,7 +5,14 @@ from pydantic import BaseModel
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
 
 
 class TokenPayload(BaseModel):
-    sub: Optional[str] = None 
\ No newline at end of file
+    sub: Optional[str] = None
+    iat: Optional[float] = None
+    typ: Optional[str] = None 
\ No newline at end of file
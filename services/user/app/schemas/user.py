@@ -1,7 +1,9 @@
-from typing import Optional
-from pydantic import BaseModel, EmailStr, Field
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, EmailStr, Field, model_validator
 from datetime import datetime
 
+from app.core.config import settings
+
 
 class UserBase(BaseModel):
     email: Optional[EmailStr] = None
@@ -35,4 +37,56 @@ class User(UserInDBBase):
 
 
 class UserInDB(UserInDBBase):
-    hashed_password: str 
\ No newline at end of file
+    hashed_password: str
+
+
+class UserLookupRequest(BaseModel):
+    user_ids: List[str] = Field(..., min_length=1, max_length=settings.USER_LOOKUP_MAX_IDS)
+
+
+class UserStatus(BaseModel):
+    id: str
+    exists: bool
+    is_active: bool
+
+
+class UserLookupResponse(BaseModel):
+    users: List[UserStatus]
+
+
+BCRYPT_HASH_PATTERN = r"^\$2[aby]?\$\d{2}\$[./A-Za-z0-9]{53}$"
+
+
+class UserProvision(BaseModel):
+    email: EmailStr
+    username: str = Field(..., min_length=3, max_length=50)
+    password: Optional[str] = Field(None, min_length=8)
+    hashed_password: Optional[str] = Field(None, pattern=BCRYPT_HASH_PATTERN)
+    full_name: Optional[str] = None
+    is_active: bool = True
+
+    @model_validator(mode="after")
+    def check_one_password(self) -> "UserProvision":
+        if (self.password is None) == (self.hashed_password is None):
+            raise ValueError("Exactly one of password or hashed_password is required")
+        return self
+
+
+class UserProvisionRequest(BaseModel):
+    # Rows are validated one by one so a bad row is reported instead of failing the batch.
+    users: List[Dict[str, Any]] = Field(..., min_length=1, max_length=settings.BULK_PROVISION_MAX_USERS)
+
+
+class UserProvisionResult(BaseModel):
+    index: int
+    email: Optional[str] = None
+    status: str
+    id: Optional[str] = None
+    detail: Optional[str] = None
+
+
+class UserProvisionResponse(BaseModel):
+    created: int
+    conflicts: int
+    invalid: int
+    results: List[UserProvisionResult]
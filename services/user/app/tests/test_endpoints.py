@@ -1,3 +1,8 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import msgpack
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
@@ -90,4 +95,309 @@ def test_me_endpoint():
     assert response.status_code == 200
     data = response.json()
     assert data["email"] == user_data["email"]
-    assert data["username"] == user_data["username"] 
\ No newline at end of file
+    assert data["username"] == user_data["username"] 
+
+def test_login_rehashes_password_with_new_cost():
+    from app.auth.hashing import password_hasher
+    from app.models.user import User as UserModel
+
+    user_data = {
+        "email": "rehash@example.com",
+        "username": "rehashuser",
+        "password": "password123",
+    }
+    client.post("/api/v1/register", json=user_data)
+
+    original_rounds = password_hasher.rounds
+    password_hasher.rounds = 4
+    try:
+        response = client.post(
+            "/api/v1/login/access-token",
+            data={"username": user_data["email"], "password": user_data["password"]},
+        )
+    finally:
+        password_hasher.rounds = original_rounds
+    assert response.status_code == 200
+
+    db = TestingSessionLocal()
+    try:
+        user = db.query(UserModel).filter(UserModel.email == user_data["email"]).first()
+        assert user.hashed_password.startswith("$2b$04$")
+    finally:
+        db.close()
+
+
+def test_login_rejected_when_hashing_saturated():
+    from unittest import mock
+    from app.auth.hashing import password_hasher
+
+    saturated = mock.MagicMock()
+    saturated.acquire.return_value = False
+    with mock.patch.object(password_hasher, "_slots", saturated):
+        response = client.post(
+            "/api/v1/login/access-token",
+            data={"username": "me@example.com", "password": "password123"},
+        )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def _register_and_login(email, username, password="password123"):
+    client.post("/api/v1/register", json={"email": email, "username": username, "password": password})
+    response = client.post("/api/v1/login/access-token", data={"username": email, "password": password})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_me_served_from_principal_cache():
+    from unittest import mock
+
+    headers = _register_and_login("cached@example.com", "cacheduser")
+    assert client.get("/api/v1/me", headers=headers).status_code == 200
+
+    with mock.patch("app.auth.auth.User") as user_model:
+        response = client.get("/api/v1/me", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["email"] == "cached@example.com"
+    user_model.assert_not_called()
+
+
+def test_deactivation_takes_effect_immediately():
+    headers = _register_and_login("deactivate@example.com", "deactivateuser")
+    assert client.get("/api/v1/me", headers=headers).status_code == 200
+
+    response = client.put("/api/v1/me", json={"is_active": False}, headers=headers)
+    assert response.status_code == 200
+
+    response = client.get("/api/v1/me", headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Inactive user"
+
+
+def test_password_change_revokes_existing_tokens():
+    headers = _register_and_login("revoke@example.com", "revokeuser")
+    response = client.put("/api/v1/me", json={"password": "newpassword123"}, headers=headers)
+    assert response.status_code == 200
+
+    assert client.get("/api/v1/me", headers=headers).status_code == 401
+
+    new_headers = _register_and_login("revoke@example.com", "revokeuser", password="newpassword123")
+    assert client.get("/api/v1/me", headers=new_headers).status_code == 200
+
+
+def test_token_revocations_are_forgotten_after_the_token_lifetime():
+    from unittest import mock
+
+    from app.auth.principal_cache import PrincipalCache
+
+    cache = PrincipalCache(ttl=60, max_size=10, token_lifetime=1800)
+    with mock.patch("app.auth.principal_cache.time.time", return_value=1000.0):
+        cache.invalidate("old", revoke_tokens=True)
+    with mock.patch("app.auth.principal_cache.time.time", return_value=2000.0):
+        cache.invalidate("recent", revoke_tokens=True)
+        assert cache.revoked_before("old") == 1000.0
+
+    with mock.patch("app.auth.principal_cache.time.time", return_value=3000.0):
+        assert cache.revoked_before("old") is None
+        cache.invalidate("new", revoke_tokens=True)
+    assert list(cache._revoked_before) == ["recent", "new"]
+
+    with mock.patch("app.auth.principal_cache.time.time", return_value=5000.0):
+        cache.invalidate("latest", revoke_tokens=True)
+    assert list(cache._revoked_before) == ["latest"]
+
+
+def test_bulk_hashing_takes_a_slot_per_chunk():
+    from concurrent.futures import ThreadPoolExecutor
+    from unittest import mock
+
+    from app.auth.hashing import PasswordHasher, build_context
+
+    hasher = PasswordHasher(workers=2, max_pending=0, rounds=4)
+    executor = ThreadPoolExecutor(max_workers=2)
+    acquired = []
+    slots = hasher._slots
+    with mock.patch.object(hasher, "_get_executor", return_value=executor), \
+         mock.patch.object(hasher, "_slots", wraps=slots) as spy:
+        spy.acquire.side_effect = lambda **kwargs: acquired.append(kwargs) or slots.acquire(**kwargs)
+        hashes = hasher.hash_many(["password1", "password2", "password3"])
+    executor.shutdown()
+
+    # Two chunks for two workers; between them a login could take a slot.
+    assert len(acquired) == 2
+    assert all(kwargs.get("timeout") for kwargs in acquired)
+    assert [build_context(4).verify(f"password{i + 1}", hashed) for i, hashed in enumerate(hashes)] == [True] * 3
+
+
+def _login(email, password="password123"):
+    return client.post("/api/v1/login/access-token", data={"username": email, "password": password}).json()
+
+
+def test_refresh_token_rotation():
+    client.post("/api/v1/register", json={
+        "email": "refresh@example.com", "username": "refreshuser", "password": "password123",
+    })
+    tokens = _login("refresh@example.com")
+    assert tokens["refresh_token"]
+
+    response = client.post("/api/v1/login/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+    headers = {"Authorization": f"Bearer {rotated['access_token']}"}
+    assert client.get("/api/v1/me", headers=headers).status_code == 200
+
+    # Replaying a rotated token is treated as theft and kills the whole family.
+    response = client.post("/api/v1/login/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+    response = client.post("/api/v1/login/refresh", json={"refresh_token": rotated["refresh_token"]})
+    assert response.status_code == 401
+
+
+def test_refresh_tokens_revoked_on_password_change():
+    client.post("/api/v1/register", json={
+        "email": "refreshpw@example.com", "username": "refreshpwuser", "password": "password123",
+    })
+    first = _login("refreshpw@example.com")
+    second = _login("refreshpw@example.com")
+    headers = {"Authorization": f"Bearer {second['access_token']}"}
+    client.put("/api/v1/me", json={"password": "newpassword123"}, headers=headers)
+
+    for tokens in (first, second):
+        response = client.post("/api/v1/login/refresh", json={"refresh_token": tokens["refresh_token"]})
+        assert response.status_code == 401
+
+
+def test_logout_revokes_refresh_token():
+    client.post("/api/v1/register", json={
+        "email": "logout@example.com", "username": "logoutuser", "password": "password123",
+    })
+    tokens = _login("logout@example.com")
+    response = client.post("/api/v1/logout", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 204
+    response = client.post("/api/v1/login/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+
+
+def test_service_token_reads_users_without_hashing():
+    from unittest import mock
+    from app.auth.hashing import password_hasher
+    from app.auth.service import service_credentials
+
+    user = client.post("/api/v1/register", json={
+        "email": "serviced@example.com", "username": "serviceduser", "password": "password123",
+    }).json()
+
+    with mock.patch.dict(service_credentials.clients, {"order": "order-secret"}), \
+            mock.patch.object(password_hasher, "_run", side_effect=AssertionError("bcrypt used")):
+        response = client.post("/api/v1/login/service-token", data={
+            "grant_type": "client_credentials", "client_id": "order", "client_secret": "wrong",
+        })
+        assert response.status_code == 401
+
+        response = client.post("/api/v1/login/service-token", data={
+            "grant_type": "client_credentials", "client_id": "order", "client_secret": "order-secret",
+        })
+        assert response.status_code == 200
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        for _ in range(2):
+            response = client.get(f"/api/v1/users/{user['id']}", headers=headers)
+            assert response.status_code == 200
+            assert response.json()["email"] == "serviced@example.com"
+        assert client.get("/api/v1/users/missing", headers=headers).status_code == 404
+        # Service tokens are not user sessions.
+        assert client.get("/api/v1/me", headers=headers).status_code == 401
+
+    # Removing the client invalidates tokens already issued to it.
+    assert client.get(f"/api/v1/users/{user['id']}", headers=headers).status_code == 401
+
+
+def test_lookup_users():
+    from unittest import mock
+    from app.auth.service import service_credentials
+
+    active = client.post("/api/v1/register", json={
+        "email": "lookup1@example.com", "username": "lookupuser1", "password": "password123",
+    }).json()
+    inactive = client.post("/api/v1/register", json={
+        "email": "lookup2@example.com", "username": "lookupuser2", "password": "password123",
+        "is_active": False,
+    }).json()
+    user_ids = [active["id"], inactive["id"], "missing", active["id"]]
+
+    headers = _register_and_login("lookup3@example.com", "lookupuser3")
+    response = client.post("/api/v1/users/lookup", json={"user_ids": user_ids}, headers=headers)
+    assert response.status_code == 400
+
+    with mock.patch.dict(service_credentials.clients, {"order": "order-secret"}):
+        token = client.post("/api/v1/login/service-token", data={
+            "client_id": "order", "client_secret": "order-secret",
+        }).json()["access_token"]
+        response = client.post(
+            "/api/v1/users/lookup", json={"user_ids": user_ids}, headers={"Authorization": f"Bearer {token}"},
+        )
+        packed = client.post(
+            "/api/v1/users/lookup",
+            json={"user_ids": user_ids},
+            headers={"Authorization": f"Bearer {token}", "Accept": "application/msgpack, application/json;q=0.9"},
+        )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["users"] == [
+        {"id": active["id"], "exists": True, "is_active": True},
+        {"id": inactive["id"], "exists": True, "is_active": False},
+        {"id": "missing", "exists": False, "is_active": False},
+    ]
+    # Internal clients can ask for msgpack instead.
+    assert packed.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(packed.content) == response.json()
+
+
+def test_bulk_provision_users():
+    from app.auth.hashing import build_context
+
+    client.post("/api/v1/register", json={
+        "email": "bulkadmin@example.com", "username": "bulkadmin", "password": "password123",
+        "is_superuser": True,
+    })
+    response = client.post(
+        "/api/v1/login/access-token", data={"username": "bulkadmin@example.com", "password": "password123"},
+    )
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    prehashed = build_context(4).hash("imported123")
+
+    users = [
+        {"email": "bulk1@example.com", "username": "bulkuser1", "password": "password123"},
+        {"email": "bulk2@example.com", "username": "bulkuser2", "hashed_password": prehashed},
+        {"email": "not-an-email", "username": "bulkuser3", "password": "password123"},
+        {"email": "bulk4@example.com", "username": "bulkuser4", "hashed_password": "plaintext"},
+        {"email": "bulk1@example.com", "username": "bulkuser5", "password": "password123"},
+        {"email": "bulkadmin@example.com", "username": "bulkuser6", "password": "password123"},
+    ]
+    response = client.post("/api/v1/users/bulk", json={"users": users}, headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["created"], data["conflicts"], data["invalid"]) == (2, 2, 2)
+    assert [result["status"] for result in data["results"]] == [
+        "created", "created", "invalid", "invalid", "conflict", "conflict",
+    ]
+    assert data["results"][5]["detail"] == "A user with this email already exists"
+
+    for email, password in (("bulk1@example.com", "password123"), ("bulk2@example.com", "imported123")):
+        response = client.post("/api/v1/login/access-token", data={"username": email, "password": password})
+        assert response.status_code == 200
+
+    user_headers = _register_and_login("bulkplain@example.com", "bulkplain")
+    response = client.post("/api/v1/users/bulk", json={"users": users[:1]}, headers=user_headers)
+    assert response.status_code == 400
+
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+
+
+@pytest.mark.skipif(not (REPO_ROOT / "tools" / "sync_vendored.py").exists(), reason="needs the full repository")
+def test_vendored_negotiation_matches_the_product_copy():
+    result = subprocess.run(
+        [sys.executable, str(REPO_ROOT / "tools" / "sync_vendored.py"), "--check"], capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
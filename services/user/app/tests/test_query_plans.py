@@ -0,0 +1,130 @@
+"""Query-plan regression tests.
+
+Seeds a throwaway schema, runs the CRUD functions behind the hot paths and
+EXPLAINs every SELECT they issue. A test fails when a plan falls back to a
+sequential scan over a large table, or when its estimated cost grows past the
+recorded baseline.
+
+Needs a PostgreSQL database in ``QUERY_PLAN_DATABASE_URL``; the tests create
+and drop their own ``query_plans`` schema there. Set
+``UPDATE_QUERY_PLAN_BASELINE=1`` to re-record the baseline.
+"""
+import json
+import os
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+import app.db.base_models
+from app.crud import user as user_crud
+
+DATABASE_URL = os.getenv("QUERY_PLAN_DATABASE_URL")
+SCHEMA = "query_plans"
+BASELINE_PATH = Path(__file__).with_name("query_plan_baseline.json")
+SEQ_SCAN_ROW_LIMIT = 1000
+COST_TOLERANCE = 2.0
+
+pytestmark = pytest.mark.skipif(not DATABASE_URL, reason="QUERY_PLAN_DATABASE_URL is not set")
+
+
+CASES = {
+    "get": lambda db: user_crud.get(db, user_id="user-4242"),
+    "get_by_email": lambda db: user_crud.get_by_email(db, email="user4242@example.com"),
+    "get_by_username": lambda db: user_crud.get_by_username(db, username="user4242"),
+    "get_active_status_many": lambda db: user_crud.get_active_status_many(
+        db, user_ids=[f"user-{i}" for i in range(4200, 4300)]
+    ),
+}
+
+ALLOW_SEQ_SCAN = set()
+
+
+@pytest.fixture(scope="module")
+def plan_engine():
+    admin_engine = create_engine(DATABASE_URL)
+    with admin_engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+
+    engine = create_engine(DATABASE_URL, connect_args={"options": f"-csearch_path={SCHEMA}"})
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO users (id, email, username, hashed_password, full_name, is_active, is_superuser, created_at) "
+            "SELECT 'user-' || g, 'user' || g || '@example.com', 'user' || g, 'hash', 'User', true, false, now() "
+            "FROM generate_series(1, 20000) AS g"
+        ))
+        conn.execute(text("ANALYZE users"))
+
+    yield engine
+
+    engine.dispose()
+    with admin_engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+    admin_engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def baseline():
+    recorded = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    updated = dict(recorded)
+    yield recorded, updated
+    if os.getenv("UPDATE_QUERY_PLAN_BASELINE"):
+        BASELINE_PATH.write_text(json.dumps(updated, indent=2, sort_keys=True) + "\n")
+
+
+def capture_selects(engine, call):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        call(db)
+    finally:
+        db.close()
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return statements
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_query_plan(case, plan_engine, baseline):
+    recorded, updated = baseline
+    statements = capture_selects(plan_engine, CASES[case])
+    assert statements, f"{case} issued no SELECT"
+
+    with plan_engine.connect() as conn:
+        for index, (statement, parameters) in enumerate(statements):
+            key = f"{case}[{index}]"
+            plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()[0]["Plan"]
+
+            if case not in ALLOW_SEQ_SCAN:
+                for node in plan_nodes(plan):
+                    if node["Node Type"] != "Seq Scan":
+                        continue
+                    rows = conn.execute(
+                        text("SELECT reltuples FROM pg_class WHERE oid = CAST(:name AS regclass)"),
+                        {"name": f"{SCHEMA}.{node['Relation Name']}"},
+                    ).scalar()
+                    assert rows <= SEQ_SCAN_ROW_LIMIT, (
+                        f"{key} sequentially scans {node['Relation Name']} ({rows:.0f} rows):\n{statement}"
+                    )
+
+            cost = plan["Total Cost"]
+            updated[key] = cost
+            if key in recorded and not os.getenv("UPDATE_QUERY_PLAN_BASELINE"):
+                assert cost <= recorded[key] * COST_TOLERANCE, (
+                    f"{key} estimated cost rose from {recorded[key]} to {cost}:\n{statement}"
+                )
@@ -1,19 +1,34 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import make_asgi_app
 
 from app.core.config import settings
 from app.api.endpoints import router as api_router
+from app.auth.hashing import password_hasher
+from app.auth.principal_cache import principal_cache
 from app.db.base import Base 
 import app.db.base_models
 from app.db.session import engine
 
 Base.metadata.create_all(bind=engine)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    principal_cache.start_listener()
+    yield
+    principal_cache.stop_listener()
+    password_hasher.shutdown()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     description="User Management Microservice",
     version="0.1.0",
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -25,6 +40,8 @@ app.add_middleware(
 )
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
+app.mount("/metrics", make_asgi_app())
+
 
 if __name__ == "__main__":
     import uvicorn
@@ -22,9 +22,9 @@ echo "Attempting to cancel order..."
 CANCEL_RESPONSE=$(curl -s -X POST http://localhost:8003/api/v1/orders/$ORDER_ID/cancel -H "Content-Type: application/json")
 echo "Cancel response: $CANCEL_RESPONSE"
 
-# Wait 5 seconds
-echo "Waiting 5 seconds..."
-sleep 5
+# Follow status changes until the order settles
+echo "Following order events..."
+curl -sN --max-time 30 http://localhost:8003/api/v1/orders/$ORDER_ID/events
 
 # Check final order status
 echo "Checking final order status..."
@@ -0,0 +1,308 @@
+"""Load generator for order lifecycle scenarios.
+
+Replays a weighted mix of scenarios against running services with open-loop
+(Poisson) arrivals at ``--rate`` per second, capped at ``--concurrency``
+scenarios in flight. Arrivals that find every slot busy are counted as
+dropped rather than queued, so a slow system shows up as drops instead of a
+silently lower rate.
+
+Scenarios:
+  create_cancel  create an order and immediately try to cancel it
+  flash_sale     buy one unit of a hot SKU
+  history        browse a user's order history, one order and the catalogue
+
+After the run, every order created is polled until it leaves PENDING/PROCESSING
+and the stock of each product is compared with what the final order statuses
+imply. The exit code is non-zero when they disagree.
+
+    python tools/loadgen.py --rate 50 --duration 60 --concurrency 100 \\
+        --scenario flash_sale=3 --scenario create_cancel=1 --output run.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+HISTOGRAM_BOUNDS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+SCENARIOS = ["create_cancel", "flash_sale", "history"]
+IN_FLIGHT_STATUSES = {"pending", "processing"}
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--order-url", default="http://localhost:8003")
+    parser.add_argument("--product-url", default="http://localhost:8002")
+    parser.add_argument("--user-url", default="http://localhost:8001")
+    parser.add_argument("--rate", type=float, default=20.0, help="scenario arrivals per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to generate arrivals for")
+    parser.add_argument("--concurrency", type=int, default=50, help="maximum scenarios in flight")
+    parser.add_argument("--scenario", action="append", default=[], metavar="NAME=WEIGHT",
+                        help=f"scenario weight, repeatable (choices: {', '.join(SCENARIOS)}); default is an even mix")
+    parser.add_argument("--products", type=int, default=20, help="products to create for the run")
+    parser.add_argument("--hot-products", type=int, default=1, help="how many of them the flash sale targets")
+    parser.add_argument("--initial-stock", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=20, help="users to register for the run")
+    parser.add_argument("--timeout", type=float, default=10.0, help="per-request timeout in seconds")
+    parser.add_argument("--settle-timeout", type=float, default=60.0,
+                        help="seconds to wait for created orders to finish processing")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default="-", help="file for the JSON report, '-' for stdout")
+    return parser.parse_args(argv)
+
+
+def parse_weights(specs: List[str]) -> Dict[str, float]:
+    if not specs:
+        return {name: 1.0 for name in SCENARIOS}
+    weights = {}
+    for spec in specs:
+        name, _, weight = spec.partition("=")
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def summarize(samples: List[float]) -> Dict:
+    ordered = sorted(samples)
+    if not ordered:
+        return {"count": 0}
+
+    def pct(p: float) -> float:
+        return round(ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)] * 1000, 3)
+
+    buckets = Counter()
+    for sample in ordered:
+        ms = sample * 1000
+        bound = next((b for b in HISTOGRAM_BOUNDS_MS if ms <= b), "inf")
+        buckets[f"le_{bound}ms"] += 1
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+        "max_ms": round(ordered[-1] * 1000, 3),
+        "histogram": {key: buckets[key] for key in [f"le_{b}ms" for b in HISTOGRAM_BOUNDS_MS + ["inf"]] if key in buckets},
+    }
+
+
+class Run:
+    def __init__(self, args: argparse.Namespace, client: httpx.AsyncClient):
+        self.args = args
+        self.client = client
+        self.rng = random.Random(args.seed)
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.outcomes: Dict[str, Counter] = defaultdict(Counter)
+        self.error_details: Counter = Counter()
+        self.products: Dict[str, int] = {}
+        self.hot_products: List[str] = []
+        self.users: List[str] = []
+        self.orders: Dict[str, Dict[str, int]] = {}
+        self.order_ids_by_user: Dict[str, List[str]] = defaultdict(list)
+
+    async def call(self, step: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.latencies[step].append(time.perf_counter() - start)
+            self.outcomes[step][type(e).__name__] += 1
+            return None
+        self.latencies[step].append(time.perf_counter() - start)
+        self.outcomes[step][str(response.status_code)] += 1
+        if response.status_code >= 400:
+            try:
+                detail = response.json().get("detail")
+            except ValueError:
+                detail = None
+            if isinstance(detail, str):
+                # Keep the breakdown readable by dropping the ids services put in their messages.
+                self.error_details[f"{step} {response.status_code}: {detail.split(' for ')[0]}"] += 1
+        return response
+
+    async def setup(self) -> None:
+        run_id = uuid.uuid4().hex[:8]
+        for i in range(self.args.products):
+            response = await self.call("setup_product", "POST", f"{self.args.product_url}/api/v1/products", json={
+                "name": f"loadgen-{run_id}-{i}",
+                "price": round(self.rng.uniform(5, 100), 2),
+                "stock": self.args.initial_stock,
+            })
+            if response is None or response.status_code != 201:
+                raise SystemExit(f"Could not create product: {response.text if response is not None else 'no response'}")
+            self.products[response.json()["id"]] = self.args.initial_stock
+        self.hot_products = list(self.products)[:max(1, self.args.hot_products)]
+
+        for i in range(self.args.users):
+            response = await self.call("setup_user", "POST", f"{self.args.user_url}/api/v1/register", json={
+                "email": f"loadgen-{run_id}-{i}@example.com",
+                "username": f"loadgen-{run_id}-{i}",
+                "password": "loadgen-password",
+            })
+            if response is None or response.status_code != 201:
+                raise SystemExit(f"Could not register user: {response.text if response is not None else 'no response'}")
+            self.users.append(response.json()["id"])
+
+    async def create_order(self, step: str, items: Dict[str, int]) -> Optional[str]:
+        user_id = self.rng.choice(self.users)
+        response = await self.call(step, "POST", f"{self.args.order_url}/api/v1/orders/", json={
+            "user_id": user_id,
+            "shipping_address": "1 Load Test Lane",
+            "billing_address": "1 Load Test Lane",
+            "items": [{"product_id": product_id, "quantity": quantity} for product_id, quantity in items.items()],
+        })
+        if response is None or response.status_code != 201:
+            return None
+        order_id = response.json()["id"]
+        self.orders[order_id] = items
+        self.order_ids_by_user[user_id].append(order_id)
+        return order_id
+
+    async def create_cancel(self) -> None:
+        product_id = self.rng.choice(list(self.products))
+        order_id = await self.create_order("create_cancel.create", {product_id: self.rng.randint(1, 3)})
+        if order_id:
+            await self.call("create_cancel.cancel", "POST", f"{self.args.order_url}/api/v1/orders/{order_id}/cancel")
+
+    async def flash_sale(self) -> None:
+        await self.create_order("flash_sale.create", {self.rng.choice(self.hot_products): 1})
+
+    async def history(self) -> None:
+        user_id = self.rng.choice(self.users)
+        response = await self.call("history.user_orders", "GET",
+                                   f"{self.args.order_url}/api/v1/orders/user/{user_id}", params={"limit": 20})
+        if response is not None and response.status_code == 200 and response.json():
+            order_id = self.rng.choice(response.json())["id"]
+            await self.call("history.order", "GET", f"{self.args.order_url}/api/v1/orders/{order_id}")
+        await self.call("history.catalogue", "GET", f"{self.args.product_url}/api/v1/products",
+                        params={"skip": self.rng.randrange(0, 100), "limit": 20})
+
+    async def drive(self, weights: Dict[str, float]) -> Dict:
+        names = list(weights)
+        scenario_weights = [weights[name] for name in names]
+        slots = asyncio.Semaphore(self.args.concurrency)
+        arrivals: Counter = Counter()
+        dropped: Counter = Counter()
+        in_flight = set()
+
+        async def run_one(name: str) -> None:
+            try:
+                await getattr(self, name)()
+            finally:
+                slots.release()
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        next_arrival = start
+        while True:
+            next_arrival += self.rng.expovariate(self.args.rate)
+            if next_arrival - start >= self.args.duration:
+                break
+            await asyncio.sleep(max(0.0, next_arrival - loop.time()))
+            name = self.rng.choices(names, scenario_weights)[0]
+            arrivals[name] += 1
+            if slots.locked():
+                dropped[name] += 1
+                continue
+            await slots.acquire()
+            task = asyncio.create_task(run_one(name))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        if in_flight:
+            await asyncio.gather(*in_flight)
+        elapsed = loop.time() - start
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "arrivals": dict(arrivals),
+            "dropped": dict(dropped),
+            "achieved_rate": round((sum(arrivals.values()) - sum(dropped.values())) / elapsed, 2) if elapsed else 0.0,
+        }
+
+    async def final_statuses(self) -> Dict[str, Optional[str]]:
+        statuses: Dict[str, Optional[str]] = {order_id: None for order_id in self.orders}
+        deadline = time.monotonic() + self.args.settle_timeout
+        while True:
+            for user_id, order_ids in self.order_ids_by_user.items():
+                response = await self.client.get(f"{self.args.order_url}/api/v1/orders/user/{user_id}",
+                                                 params={"limit": len(order_ids) + 100})
+                if response.status_code == 200:
+                    for order in response.json():
+                        if order["id"] in statuses:
+                            statuses[order["id"]] = order["status"]
+            pending = [order_id for order_id, status in statuses.items() if status is None or status in IN_FLIGHT_STATUSES]
+            if not pending or time.monotonic() >= deadline:
+                return statuses
+            await asyncio.sleep(1)
+
+    async def check_stock(self) -> Dict:
+        statuses = await self.final_statuses()
+        expected = dict(self.products)
+        for order_id, items in self.orders.items():
+            if statuses.get(order_id) != "cancelled":
+                for product_id, quantity in items.items():
+                    expected[product_id] -= quantity
+
+        products = {}
+        for product_id, expected_stock in expected.items():
+            response = await self.client.get(f"{self.args.product_url}/api/v1/products/{product_id}")
+            actual = response.json()["stock"] if response.status_code == 200 else None
+            products[product_id] = {
+                "initial": self.products[product_id],
+                "expected": expected_stock,
+                "actual": actual,
+                "drift": None if actual is None else actual - expected_stock,
+            }
+        unsettled = sum(1 for status in statuses.values() if status is None or status in IN_FLIGHT_STATUSES)
+        return {
+            "order_statuses": dict(Counter(status or "unknown" for status in statuses.values())),
+            "unsettled_orders": unsettled,
+            "inconsistent_products": sum(1 for p in products.values() if p["drift"] != 0),
+            "products": products,
+        }
+
+
+async def main_async(args: argparse.Namespace) -> Dict:
+    weights = parse_weights(args.scenario)
+    limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        run = Run(args, client)
+        await run.setup()
+        summary = await run.drive(weights)
+        consistency = await run.check_stock()
+
+    return {
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "weights": weights,
+        "run": summary,
+        "steps": {
+            step: {"outcomes": dict(run.outcomes[step]), "latency": summarize(samples)}
+            for step, samples in sorted(run.latencies.items())
+        },
+        "errors": dict(run.error_details.most_common()),
+        "consistency": consistency,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    report = asyncio.run(main_async(args))
+    output = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(output)
+    else:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    consistency = report["consistency"]
+    return 1 if consistency["inconsistent_products"] or consistency["unsettled_orders"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+"""Keep modules that several services vendor identical to their canonical copy.
+
+Each service builds its image from its own directory, so code shared between
+services is copied into each of them rather than imported from one place.
+This lists every such module; run it after editing a canonical copy.
+
+    python tools/sync_vendored.py          # overwrite the copies
+    python tools/sync_vendored.py --check  # exit 1 if any copy differs
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Canonical copy -> the copies vendored from it, relative to the repository root.
+VENDORED: Dict[str, List[str]] = {
+    "services/api/app/breaker.py": ["services/order/app/utils/breaker.py"],
+    "services/product/app/api/negotiation.py": ["services/user/app/api/negotiation.py"],
+}
+
+
+def stale_copies() -> List[Path]:
+    stale = []
+    for canonical, copies in VENDORED.items():
+        source = (ROOT / canonical).read_bytes()
+        stale.extend(ROOT / copy for copy in copies if (ROOT / copy).read_bytes() != source)
+    return stale
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="report stale copies instead of overwriting them")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        stale = stale_copies()
+        for path in stale:
+            print(f"{path.relative_to(ROOT)} differs from its canonical copy", file=sys.stderr)
+        return 1 if stale else 0
+    for canonical, copies in VENDORED.items():
+        source = (ROOT / canonical).read_bytes()
+        for copy in copies:
+            (ROOT / copy).write_bytes(source)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())